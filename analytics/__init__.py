@@ -0,0 +1,8 @@
+"""
+=================================================================
+E-COMMERCE ANALYTICS - SHARED DATA LAYER
+=================================================================
+Reusable (non-UI) building blocks shared by the notebooks,
+the Streamlit dashboard and the command-line tools.
+=================================================================
+"""
@@ -0,0 +1,175 @@
+"""
+=================================================================
+DASHBOARD VIEW AGGREGATIONS
+=================================================================
+The numbers behind each dashboard tab, as plain functions with no
+Streamlit dependency, so they can be cached, benchmarked and served
+outside the UI.
+
+``df_filtered`` is the filtered order-line frame; ``agg_source`` is
+either the matching cube slice or the same order lines (see
+analytics.cube.rollup). ``sketch`` is an optional
+analytics.sketches.SketchSlice: when given, distinct customer and
+order counts are HyperLogLog estimates instead of exact nunique().
+``rfm`` is an optional analytics.rfm.RFMSlice for the same date
+range: when given, churn is read from the materialized recency table.
+``daily`` is an optional analytics.timeseries.DailySlice of the same
+filter state, from which trends are read at any granularity.
+Chart views are reduced to a bounded number of points (see
+analytics.chartdata). Results may be shared between sessions via the
+result cache - treat them as read-only.
+=================================================================
+"""
+
+import pandas as pd
+
+from analytics.bins import DISCOUNT_BINS
+from analytics.chartdata import MAX_POINTS, pareto_points, trend_chart
+from analytics.cube import rollup
+from analytics.kpis import compute_kpis, kpis_from_totals
+from analytics.rfm import churn_summary
+from analytics.timeseries import DailySeries
+
+# ======================== TAB 1: OVERVIEW KPIs ========================
+def overview_metrics(df_filtered, agg_source, sketch=None):
+    """Headline KPIs as a dict of numbers (see analytics.kpis), plus 'approximate'"""
+    if sketch is None:
+        metrics = compute_kpis(df_filtered).to_dict()
+    else:
+        # Sums from the cube, distinct counts from merged sketches
+        totals = rollup(agg_source).iloc[0]
+        returning = (sketch.distinct('Customer ID', customer_type=['Returning'])
+                     if 'customer_type' in df_filtered.columns else 0)
+        metrics = kpis_from_totals(
+            revenue=float(totals['Sales']),
+            profit=float(totals['Profit']),
+            lines=int(totals['lines']),
+            orders=round(sketch.distinct('Order ID')),
+            customers=round(sketch.distinct('Customer ID')),
+            returning=returning,
+        ).to_dict()
+    metrics['approximate'] = sketch is not None
+    return metrics
+
+
+def revenue_by(agg_source, dim):
+    return rollup(agg_source, [dim])['Sales'].sort_values(ascending=False)
+
+
+# ======================== TAB 2: SALES TRENDS ========================
+def sales_trend(df_filtered, daily=None, freq='M'):
+    """Sales, Profit and line counts ('Order ID') per ``freq`` period (see analytics.timeseries)"""
+    if daily is None:
+        daily = DailySeries(df_filtered).slice()
+    return daily.trend(freq)
+
+
+def top_products(df_filtered, n=10):
+    top = df_filtered.groupby('Product Name', observed=True).agg({
+        'Sales': 'sum',
+        'Profit': 'sum',
+        'Order ID': 'count'
+    }).sort_values('Sales', ascending=False).head(n)
+    top.columns = ['Revenue', 'Profit', 'Orders']
+    top['Profit Margin %'] = (top['Profit'] / top['Revenue'] * 100).round(2)
+    return top
+
+
+# ======================== TAB 3: CUSTOMER INSIGHTS ========================
+def customer_type_revenue(agg_source):
+    cust_type_data = rollup(agg_source, ['customer_type'])[['Sales', 'Profit']].reset_index()
+    cust_type_data.columns = ['Type', 'Revenue', 'Profit']
+    return cust_type_data
+
+
+def pareto_curve(df_filtered, points=MAX_POINTS):
+    """Cumulative revenue % by customer rank over every customer, sampled at about ``points`` ranks"""
+    customer_value = df_filtered.groupby('Customer ID', observed=True)['Sales'].sum()
+    return pareto_points(customer_value.to_numpy(), points)
+
+
+def churn_activity(df_filtered, rfm=None):
+    """Days since each customer's last order (as of the latest order in the filter)"""
+    if rfm is not None:
+        return rfm.churn()
+    today = df_filtered['Order Date'].max()
+    customer_activity = df_filtered.groupby('Customer ID', observed=True)['Order Date'].max().reset_index()
+    customer_activity.columns = ['Customer_ID', 'Last_Order']
+    customer_activity['Days_Since_Last_Order'] = (today - customer_activity['Last_Order']).dt.days
+    return churn_summary(customer_activity)
+
+
+# ======================== TAB 4: REGIONAL ANALYSIS ========================
+def regional_table(df_filtered, agg_source, sketch=None):
+    region_data = rollup(agg_source, ['Region'])[['Sales', 'Profit', 'lines']]
+    # Distinct customers cannot be rolled up from the cube - merge sketches or count exactly
+    if sketch is not None:
+        region_data['Customers'] = sketch.distinct_by('Customer ID', 'Region').round().astype('int64')
+    else:
+        region_data['Customers'] = df_filtered.groupby('Region', observed=True)['Customer ID'].nunique()
+    region_data = region_data.reset_index()
+    region_data.columns = ['Region', 'Revenue', 'Profit', 'Orders', 'Customers']
+    region_data['Profit_Margin_%'] = (region_data['Profit'] / region_data['Revenue'] * 100).round(2)
+    region_data['Avg_Order_Value'] = (region_data['Revenue'] / region_data['Orders']).round(2)
+    return region_data
+
+
+# ======================== TAB 5: DISCOUNT IMPACT ========================
+def discount_table(stats):
+    """Discount Impact rows from DISCOUNT_BINS.aggregate() stats of Sales and Profit"""
+    return pd.DataFrame({
+        'Discount Level': stats.index.to_list(),
+        'Orders': stats['count'].to_numpy().astype('int64'),
+        'Revenue': stats['Sales'].to_numpy(),
+        'Profit': stats['Profit'].to_numpy(),
+        'Avg Order Value': stats['Sales mean'].to_numpy(),
+        'Profit Margin %': (stats['Profit'] / stats['Sales'] * 100).to_numpy(),
+    })
+
+
+def discount_segments(df_filtered):
+    """One pass over Discount: bins assigned once, every band's sums from bincount"""
+    return discount_table(DISCOUNT_BINS.aggregate(
+        df_filtered['Discount'], {'Sales': df_filtered['Sales'], 'Profit': df_filtered['Profit']}
+    ))
+
+
+# ======================== VIEW REGISTRY ========================
+TABS = ['overview', 'trends', 'customers', 'regional', 'discount']
+
+
+def tab_views(df_filtered, agg_source, sketch=None, rfm=None, daily=None, trend_freq='M', max_points=MAX_POINTS):
+    """Zero-argument computations behind each tab: {tab: {view name: compute}}.
+
+    Views whose input columns are missing are left out, mirroring the
+    dashboard, so callers can prefetch a whole tab without rendering it.
+    Chart series are reduced to about ``max_points`` points (None: full
+    resolution, e.g. for exports).
+    """
+    columns = set(df_filtered.columns)
+    views = {
+        'overview': [
+            ('overview', None, lambda: overview_metrics(df_filtered, agg_source, sketch)),
+            ('revenue_by_category', 'Category', lambda: revenue_by(agg_source, 'Category')),
+            ('revenue_by_region', 'Region', lambda: revenue_by(agg_source, 'Region')),
+        ],
+        'trends': [
+            (f'trend_{trend_freq}', None, lambda: trend_chart(sales_trend(df_filtered, daily, trend_freq), max_points)),
+            ('top_products', 'Product Name', lambda: top_products(df_filtered, n=10)),
+        ],
+        'customers': [
+            ('customer_type_revenue', 'customer_type', lambda: customer_type_revenue(agg_source)),
+            ('pareto_curve', None, lambda: pareto_curve(df_filtered, max_points)),
+            ('churn', 'Order Date', lambda: churn_activity(df_filtered, rfm)),
+        ],
+        'regional': [
+            ('regional_table', 'Region', lambda: regional_table(df_filtered, agg_source, sketch)),
+        ],
+        'discount': [
+            ('discount_segments', 'Discount', lambda: discount_segments(df_filtered)),
+        ],
+    }
+    return {
+        tab: {name: compute for name, needs, compute in entries if needs is None or needs in columns}
+        for tab, entries in views.items()
+    }
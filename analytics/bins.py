@@ -0,0 +1,104 @@
+"""
+=================================================================
+BINNED AGGREGATION ENGINE
+=================================================================
+One bin definition, one pass: values are assigned to bins with a
+single vectorized ``searchsorted`` over the edges, then counts, sums
+and means of every measure come from one ``np.bincount`` per measure
+- no per-bin masks or slices.
+
+Bins are right-closed and the first also holds its lower edge, as
+``pd.cut(..., include_lowest=True)``: edges [0, 0, 0.1, 0.2] are the
+bins [0, 0], (0, 0.1], (0.1, 0.2]. Values outside the edges (or NaN)
+belong to no bin.
+
+The shared definitions live here so the dashboard, notebook 02, the
+reports and the SQLite backend bin the same way (DISCOUNT_BINS: the
+Discount Impact bands). Churn risk levels, the churn histogram and
+revenue_segment build their Bins from their own thresholds.
+=================================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+# Discount Impact bands - edit here to change them everywhere
+DISCOUNT_EDGES = [0.0, 0.0, 0.10, 0.20, 0.30, 1.0]
+DISCOUNT_LABELS = ['No Discount (0%)', 'Low (1-10%)', 'Medium (11-20%)', 'High (21-30%)', 'Very High (>30%)']
+
+# Up to this many bins, counting exceeded edges beats a binary search per value
+LINEAR_SCAN_BINS = 16
+
+
+class Bins:
+    """Right-closed bins over ``edges`` with one label per bin"""
+
+    def __init__(self, edges, labels):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.labels = list(labels)
+        if len(self.labels) != len(self.edges) - 1:
+            raise ValueError(f"{len(self.edges)} edges need {len(self.edges) - 1} labels, got {len(self.labels)}")
+        if np.any(np.diff(self.edges) < 0):
+            raise ValueError("Bin edges must be non-decreasing")
+
+    @classmethod
+    def uniform(cls, low, high, n):
+        """``n`` equal-width bins over [low, high], labelled by their lower edge"""
+        edges = np.linspace(low, high, n + 1)
+        return cls(edges, edges[:-1])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def codes(self, values):
+        """Bin index of each value; len(self) for values in no bin"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(self.labels) <= LINEAR_SCAN_BINS:
+            # Number of upper edges below the value - same as searchsorted(side='left')
+            codes = np.zeros(len(values), dtype=np.int8)
+            above = np.empty(len(values), dtype=bool)
+            for upper in self.edges[1:]:
+                np.greater(values, upper, out=above)
+                codes += above.view(np.int8)
+        else:
+            codes = np.searchsorted(self.edges[1:], values, side='left')
+        codes[(values < self.edges[0]) | np.isnan(values)] = len(self.labels)
+        return codes
+
+    def categorical(self, values, ordered=True):
+        """Values as a Categorical of the bin labels (NaN outside the bins)"""
+        codes = self.codes(values)
+        codes[codes == len(self.labels)] = -1
+        return pd.Categorical.from_codes(codes, categories=self.labels, ordered=ordered)
+
+    def aggregate(self, values, measures=None, counts=None, keep_empty=False):
+        """Per bin: 'count' plus the sum and '<name> mean' of each measure in ``measures``.
+
+        ``counts`` weights each value (e.g. rows that are already grouped by
+        value); means are then sum / weighted count. NaN measure values are
+        skipped, as in pandas. Empty bins are dropped unless ``keep_empty``.
+        """
+        codes = self.codes(values).astype(np.intp, copy=False)  # bincount's index type, converted once
+        n = len(self.labels)
+        weights = None if counts is None else np.asarray(counts, dtype=np.float64)
+        count = np.bincount(codes, weights=weights, minlength=n + 1)[:n]
+        stats = {'count': count if weights is not None else count.astype(np.int64)}
+        for name, measure in (measures or {}).items():
+            measure = np.asarray(measure, dtype=np.float64)
+            missing = np.isnan(measure)
+            if missing.any():
+                valid = ~missing
+                total = np.bincount(codes[valid], weights=measure[valid], minlength=n + 1)[:n]
+                valid_count = np.bincount(codes[valid], weights=None if weights is None else weights[valid],
+                                          minlength=n + 1)[:n]
+            else:
+                total = np.bincount(codes, weights=measure, minlength=n + 1)[:n]
+                valid_count = count
+            stats[name] = total
+            with np.errstate(divide='ignore', invalid='ignore'):
+                stats[f'{name} mean'] = total / valid_count
+        frame = pd.DataFrame(stats, index=pd.Index(self.labels, name='bin'))
+        return frame if keep_empty else frame[frame['count'] > 0]
+
+
+DISCOUNT_BINS = Bins(DISCOUNT_EDGES, DISCOUNT_LABELS)
@@ -0,0 +1,146 @@
+"""
+=================================================================
+SHARED RESULT CACHE FOR DASHBOARD VIEWS
+=================================================================
+Process-wide LRU cache of computed views, keyed by
+(dataset version, normalized filter state, view name). One instance
+is shared by every Streamlit session, so a popular view is computed
+once for all users instead of once per click.
+
+Memory is bounded by an estimate of each result's size; the least
+recently used entries are evicted first. Concurrent requests for the
+same missing key wait for a single computation.
+
+``prefetch`` fills entries on a small background thread pool, e.g.
+the dashboard tabs the user has not opened yet.
+
+With a ``disk`` tier (analytics.diskcache.DiskCache) a miss is looked
+up on disk before it is computed, and computed values are written
+there too, so they outlive the process.
+=================================================================
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_PREFETCH_WORKERS = 2
+
+
+def estimate_size(value):
+    """Approximate in-memory size of a cached result in bytes"""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe, size-bounded LRU cache with hit/miss counters"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES,
+                 prefetch_workers=DEFAULT_PREFETCH_WORKERS, disk=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.prefetch_workers = prefetch_workers
+        self.disk = disk
+        self._executor = None
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            return default
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return value  # Too big to cache at all
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Cached value for ``key``; on a miss run ``compute()`` once, even under concurrency"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another session may have filled it while we waited
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key][0]
+                self.misses += 1
+            try:
+                if self.disk is None:
+                    return self.put(key, compute())
+                return self.put(key, self.disk.get_or_compute(key, compute))
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def prefetch(self, jobs):
+        """Compute missing ``(key, compute)`` pairs in the background; returns their futures.
+
+        Keys already cached or being computed are skipped. Callers may
+        ``cancel()`` the futures once the results are no longer wanted.
+        """
+        with self._lock:
+            pending = [(key, compute) for key, compute in jobs
+                       if key not in self._entries and key not in self._inflight]
+            if pending and self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.prefetch_workers, thread_name_prefix='cache-prefetch'
+                )
+        return [self._executor.submit(self.get_or_compute, key, compute) for key, compute in pending]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,111 @@
+"""
+=================================================================
+CHART-DATA REDUCTION
+=================================================================
+Plotly sends every point of a figure to the browser, so a chart fed
+per-row or per-entity data gets slower to transfer and draw as the
+dataset grows. Every chart view is reduced on the server to at most
+about MAX_POINTS points, whatever the number of rows:
+
+    histograms      binned server-side (analytics.bins), one bar per
+                    bin - see analytics.rfm.days_histogram
+    long series     Largest-Triangle-Three-Buckets (LTTB): one point
+                    per bucket, the one forming the largest triangle
+                    with its neighbours, so peaks and dips survive
+    Pareto curves   the whole customer population, read at evenly
+                    spaced ranks plus the first rank reaching 80%
+
+Reduced frames carry the unreduced length in ``attrs['points']`` so
+the dashboard can say when a chart shows a sample.
+=================================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = 500
+PARETO_THRESHOLD = 80
+TREND_COLUMNS = ['Sales', 'Profit', 'Order ID']
+
+
+def _numbers(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, n=MAX_POINTS):
+    """Positions of the ``n`` points LTTB keeps from the series (x ascending); first and last always kept"""
+    size = len(y)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x, y = _numbers(x), _numbers(y)
+    # Points 1 .. size-2 in n-2 buckets; the last point is the final bucket
+    edges = np.r_[np.linspace(1, size - 1, n - 1).astype(np.int64), size]
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x, edges[:-1]) / counts
+    avg_y = np.add.reduceat(y, edges[:-1]) / counts
+
+    selected = np.empty(n, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the triangle area between the last kept point, each candidate and the next bucket's mean
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(frame, x, columns, n=MAX_POINTS):
+    """At most ``n`` rows of ``frame`` keeping the shape of every series in ``columns`` (LTTB per column).
+
+    ``n=None`` returns the frame as is.
+    """
+    if n is None or len(frame) <= n:
+        return frame
+    per_column = max(n // len(columns), 3)
+    keep = np.unique(np.concatenate([lttb_indices(frame[x].to_numpy(), frame[c].to_numpy(), per_column)
+                                     for c in columns]))
+    reduced = frame.iloc[keep].reset_index(drop=True)
+    reduced.attrs['points'] = len(frame)
+    return reduced
+
+
+def trend_chart(trend, n=MAX_POINTS):
+    """A sales_trend() frame reduced to about ``n`` periods for the trend charts"""
+    return downsample(trend, 'Order Date', TREND_COLUMNS, n)
+
+
+def pareto_ranks(count, n=MAX_POINTS):
+    """Ranks 1, 1 + step, ... and ``count``, with step = ceil(count / n) (1 when ``n`` is None)"""
+    if count == 0:
+        return np.empty(0, dtype=np.int64)
+    step = -(-count // n) if n else 1
+    return np.unique(np.r_[np.arange(1, count + 1, step), count])
+
+
+def pareto_frame(ranks, cumulative_pct, count):
+    """Pareto points from ranks (1 = top customer) and their cumulative revenue %"""
+    frame = pd.DataFrame({
+        'Customers': np.asarray(ranks, dtype=np.int64),
+        'Customers %': np.asarray(ranks, dtype=np.float64) / max(count, 1) * 100,
+        'Revenue %': np.asarray(cumulative_pct, dtype=np.float64),
+    })
+    frame.attrs['points'] = int(count)
+    return frame
+
+
+def pareto_points(values, n=MAX_POINTS):
+    """Cumulative revenue % over every customer, by revenue rank, at about ``n`` sampled ranks (None: all)"""
+    values = np.sort(np.asarray(values, dtype=np.float64))[::-1]
+    total = values.sum()
+    cumulative = np.cumsum(values) / total * 100 if total else np.zeros(len(values))
+    ranks = pareto_ranks(len(values), n)
+    reaching = np.flatnonzero(cumulative >= PARETO_THRESHOLD)
+    if len(reaching):
+        # Where the 80% line is crossed, so the chart shows exactly how many customers it takes
+        ranks = np.union1d(ranks, [reaching[0] + 1])
+    return pareto_frame(ranks, cumulative[ranks - 1], len(values))
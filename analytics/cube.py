@@ -0,0 +1,94 @@
+"""
+=================================================================
+PRE-AGGREGATED SALES CUBE
+=================================================================
+Materialized sums over (order month x Region x Category x Segment x
+customer_type): Sales, Profit, Quantity and the number of order
+lines. A few thousand cells replace the ~10k+ order lines for every
+additive view (totals, revenue by category/region, monthly trend,
+revenue by customer type), so those views cost O(cube) instead of
+O(rows).
+
+The cube can only answer a filter state whose date range covers
+whole months of data; ``SalesCube.slice`` returns None otherwise and
+callers fall back to the filtered order lines. ``rollup`` accepts
+either, so both paths produce identical frames.
+=================================================================
+"""
+
+import pandas as pd
+
+CUBE_DIMENSIONS = ['order_month', 'Region', 'Category', 'Segment', 'customer_type']
+CUBE_MEASURES = ['Sales', 'Profit', 'Quantity']
+LINES = 'lines'
+
+
+def order_month(order_dates):
+    """Monthly period key used as the cube's time dimension"""
+    return order_dates.dt.to_period('M').rename('order_month')
+
+
+def covers_whole_months(min_date, max_date, start, end):
+    """True when [start, end] contains only whole months of the data in [min_date, max_date]"""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    start_ok = start <= min_date or start.day == 1
+    end_ok = end >= max_date or end == end + pd.offsets.MonthEnd(0)
+    return start_ok and end_ok
+
+
+class SalesCube:
+    """Additive measures pre-aggregated over the dashboard's filter dimensions"""
+
+    def __init__(self, df):
+        self.min_date = df['Order Date'].min()
+        self.max_date = df['Order Date'].max()
+        self.cells = (
+            df.groupby([order_month(df['Order Date'])] + CUBE_DIMENSIONS[1:], observed=True)
+            .agg(**{m: (m, 'sum') for m in CUBE_MEASURES}, **{LINES: ('Sales', 'size')})
+            .reset_index()
+        )
+        self.values = {dim: set(self.cells[dim].unique()) for dim in CUBE_DIMENSIONS[1:]}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def covers(self, start, end):
+        """True when [start, end] contains only whole months of data"""
+        return covers_whole_months(self.min_date, self.max_date, start, end)
+
+    def slice(self, start, end, regions=None, categories=None, customer_types=None):
+        """Cube cells matching the filter state, or None if the date range is not month-aligned"""
+        if not self.covers(start, end):
+            return None
+        months = self.cells['order_month']
+        mask = (months >= pd.Period(start, 'M')) & (months <= pd.Period(end, 'M'))
+        for dim, selected in [('Region', regions), ('Category', categories), ('customer_type', customer_types)]:
+            if selected is not None and not self.values[dim] <= set(selected):
+                mask &= self.cells[dim].isin(selected)
+        return self.cells[mask]
+
+
+def is_cube_slice(source):
+    return LINES in source.columns
+
+
+def rollup(source, by=()):
+    """Sales/Profit/Quantity sums and line counts grouped by cube dimensions ``by``.
+
+    ``source`` is either a cube slice or a frame of order lines; ``by`` may
+    name 'order_month', which is derived from 'Order Date' for order lines.
+    With no ``by`` a one-row frame of grand totals is returned.
+    """
+    by = list(by)
+    if is_cube_slice(source):
+        frame, keys = source, by
+        agg = {m: (m, 'sum') for m in CUBE_MEASURES + [LINES]}
+    else:
+        frame = source
+        keys = [order_month(source['Order Date']) if k == 'order_month' else k for k in by]
+        agg = {**{m: (m, 'sum') for m in CUBE_MEASURES}, LINES: ('Sales', 'size')}
+
+    if not keys:
+        return pd.DataFrame({name: [frame[col].sum() if fn == 'sum' else len(frame)]
+                             for name, (col, fn) in agg.items()})
+    return frame.groupby(keys, observed=True).agg(**agg)
@@ -0,0 +1,224 @@
+"""
+=================================================================
+PERSISTENT RESULT CACHE (ON DISK)
+=================================================================
+ResultCache lives inside one server process: a restart or a deploy
+empties it, and the first users afterwards all wait on cold
+aggregations at once (seconds per view on the SQLite backend).
+
+DiskCache is a second tier underneath it, by default in
+data/processed/cache/, holding one result per key, pickled and
+zlib-compressed (HyperLogLog registers and running sums shrink 10-80x):
+
+    cache/
+    ├── 3f/
+    │   └── 3f9a...c2.pkl.z
+    └── a0/ ...
+
+* callers key entries by the dataset's content fingerprint plus the
+  normalized FilterState, so a restart - or a deploy of the same data -
+  finds them again, and new data never reads old results;
+* keys are hashed together with a hash of the analytics package's
+  source, so results computed by other code are never read back;
+* every entry is written to a temporary file and renamed into place:
+  readers in any thread or process see a whole entry or none;
+* the total size is capped (checked on write, so other processes'
+  writes are noticed within RESCAN_WRITES), and the least recently
+  read entries are deleted first (a hit refreshes the file's mtime);
+* an entry that cannot be read is a miss, and is removed.
+
+The cache only ever speeds things up: a read-only or full disk, or an
+unpicklable result, just means the value is not stored.
+=================================================================
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+import zlib
+
+CACHE_DIR = "cache"
+ENTRY_SUFFIX = ".pkl.z"
+# Fastest zlib level: most of the gain at a fraction of the cost
+COMPRESS_LEVEL = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction trims down to this share of the cap, so it does not run on every write
+TRIM_RATIO = 0.8
+# Other processes write too: rescan the directory at least every this many own writes
+RESCAN_WRITES = 16
+# Temporary files older than this were left by a crashed writer
+STALE_TMP_SECONDS = 3600
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def code_version(package_dir=PACKAGE_DIR):
+    """SHA-1 of the package's .py sources: part of every key, so a deploy of new code starts afresh"""
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith('.py'):
+            digest.update(name.encode('utf-8'))
+            with open(os.path.join(package_dir, name), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Size-capped directory of compressed, pickled results, shared by threads and processes"""
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES, version=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.version = version if version is not None else code_version()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._bytes = None  # Estimate of the bytes on disk; None until the first scan
+        self._unscanned = 0  # Own writes since that scan
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        """Entry file of ``key`` (any value with a stable repr, e.g. tuples of str and FilterState)"""
+        digest = hashlib.sha1(repr((self.version, key)).encode('utf-8')).hexdigest()
+        return os.path.join(self.root, digest[:2], digest + ENTRY_SUFFIX)
+
+    def get(self, key, default=None):
+        path = self.path(key)
+        found = False
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.loads(zlib.decompress(f.read()))
+            found = True
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # Written by an incompatible library version or damaged on disk
+            self._remove(path)
+        if found:
+            try:
+                os.utime(path)  # Most recently used
+            except OSError:
+                pass
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return value if found else default
+
+    def put(self, key, value):
+        """Store ``value`` (returned unchanged) unless it cannot be pickled or written"""
+        try:
+            data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), COMPRESS_LEVEL)
+        except Exception:
+            return value
+        if len(data) > self.max_bytes * TRIM_RATIO:
+            return value
+        path = self.path(key)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            return value
+        with self._lock:
+            self.writes += 1
+            self._unscanned += 1
+            if self._bytes is not None:
+                self._bytes += len(data)
+            full = self._bytes is None or self._bytes > self.max_bytes or self._unscanned >= RESCAN_WRITES
+        if full:
+            self.trim()
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Stored value for ``key``; on a miss run ``compute()`` and store it"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute())
+        return value
+
+    def entries(self):
+        """(path, bytes, mtime) of every entry, least recently used first"""
+        found = []
+        stale = time.time() - STALE_TMP_SECONDS
+        try:
+            buckets = [e.path for e in os.scandir(self.root) if e.is_dir()]
+        except FileNotFoundError:
+            return found
+        for bucket in buckets:
+            try:
+                files = list(os.scandir(bucket))
+            except FileNotFoundError:
+                continue
+            for entry in files:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    found.append((entry.path, stat.st_size, stat.st_mtime))
+                elif stat.st_mtime < stale:
+                    self._remove(entry.path)
+        return sorted(found, key=lambda e: e[2])
+
+    def trim(self):
+        """Delete least recently used entries until the cache is back under its cap"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * TRIM_RATIO
+            for path, size, _ in entries:
+                if total <= target:
+                    break
+                # Another process may have removed it, or (Windows) still have it open
+                if self._remove(path):
+                    total -= size
+                    with self._lock:
+                        self.evictions += 1
+        with self._lock:
+            self._bytes = total
+            self._unscanned = 0
+        return total
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            self._remove(path)
+        with self._lock:
+            self._bytes = 0
+
+    def stats(self):
+        if self._bytes is None:
+            total = sum(size for _, size, _ in self.entries())
+            with self._lock:
+                self._bytes = total if self._bytes is None else self._bytes
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+def default_cache(processed_dir, max_bytes=DEFAULT_MAX_BYTES):
+    """The DiskCache the dashboard, the service and ``--prewarm`` share: <processed_dir>/cache/"""
+    return DiskCache(os.path.join(processed_dir, CACHE_DIR), max_bytes)
@@ -0,0 +1,163 @@
+"""
+=================================================================
+CHUNKED CSV / PARQUET EXPORT
+=================================================================
+"The rows behind this chart" - the filtered order lines or any view's
+table - written as CSV or Parquet, CHUNK_ROWS rows at a time:
+
+    frame_chunks(df)            a frame as row slices (views, no copy)
+    SQLBackend.iter_rows(state) filtered rows fetched from SQLite in
+                                batches
+    encode_chunks(chunks, fmt)  bytes, produced chunk by chunk
+
+Only one chunk of rows and its encoding are in memory at a time, so
+exporting 10M rows costs the same memory as exporting 100k. The
+encoded stream can go straight to an HTTP response
+(analytics.service /export/...) or to a temporary file (the
+dashboard's download button, which runs the export off the script
+thread).
+
+Only the service streams end to end: Streamlit reads a download
+button's file into one ``bytes`` object before serving it, so the
+dashboard offers the button up to INLINE_MAX_ROWS order lines and
+points larger exports to the service.
+
+Parquet needs pyarrow, which stays optional: PARQUET_AVAILABLE tells
+callers whether to offer it. Each chunk becomes one row group.
+=================================================================
+"""
+
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+CHUNK_ROWS = 100_000
+# Largest row export the dashboard's download button builds (Streamlit holds it in memory)
+INLINE_MAX_ROWS = 500_000
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+# Views whose result is a dict: the entry holding their table (the rest are summary numbers)
+VIEW_TABLES = {'churn': 'activity'}
+
+
+def frame_chunks(df, chunk_rows=CHUNK_ROWS):
+    """``df`` in slices of at most ``chunk_rows`` rows"""
+    if len(df) == 0:
+        yield df
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def view_table(name, result):
+    """A view result (frame, series, dict of numbers or of tables) as one flat DataFrame"""
+    if isinstance(result, dict):
+        table = VIEW_TABLES.get(name)
+        if table is not None and table in result:
+            return view_table(name, result[table])
+        return pd.DataFrame([{k: v for k, v in result.items() if pd.api.types.is_scalar(v)}])
+    if isinstance(result, pd.Series):
+        result = result.to_frame()
+    if not isinstance(result.index, pd.RangeIndex):
+        result = result.reset_index()
+    return result
+
+
+def _csv_chunks(chunks):
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header).encode('utf-8')
+        header = False
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink handing out what was written since the last ``take()``.
+
+    ``tell()`` keeps counting across takes: the Parquet footer records offsets from it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._pieces = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._pieces.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = b''.join(self._pieces)
+        self._pieces.clear()
+        return data
+
+
+def _parquet_chunks(chunks):
+    if not PARQUET_AVAILABLE:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+    sink = _Drain()
+    writer = None
+    for chunk in chunks:
+        if writer is None:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            writer = pq.ParquetWriter(sink, table.schema)
+        else:
+            # Later chunks follow the first one's schema (SQL batches infer their own types)
+            table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+        writer.write_table(table)
+        yield sink.take()
+    if writer is not None:
+        writer.close()
+        yield sink.take()
+
+
+def encode_chunks(chunks, fmt='csv'):
+    """Encoded bytes of an iterable of DataFrames with the same columns, one piece per chunk"""
+    if fmt == 'csv':
+        return _csv_chunks(chunks)
+    if fmt == 'parquet':
+        return _parquet_chunks(chunks)
+    raise ValueError(f"Unknown export format: {fmt!r} (expected one of {', '.join(EXPORT_FORMATS)})")
+
+
+def export_file(chunks, fmt='csv'):
+    """The encoded export as a file opened for reading (``io.BufferedReader``, a type Streamlit accepts).
+
+    The pieces are written to a temporary file as they are encoded; on POSIX
+    the file is unlinked right away and disappears when the reader is closed.
+    """
+    with tempfile.NamedTemporaryFile(prefix='export-', suffix=f'.{fmt}', delete=False) as out:
+        try:
+            for piece in encode_chunks(chunks, fmt):
+                out.write(piece)
+        except BaseException:
+            out.close()
+            os.remove(out.name)
+            raise
+    reader = open(out.name, 'rb')
+    try:
+        os.remove(out.name)
+    except OSError:
+        pass  # Windows cannot remove an open file: it stays in the temp directory
+    return reader
+
+
+def deferred_export(chunks, fmt='csv'):
+    """Callable for ``st.download_button(data=...)``: encodes ``chunks()`` only when the button is clicked"""
+    return lambda: export_file(chunks(), fmt)
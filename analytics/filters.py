@@ -0,0 +1,139 @@
+"""
+=================================================================
+INDEXED FILTER ENGINE FOR THE DASHBOARD SIDEBAR
+=================================================================
+Built once per dataset load:
+
+* rows are kept sorted by 'Order Date', so a date range becomes a
+  contiguous slice found with two binary searches;
+* every Region / Category / customer_type value gets a precomputed
+  boolean bitmap over the rows.
+
+A filter state is then answered by OR-ing the selected values'
+bitmaps inside the date slice and AND-ing the dimensions together.
+No intermediate DataFrames are built - the result is a single row
+selection (a plain slice when only the date filter is active).
+
+``FilterState`` is the normalized, hashable form of the sidebar
+selection used as a cache key.
+=================================================================
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+FILTER_DIMENSIONS = ['Region', 'Category', 'customer_type']
+
+
+class FilterState(NamedTuple):
+    """Normalized sidebar selection: ISO dates plus sorted value tuples (None = every value)"""
+    start: str
+    end: str
+    regions: Optional[Tuple[str, ...]] = None
+    categories: Optional[Tuple[str, ...]] = None
+    customer_types: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def normalize(cls, engine, start, end, regions=None, categories=None, customer_types=None):
+        """Canonical form, so equivalent selections share one cache key.
+
+        ``engine`` is anything with ``min_date``, ``max_date`` and ``values(dim)``
+        (a FilterEngine or analytics.sqlbackend.SQLBackend).
+        """
+        start = max(pd.Timestamp(start).normalize(), engine.min_date.normalize())
+        end = min(pd.Timestamp(end).normalize(), engine.max_date.normalize())
+
+        def values(dim, selected):
+            if selected is None or engine.values(dim) <= set(selected):
+                return None
+            return tuple(sorted(str(v) for v in selected))
+
+        return cls(
+            start.date().isoformat(),
+            end.date().isoformat(),
+            values('Region', regions),
+            values('Category', categories),
+            values('customer_type', customer_types),
+        )
+
+
+class FilterEngine:
+    """Date-sorted rows plus per-value bitmaps for the sidebar dimensions"""
+
+    def __init__(self, df, dimensions=FILTER_DIMENSIONS):
+        if not df['Order Date'].is_monotonic_increasing:
+            df = df.iloc[np.argsort(df['Order Date'].to_numpy(), kind='stable')]
+        self.df = df.reset_index(drop=True)
+        self.dates = self.df['Order Date'].to_numpy(dtype='datetime64[ns]')
+        self.min_date = self.df['Order Date'].min()
+        self.max_date = self.df['Order Date'].max()
+
+        self.bitmaps = {}
+        for dim in dimensions:
+            if dim not in self.df.columns:
+                continue
+            codes, values = pd.factorize(self.df[dim], sort=True)
+            self.bitmaps[dim] = {value: codes == i for i, value in enumerate(values)}
+
+    def __len__(self):
+        return len(self.df)
+
+    def values(self, dim):
+        """Every value of ``dim`` in the loaded rows"""
+        return set(self.bitmaps.get(dim, {}))
+
+    def date_slice(self, start, end):
+        """Rows with start <= Order Date <= end (both inclusive days)"""
+        lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).normalize()), side='left')
+        end_exclusive = pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+        hi = np.searchsorted(self.dates, np.datetime64(end_exclusive), side='left')
+        return slice(int(lo), int(hi))
+
+    def options(self, dim, rows, mask=None):
+        """Values of ``dim`` present in ``rows`` (optionally restricted by ``mask``), sorted"""
+        present = []
+        for value, bitmap in self.bitmaps.get(dim, {}).items():
+            hits = bitmap[rows]
+            if (hits & mask).any() if mask is not None else hits.any():
+                present.append(value)
+        return present
+
+    def mask(self, dim, selected, rows):
+        """Bitmap of rows matching ``selected`` values of ``dim`` - None when every value is selected"""
+        bitmaps = self.bitmaps.get(dim)
+        if bitmaps is None or selected is None or set(bitmaps) <= set(selected):
+            return None
+        result = np.zeros(rows.stop - rows.start, dtype=bool)
+        for value in selected:
+            if value in bitmaps:
+                result |= bitmaps[value][rows]
+        return result
+
+    @staticmethod
+    def combine(*masks):
+        """AND together the non-None masks (None means 'no restriction')"""
+        active = [m for m in masks if m is not None]
+        if not active:
+            return None
+        result = active[0].copy()
+        for m in active[1:]:
+            result &= m
+        return result
+
+    def select(self, rows, mask=None):
+        """The filtered frame: a slice when ``mask`` is None, one positional take otherwise"""
+        if mask is None:
+            return self.df.iloc[rows]
+        return self.df.take(rows.start + np.flatnonzero(mask))
+
+    def filter(self, start, end, regions=None, categories=None, customer_types=None):
+        """One-shot filter for non-UI callers"""
+        rows = self.date_slice(start, end)
+        mask = self.combine(
+            self.mask('Region', regions, rows),
+            self.mask('Category', categories, rows),
+            self.mask('customer_type', customer_types, rows),
+        )
+        return self.select(rows, mask)
@@ -0,0 +1,220 @@
+"""
+=================================================================
+INCREMENTAL INGEST OF NEW ORDER BATCHES
+=================================================================
+Adds a new raw order batch to the processed dataset without
+re-running the full pipeline. The work is proportional to the batch
+(plus loading the persisted customer-state table), never to the
+number of historical order lines:
+
+1. The batch is cleaned and de-duplicated against the row hashes of
+   everything ingested so far (binary search on memory-mapped
+   segments).
+2. The persisted customer-state table, value counters (Discount,
+   delivery_days) and Sales quantile sketch are updated.
+3. Each dataset-wide statistic (medians, revenue_segment cut points)
+   is either REFRESHED from the updated aggregates or CARRIED
+   FORWARD, and that decision is logged per batch.
+4. The processed rows are appended to superstore_cleaned.csv and as a
+   new part of the columnar bundle.
+
+Historical rows are never rewritten, so their customer-level columns
+(order_frequency, total_customer_sales, ...) and median-based flags
+reflect the state at the time they were ingested. The customer-state
+table in data/processed/pipeline_state/customers is authoritative.
+
+Usage:
+    python -m analytics.pipeline                      # full run, creates the state
+    python -m analytics.incremental new_orders.csv    # then, per batch
+    python -m analytics.incremental new_orders.csv --refresh all
+=================================================================
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analytics.pipeline import (
+    PROCESSED_DIR, STATE_DIR, PipelineState,
+    add_dataset_features, add_row_features, clean_chunk, prewarm_cache,
+)
+from analytics.storage import CLEANED_CSV, COLUMNAR_DIR, append_columnar, has_columnar
+
+INGEST_LOG = "ingest_log.jsonl"
+REFRESH_MODES = ('auto', 'all', 'none')
+DEFAULT_TOLERANCE = 0.05
+
+# Columns of historical rows that go stale as new batches arrive
+CUSTOMER_LEVEL_COLUMNS = [
+    'First Order Date', 'customer_first_order', 'order_frequency',
+    'total_customer_sales', 'avg_order_value', 'total_customer_profit',
+]
+
+
+@dataclass
+class IngestResult:
+    batch: str = ''
+    rows_read: int = 0
+    rows_appended: int = 0
+    duplicates: int = 0
+    new_customers: int = 0
+    returning_customers: int = 0
+    first_order_moved: int = 0
+    statistics: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+
+
+def _relative_drift(previous, candidate):
+    """Largest relative change between two statistics (scalars or interior cut points)"""
+    previous = np.atleast_1d(np.asarray(previous, dtype='float64'))
+    candidate = np.atleast_1d(np.asarray(candidate, dtype='float64'))
+    if len(previous) > 2:
+        previous, candidate = previous[1:-1], candidate[1:-1]
+    scale = np.maximum(np.abs(previous), 1e-9)
+    return float(np.max(np.abs(candidate - previous) / scale))
+
+
+def choose_statistics(previous, candidate, refresh='auto', tolerance=DEFAULT_TOLERANCE):
+    """Decide per statistic whether to refresh it or carry the previous value forward.
+
+    refresh='auto' refreshes only statistics that drifted by more than
+    ``tolerance`` (relative); 'all' always refreshes; 'none' never does.
+    Carried-forward revenue cut points still get their outer edges widened
+    so new Sales values outside the old range land in Low/High.
+    Returns (values to use, log records).
+    """
+    if refresh not in REFRESH_MODES:
+        raise ValueError(f"refresh must be one of {REFRESH_MODES}, got {refresh!r}")
+
+    used, records = {}, []
+    for name, new_value in candidate.items():
+        old_value = previous.get(name)
+        drift = None if old_value is None else _relative_drift(old_value, new_value)
+        if old_value is None or refresh == 'all' or (refresh == 'auto' and drift > tolerance):
+            action, value = 'refreshed', new_value
+        else:
+            action, value = 'carried_forward', old_value
+            if name == 'revenue_cut_points':
+                value = [min(old_value[0], new_value[0])] + list(old_value[1:-1]) + [max(old_value[-1], new_value[-1])]
+        used[name] = value
+        records.append({'name': name, 'previous': old_value, 'candidate': new_value,
+                        'used': value, 'drift': drift, 'action': action})
+    return used, records
+
+
+def ingest_batch(batch_path, out_dir=PROCESSED_DIR, state_dir=STATE_DIR,
+                 refresh='auto', tolerance=DEFAULT_TOLERANCE):
+    """Clean, feature-engineer and append one raw batch; update and persist the pipeline state"""
+    if not os.path.isfile(os.path.join(state_dir, "statistics.json")):
+        raise FileNotFoundError(
+            f"No pipeline state in {state_dir} - run 'python -m analytics.pipeline' once first"
+        )
+    state = PipelineState.load(state_dir)
+    result = IngestResult(batch=batch_path)
+
+    raw = pd.read_csv(batch_path, encoding='latin-1')
+    batch, counts = clean_chunk(raw, state.dedup)
+    batch = add_row_features(batch)
+    result.rows_read = counts['rows_in']
+    result.duplicates = counts.get('duplicates', 0)
+
+    # Customer state before/after, for the touched customers only
+    touched = pd.Index(batch['Customer ID'].unique())
+    before = state.customers.table.reindex(touched)
+    state.update(batch)
+    after = state.customers.table.reindex(touched)
+    known = before['order_frequency'].notna()
+    result.new_customers = int((~known).sum())
+    result.returning_customers = int(known.sum())
+    result.first_order_moved = int((known & (after['First Order Date'] < before['First Order Date'])).sum())
+
+    used, result.statistics = choose_statistics(
+        state.statistics, state.candidate_statistics(), refresh, tolerance
+    )
+    batch = add_dataset_features(
+        batch, state.customers,
+        used['discount_median'], used['delivery_median'], used['revenue_cut_points'],
+    )
+
+    # ---------- Append outputs (new rows only) ----------
+    csv_path = os.path.join(out_dir, CLEANED_CSV)
+    header = list(pd.read_csv(csv_path, encoding='latin-1', nrows=0).columns)
+    if header != list(batch.columns):
+        raise ValueError(f"Batch columns do not match {csv_path}; run the full pipeline instead")
+    batch.to_csv(csv_path, mode='a', header=False, index=False)
+    result.outputs.append(csv_path)
+
+    columnar_path = os.path.join(out_dir, COLUMNAR_DIR)
+    if has_columnar(columnar_path):
+        result.outputs.append(append_columnar(batch, columnar_path))
+    result.rows_appended = len(batch)
+
+    state.statistics = used
+    state.save(state_dir)
+    _log_ingest(state_dir, result)
+    return result
+
+
+def _log_ingest(state_dir, result):
+    entry = {
+        'ingested_at': datetime.now().isoformat(timespec='seconds'),
+        'batch': result.batch,
+        'rows_read': result.rows_read,
+        'rows_appended': result.rows_appended,
+        'duplicates': result.duplicates,
+        'new_customers': result.new_customers,
+        'returning_customers': result.returning_customers,
+        'first_order_moved': result.first_order_moved,
+        'statistics': result.statistics,
+        'stale_history_columns': CUSTOMER_LEVEL_COLUMNS,
+    }
+    with open(os.path.join(state_dir, INGEST_LOG), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+# ======================== CLI ========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append a new raw order batch to the processed dataset")
+    parser.add_argument('batch', help="raw CSV with the same columns as data/raw/superstore.csv")
+    parser.add_argument('--out-dir', default=PROCESSED_DIR, help="processed data directory (default: data/processed)")
+    parser.add_argument('--state-dir', default=STATE_DIR, help="pipeline state (default: data/processed/pipeline_state)")
+    parser.add_argument('--refresh', choices=REFRESH_MODES, default='auto',
+                        help="refresh dataset-wide statistics: auto (on drift), all, none")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="relative drift that triggers a refresh in auto mode (default: 0.05)")
+    parser.add_argument('--prewarm', action='store_true',
+                        help="then store the unfiltered dashboard's views in <out-dir>/cache for the next start")
+    args = parser.parse_args(argv)
+
+    result = ingest_batch(args.batch, args.out_dir, args.state_dir, args.refresh, args.tolerance)
+
+    print("=" * 80)
+    print("INCREMENTAL INGEST")
+    print("=" * 80)
+    print(f"\n📥 Batch: {result.batch}")
+    print(f"📊 Rows read: {result.rows_read:,}  |  Appended: {result.rows_appended:,}  |  "
+          f"Duplicates skipped: {result.duplicates:,}")
+    print(f"👥 New customers: {result.new_customers:,}  |  Returning: {result.returning_customers:,}")
+    if result.first_order_moved:
+        print(f"⚠️ {result.first_order_moved} customers got an earlier first order - "
+              "their historical customer_type labels are now stale")
+    print("\n📏 Dataset-wide statistics:")
+    for record in result.statistics:
+        icon = "🔄" if record['action'] == 'refreshed' else "➡️"
+        print(f"  {icon} {record['name']:<20} {record['action']:<16} used={record['used']}")
+    print()
+    for path in result.outputs:
+        print(f"✅ Updated: {os.path.relpath(path)}")
+    if args.prewarm:
+        prewarm_cache(args.out_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
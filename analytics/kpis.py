@@ -0,0 +1,157 @@
+"""
+=================================================================
+KPI ENGINE
+=================================================================
+The 11 headline KPIs as typed numbers, computed in one fused pass:
+each needed column is turned into a NumPy array once and every sum,
+count and distinct count is taken from those arrays (distinct counts
+via bincount over category codes - no per-KPI groupby or nunique).
+
+Formatting happens only at display time (``format_kpi``), so
+kpis.csv holds plain numbers that notebooks and the dashboard can
+reuse. Shared by notebook 02 and the dashboard's Overview tab.
+
+Definitions:
+* Total Orders         - distinct Order IDs (not order lines)
+* Average Order Value  - revenue per order line, as the dashboard shows it
+* Profit Per Order     - profit per distinct order
+* Repeat Customer Rate - customers with at least one 'Returning' line
+                         (an order after their first order date) as a
+                         share of unique customers; never above 100%
+=================================================================
+"""
+
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+# key -> (label in kpis.csv, unit)
+KPI_DEFINITIONS = {
+    'total_revenue': ('Total Revenue', 'currency'),
+    'total_profit': ('Total Profit', 'currency'),
+    'profit_margin': ('Profit Margin (%)', 'percent'),
+    'average_order_value': ('Average Order Value', 'currency'),
+    'total_orders': ('Total Orders', 'count'),
+    'unique_customers': ('Unique Customers', 'count'),
+    'revenue_per_customer': ('Revenue Per Customer', 'currency'),
+    'repeat_customer_rate': ('Repeat Customer Rate (%)', 'percent'),
+    'profit_per_order': ('Profit Per Order', 'currency'),
+    'discount_penetration': ('Discount Penetration (%)', 'percent'),
+    'average_delivery_days': ('Average Delivery Days', 'days'),
+}
+KPI_COLUMNS = ['Order ID', 'Customer ID', 'Sales', 'Profit', 'Discount', 'customer_type', 'delivery_days']
+
+
+@dataclass
+class KPIs:
+    total_revenue: float
+    total_profit: float
+    profit_margin: float
+    average_order_value: float
+    total_orders: int
+    unique_customers: int
+    revenue_per_customer: float
+    repeat_customer_rate: float
+    profit_per_order: float
+    discount_penetration: float
+    average_delivery_days: float
+    order_lines: int = 0
+    returning_customers: int = 0
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _codes(values):
+    """Integer codes and the number of distinct values (categoricals reuse their codes)"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), len(values.cat.categories)
+    codes, uniques = pd.factorize(values)
+    return codes, len(uniques)
+
+
+def _distinct(codes, size, where=None):
+    if where is not None:
+        codes = codes[where]
+    codes = codes[codes >= 0]  # -1 = missing
+    return int(np.count_nonzero(np.bincount(codes, minlength=size))) if len(codes) else 0
+
+
+def _ratio(numerator, denominator, scale=1.0):
+    return numerator / denominator * scale if denominator else 0.0
+
+
+def kpis_from_totals(revenue, profit, lines, orders, customers, returning,
+                     discounted_lines=0, average_delivery_days=0.0):
+    """KPIs from already-aggregated totals and distinct counts (exact or estimated)"""
+    return KPIs(
+        total_revenue=revenue,
+        total_profit=profit,
+        profit_margin=_ratio(profit, revenue, 100),
+        average_order_value=_ratio(revenue, lines),
+        total_orders=orders,
+        unique_customers=customers,
+        revenue_per_customer=_ratio(revenue, customers),
+        # Estimated counts can put the subset a hair above the whole
+        repeat_customer_rate=min(_ratio(returning, customers, 100), 100.0),
+        profit_per_order=_ratio(profit, orders),
+        discount_penetration=_ratio(discounted_lines, lines, 100),
+        average_delivery_days=average_delivery_days,
+        order_lines=lines,
+        returning_customers=returning,
+    )
+
+
+def compute_kpis(df):
+    """All KPIs of ``df`` (order lines) in one pass over the needed columns"""
+    lines = len(df)
+    sales = df['Sales'].to_numpy(dtype=np.float64)
+    profit = df['Profit'].to_numpy(dtype=np.float64)
+    revenue = float(sales.sum())
+    total_profit = float(profit.sum())
+
+    order_codes, n_orders = _codes(df['Order ID'])
+    customer_codes, n_customers = _codes(df['Customer ID'])
+    orders = _distinct(order_codes, n_orders)
+    customers = _distinct(customer_codes, n_customers)
+
+    if 'customer_type' in df.columns:
+        returning_rows = (df['customer_type'] == 'Returning').to_numpy()
+        returning = _distinct(customer_codes, n_customers, returning_rows)
+    else:
+        returning = 0
+    discounted = int(np.count_nonzero(df['Discount'].to_numpy() > 0)) if 'Discount' in df.columns else 0
+    delivery = (float(np.nanmean(df['delivery_days'].to_numpy(dtype=np.float64)))
+                if 'delivery_days' in df.columns and lines else 0.0)
+
+    return kpis_from_totals(revenue, total_profit, lines, orders, customers, returning, discounted, delivery)
+
+
+# ======================== DISPLAY ========================
+def format_kpi(value, unit):
+    if unit == 'currency':
+        return f"${value:,.2f}"
+    if unit == 'percent':
+        return f"{value:.2f}%"
+    if unit == 'count':
+        return f"{int(value):,}"
+    if unit == 'days':
+        return f"{value:.1f} days"
+    return str(value)
+
+
+def kpi_table(kpis):
+    """KPI, Value (numeric), Unit - the layout of data/processed/kpis.csv"""
+    values = kpis.to_dict()
+    return pd.DataFrame(
+        [(label, values[key], unit) for key, (label, unit) in KPI_DEFINITIONS.items()],
+        columns=['KPI', 'Value', 'Unit'],
+    )
+
+
+def read_kpis(path):
+    """kpis.csv back as {label: number} - also from the older layout of display strings ("$1,234.50")"""
+    table = pd.read_csv(path, dtype={'Value': str})
+    values = table['Value'].str.replace(r'[$,%]|days', '', regex=True).str.strip()
+    return dict(zip(table['KPI'], pd.to_numeric(values)))
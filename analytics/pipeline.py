@@ -0,0 +1,648 @@
+"""
+=================================================================
+PHASE 2 & 3 PIPELINE: CHUNKED CLEANING & FEATURE ENGINEERING
+=================================================================
+Importable, out-of-core version of notebook 01. The raw CSV is
+streamed in fixed-size chunks, so peak memory depends on the chunk
+size and the number of customers, not on the number of order lines.
+
+Pass 1 - clean each chunk, derive the row-local features, fold the
+         chunk into the per-customer aggregates (one grouped pass)
+         and the dataset-wide statistics (medians, Sales quantiles),
+         then spill the cleaned chunk to a temp directory.
+Pass 2 - re-read the spilled chunks, attach the customer aggregates
+         with a single join, apply the median / quantile based
+         features and append to the CSV and columnar outputs.
+
+Usage:
+    python -m analytics.pipeline
+    python -m analytics.pipeline --raw data/raw/superstore.csv --chunksize 200000
+=================================================================
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from analytics.bins import Bins
+from analytics.storage import (
+    CLEANED_CSV, COLUMNAR_DIR, PARTITION_COLUMNS, ColumnarWriter, read_columnar, write_columnar,
+)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_CSV = os.path.join(PROJECT_ROOT, "data", "raw", "superstore.csv")
+PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
+STATE_DIR = os.path.join(PROCESSED_DIR, "pipeline_state")
+
+DEFAULT_CHUNKSIZE = 100_000
+# Row hashes (8 bytes each) held in memory before a full run spills them as a sorted segment
+RUN_HASHES = 1_000_000
+# A saved segment smaller than this absorbs the next save's hashes instead of a new file being
+# added, so daily batches grow one segment up to this size and the count stays ~hashes / MERGE_HASHES
+MERGE_HASHES = RUN_HASHES
+# Values that grow with the number of order lines, not customers or products: their category
+# list is built by the columnar writer as rows arrive instead of being collected up front
+ROW_LEVEL_COLUMNS = ['Order ID']
+DATE_FORMAT = '%m/%d/%Y'
+REVENUE_SEGMENTS = ['Low', 'Medium', 'High']
+CUSTOMER_TYPES = ['New', 'Returning']
+
+# Output column order of superstore_cleaned.csv after the raw columns
+FEATURE_COLUMNS = [
+    'order_year', 'order_month', 'order_quarter', 'order_day_of_week', 'order_week_of_year',
+    'profit_margin', 'has_discount', 'high_discount',
+    'First Order Date', 'customer_type',
+    'order_frequency', 'total_customer_sales', 'avg_order_value', 'total_customer_profit',
+    'customer_first_order',
+    'delivery_days', 'delivery_delay_flag', 'revenue_segment',
+]
+
+
+# ======================== STREAMING STATISTICS ========================
+class ValueCounter:
+    """Exact value -> count table for low-cardinality columns (Discount, Quantity, delivery_days)"""
+
+    def __init__(self, counts=None):
+        self.counts = counts if counts is not None else pd.Series(dtype='int64')
+
+    def update(self, values):
+        vc = pd.Series(values).value_counts()
+        self.counts = self.counts.add(vc, fill_value=0).astype('int64')
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def quantile(self, q):
+        """Same result as ``Series.quantile(q)`` (linear interpolation) on the full column"""
+        if self.total == 0:
+            return np.nan
+        counts = self.counts.sort_index()
+        cum = counts.to_numpy().cumsum()
+        h = (self.total - 1) * q
+        lo, hi = int(np.floor(h)), int(np.ceil(h))
+        values = counts.index.to_numpy(dtype='float64')
+        v_lo = values[np.searchsorted(cum, lo, side='right')]
+        v_hi = values[np.searchsorted(cum, hi, side='right')]
+        return v_lo + (v_hi - v_lo) * (h - lo)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def count_outside(self, low, high):
+        """Number of values strictly below ``low`` or strictly above ``high``"""
+        index = self.counts.index.to_numpy(dtype='float64')
+        return int(self.counts[(index < low) | (index > high)].sum())
+
+    def to_dict(self):
+        return {'values': [float(v) for v in self.counts.index], 'counts': [int(c) for c in self.counts]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(pd.Series(data['counts'], index=data['values'], dtype='int64'))
+
+
+class QuantileSketch:
+    """Quantiles of a continuous column (Sales) in bounded memory.
+
+    Values are kept exactly until ``exact_limit`` of them have been seen,
+    which reproduces ``pd.qcut`` cut points on datasets of the current size.
+    Past that the buffer collapses into a fixed log-spaced histogram whose
+    relative error is about ``(hi / lo) ** (1 / bins) - 1`` (~0.17%).
+    """
+
+    def __init__(self, exact_limit=2_000_000, bins=16_384, lo=1e-3, hi=1e9):
+        self.exact_limit = exact_limit
+        self.bins, self.lo, self.hi = bins, lo, hi
+        self.edges = np.geomspace(lo, hi, bins + 1)
+        self.values = []
+        self.n_values = 0
+        self.hist = None
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        if self.hist is None:
+            self.values.append(values)
+            self.n_values += len(values)
+            if self.n_values > self.exact_limit:
+                self.hist = np.zeros(len(self.edges) + 1, dtype='int64')
+                for buffered in self.values:
+                    self._add_to_hist(buffered)
+                self.values = []
+        else:
+            self._add_to_hist(values)
+
+    def _add_to_hist(self, values):
+        self.hist += np.bincount(np.searchsorted(self.edges, values), minlength=len(self.hist))
+
+    @property
+    def is_exact(self):
+        return self.hist is None
+
+    def quantiles(self, qs):
+        qs = np.asarray(qs, dtype='float64')
+        if self.is_exact:
+            if not self.values:
+                return np.full(len(qs), np.nan)
+            return np.quantile(np.concatenate(self.values), qs)
+
+        cum = self.hist.cumsum()
+        targets = qs * (cum[-1] - 1)
+        result = np.empty(len(qs))
+        for i, t in enumerate(targets):
+            b = int(np.searchsorted(cum, t, side='right'))
+            lo = self.edges[b - 1] if b > 0 else self.min
+            hi = self.edges[b] if b < len(self.edges) else self.max
+            before = cum[b - 1] if b > 0 else 0
+            frac = (t - before) / max(self.hist[b], 1)
+            result[i] = lo + (hi - lo) * frac
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+    def save(self, directory, name):
+        meta = {'exact_limit': self.exact_limit, 'bins': self.bins, 'lo': self.lo, 'hi': self.hi,
+                'min': float(self.min), 'max': float(self.max), 'n_values': self.n_values,
+                'exact': self.is_exact}
+        data = np.concatenate(self.values) if self.is_exact and self.values else self.hist
+        np.save(os.path.join(directory, f"{name}.npy"), data if data is not None else np.empty(0))
+        with open(os.path.join(directory, f"{name}.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory, name):
+        with open(os.path.join(directory, f"{name}.json"), encoding='utf-8') as f:
+            meta = json.load(f)
+        sketch = cls(meta['exact_limit'], meta['bins'], meta['lo'], meta['hi'])
+        sketch.min, sketch.max, sketch.n_values = meta['min'], meta['max'], meta['n_values']
+        data = np.load(os.path.join(directory, f"{name}.npy"))
+        if meta['exact']:
+            sketch.values = [data] if len(data) else []
+        else:
+            sketch.hist = data
+        return sketch
+
+
+class CustomerAggregator:
+    """Per-customer line count, sales, profit and first order date, folded chunk by chunk"""
+
+    COLUMNS = ['order_frequency', 'total_customer_sales', 'total_customer_profit', 'First Order Date']
+
+    def __init__(self, table=None):
+        self.table = table if table is not None else pd.DataFrame(columns=self.COLUMNS)
+
+    def update(self, chunk):
+        partial = chunk.groupby('Customer ID', sort=False).agg(
+            order_frequency=('Order ID', 'count'),
+            total_customer_sales=('Sales', 'sum'),
+            total_customer_profit=('Profit', 'sum'),
+            **{'First Order Date': ('Order Date', 'min')},
+        )
+        if self.table.empty:
+            self.table = partial
+            return
+        self.table = pd.concat([self.table, partial]).groupby(level=0, sort=False).agg({
+            'order_frequency': 'sum',
+            'total_customer_sales': 'sum',
+            'total_customer_profit': 'sum',
+            'First Order Date': 'min',
+        })
+
+    def features(self, customer_ids):
+        """Customer-level columns aligned to ``customer_ids`` (a single indexed join)"""
+        stats = self.table.reindex(customer_ids)
+        return pd.DataFrame({
+            'First Order Date': stats['First Order Date'].to_numpy(),
+            'order_frequency': stats['order_frequency'].to_numpy(),
+            'total_customer_sales': stats['total_customer_sales'].to_numpy(),
+            'avg_order_value': (stats['total_customer_sales'] / stats['order_frequency']).to_numpy(),
+            'total_customer_profit': stats['total_customer_profit'].to_numpy(),
+        })
+
+    def save(self, path):
+        write_columnar(self.table.rename_axis('Customer ID').reset_index(), path)
+
+    @classmethod
+    def load(cls, path):
+        table = read_columnar(path).set_index('Customer ID')
+        table.index = table.index.astype(str)
+        return cls(table)
+
+
+class DuplicateFilter:
+    """Drops rows already seen, using one 8-byte hash per kept row.
+
+    Hashes from earlier runs live in sorted, memory-mapped segment files and
+    are probed with a binary search, so checking a batch never loads history.
+    This run's hashes are kept sorted in memory up to RUN_HASHES, then (given
+    a ``spill_dir``) written out as one more segment, so memory and the work
+    per chunk stay bounded however long the input is. Saving merges small
+    segments, so the number of probes per row does not grow with the number
+    of ingests.
+    """
+
+    def __init__(self, segments=(), spill_dir=None, paths=()):
+        self.segments = list(segments)
+        self.paths = list(paths)  # Files of the loaded segments, in the same order
+        self.spill_dir = spill_dir
+        self.runs = []  # This run's spilled segment files
+        self.seen = np.empty(0, dtype='uint64')
+
+    def _in_segments(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for segment in self.segments:
+            if len(segment):
+                pos = np.minimum(np.searchsorted(segment, hashes), len(segment) - 1)
+                found |= segment[pos] == hashes
+        return found
+
+    def drop_seen(self, chunk):
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        keep = (~pd.Series(hashes).duplicated().to_numpy()
+                & ~np.isin(hashes, self.seen)
+                & ~self._in_segments(hashes))
+        self.seen = np.union1d(self.seen, hashes[keep])
+        if self.spill_dir is not None and len(self.seen) >= RUN_HASHES:
+            self._spill()
+        return chunk[keep]
+
+    def _spill(self):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"run-{len(self.runs):05d}.npy")
+        np.save(path, self.seen)
+        self.runs.append(path)
+        self.segments.append(np.load(path, mmap_mode='r'))
+        self.seen = np.empty(0, dtype='uint64')
+
+    def save(self, directory):
+        """Write this run's hashes (spilled runs + the in-memory rest) as sorted segments.
+
+        The in-memory rest is merged into the last segment while that one is
+        smaller than MERGE_HASHES, rather than becoming a file of its own.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = sorted(glob.glob(os.path.join(directory, "seg-*.npy")))
+        for path in self.runs:
+            paths.append(os.path.join(directory, f"seg-{len(paths):05d}.npy"))
+            shutil.copyfile(path, paths[-1])
+        if not len(self.seen):
+            return
+        if paths and len(np.load(paths[-1], mmap_mode='r')) < MERGE_HASHES:
+            self._merge_into(paths[-1])
+        else:
+            np.save(os.path.join(directory, f"seg-{len(paths):05d}.npy"), self.seen)
+
+    def _merge_into(self, path):
+        """Rewrite segment ``path`` as the union of its hashes and this run's (atomic replace)"""
+        merged = np.union1d(np.load(path), self.seen)
+        if path in self.paths:
+            # Drop our memory map of the old file (Windows cannot replace a mapped file)
+            self.segments[self.paths.index(path)] = merged
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, merged)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, directory):
+        paths = sorted(glob.glob(os.path.join(directory, "seg-*.npy")))
+        return cls((np.load(p, mmap_mode='r') for p in paths), paths=paths)
+
+
+class PipelineState:
+    """Streaming aggregates needed to extend the processed dataset without re-reading history.
+
+    ``statistics`` holds the dataset-wide values that were actually used to
+    label rows (medians and revenue cut points); ``candidate_statistics()``
+    is what the aggregates say right now.
+    """
+
+    def __init__(self, customers=None, discount=None, quantity=None, delivery=None, sales=None,
+                 dedup=None, statistics=None):
+        self.customers = customers or CustomerAggregator()
+        self.discount = discount or ValueCounter()
+        self.quantity = quantity or ValueCounter()
+        self.delivery = delivery or ValueCounter()
+        self.sales = sales or QuantileSketch()
+        self.dedup = dedup or DuplicateFilter()
+        self.statistics = statistics or {}
+
+    def update(self, chunk):
+        """Fold one cleaned chunk (with row features) into the aggregates"""
+        self.customers.update(chunk)
+        self.discount.update(chunk['Discount'])
+        self.quantity.update(chunk['Quantity'])
+        self.delivery.update(chunk['delivery_days'])
+        self.sales.update(chunk['Sales'])
+
+    def candidate_statistics(self):
+        qs = np.linspace(0, 1, len(REVENUE_SEGMENTS) + 1)
+        return {
+            'discount_median': float(self.discount.median()),
+            'delivery_median': float(self.delivery.median()),
+            'revenue_cut_points': [float(v) for v in self.sales.quantiles(qs)],
+        }
+
+    def save(self, state_dir):
+        os.makedirs(state_dir, exist_ok=True)
+        self.customers.save(os.path.join(state_dir, "customers"))
+        self.sales.save(state_dir, "sales_sketch")
+        self.dedup.save(os.path.join(state_dir, "row_hashes"))
+        counters = {'discount': self.discount.to_dict(), 'quantity': self.quantity.to_dict(),
+                    'delivery_days': self.delivery.to_dict()}
+        for name, payload in [('counters.json', counters), ('statistics.json', self.statistics)]:
+            tmp_file = os.path.join(state_dir, f"{name}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, indent=1)
+            os.replace(tmp_file, os.path.join(state_dir, name))
+
+    @classmethod
+    def load(cls, state_dir):
+        with open(os.path.join(state_dir, "counters.json"), encoding='utf-8') as f:
+            counters = json.load(f)
+        with open(os.path.join(state_dir, "statistics.json"), encoding='utf-8') as f:
+            statistics = json.load(f)
+        return cls(
+            customers=CustomerAggregator.load(os.path.join(state_dir, "customers")),
+            discount=ValueCounter.from_dict(counters['discount']),
+            quantity=ValueCounter.from_dict(counters['quantity']),
+            delivery=ValueCounter.from_dict(counters['delivery_days']),
+            sales=QuantileSketch.load(state_dir, "sales_sketch"),
+            dedup=DuplicateFilter.load(os.path.join(state_dir, "row_hashes")),
+            statistics=statistics,
+        )
+
+
+# ======================== CHUNK TRANSFORMS ========================
+def _string_columns(df):
+    return [c for c in df.columns
+            if pd.api.types.is_object_dtype(df[c]) or pd.api.types.is_string_dtype(df[c])]
+
+
+def clean_chunk(chunk, dedup=None):
+    """Apply notebook 01's cleaning decisions to one raw chunk; returns (clean chunk, counters)"""
+    counts = {'rows_in': len(chunk), 'missing_values': int(chunk.isna().sum().sum())}
+
+    if dedup is not None:
+        before = len(chunk)
+        chunk = dedup.drop_seen(chunk)
+        counts['duplicates'] = before - len(chunk)
+    chunk = chunk.copy()
+
+    date_columns = [c for c in chunk.columns if 'date' in c.lower()]
+    for col in date_columns:
+        chunk[col] = pd.to_datetime(chunk[col], format=DATE_FORMAT, errors='coerce')
+
+    for col in _string_columns(chunk):
+        chunk[col] = chunk[col].str.strip()
+
+    counts['negative_profit'] = int((chunk['Profit'] < 0).sum())
+    counts['negative_discount'] = int((chunk['Discount'] < 0).sum())
+    # Deliberately stricter than notebook 01, which applies Quantity > 0 only when the dataset has
+    # negatives (so it keeps zero-quantity lines otherwise). That condition depends on the whole
+    # dataset, which a chunk or an incremental batch cannot see: every run drops negatives
+    # (cancellations) and zeros (nothing sold), so the result does not depend on how rows arrive
+    positive_qty = chunk['Quantity'] > 0
+    counts['negative_quantity'] = int((chunk['Quantity'] < 0).sum())
+    counts['zero_quantity'] = int((~positive_qty).sum()) - counts['negative_quantity']
+    chunk = chunk[positive_qty]
+
+    for col in date_columns:
+        invalid = chunk[col].isna()
+        counts[f'invalid_dates:{col}'] = int(invalid.sum())
+        chunk = chunk[~invalid]
+
+    return chunk, counts
+
+
+def add_row_features(df):
+    """Features that only need the row itself (temporal, margin, discount flag, delivery days)"""
+    order_date = df['Order Date']
+    df['order_year'] = order_date.dt.year
+    df['order_month'] = order_date.dt.month
+    df['order_quarter'] = order_date.dt.quarter
+    df['order_day_of_week'] = order_date.dt.dayofweek
+    df['order_week_of_year'] = order_date.dt.isocalendar().week.astype('int64').to_numpy()
+
+    margin = (df['Profit'] / df['Sales'] * 100).round(2)
+    df['profit_margin'] = margin.replace([np.inf, -np.inf], 0)  # Division by zero
+    df['has_discount'] = (df['Discount'] > 0).astype(int)
+    df['delivery_days'] = (df['Ship Date'] - order_date).dt.days
+    return df
+
+
+def add_dataset_features(df, customers, discount_median, delivery_median, revenue_cut_points):
+    """Features that need dataset-wide state: customer aggregates, medians and Sales cut points"""
+    stats = customers.features(df['Customer ID'])
+    stats.index = df.index
+    first_order = stats['First Order Date']
+
+    df['high_discount'] = (df['Discount'] > discount_median).astype(int)
+    df['First Order Date'] = first_order
+    df['customer_type'] = np.where(df['Order Date'] == first_order, 'New', 'Returning')
+    for col in ['order_frequency', 'total_customer_sales', 'avg_order_value', 'total_customer_profit']:
+        df[col] = stats[col]
+    df['customer_first_order'] = first_order
+    df['delivery_delay_flag'] = (df['delivery_days'] > delivery_median).astype(int)
+    df['revenue_segment'] = assign_revenue_segment(df['Sales'], revenue_cut_points)
+
+    raw_columns = [c for c in df.columns if c not in FEATURE_COLUMNS]
+    return df[raw_columns + FEATURE_COLUMNS]
+
+
+def assign_revenue_segment(sales, cut_points):
+    """Low/Medium/High by Sales tertile cut points - same bins ``pd.qcut(q=3)`` produces"""
+    edges = np.unique(cut_points)
+    bins = Bins(edges, REVENUE_SEGMENTS[:len(edges) - 1])
+    return pd.Series(bins.categorical(sales), index=sales.index, name=sales.name)
+
+
+# ======================== PIPELINE ========================
+@dataclass
+class PipelineResult:
+    rows_read: int = 0
+    rows_written: int = 0
+    customers: int = 0
+    discount_median: float = np.nan
+    delivery_median: float = np.nan
+    revenue_cut_points: list = field(default_factory=list)
+    decisions: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+
+
+def _decision_log(totals, quantity):
+    if totals.get('missing_values'):
+        decisions = [f"MISSING VALUES: Found {totals['missing_values']} missing cells (kept; no imputation)"]
+    else:
+        decisions = ["MISSING VALUES: No missing values found in dataset"]
+    decisions.append(f"DUPLICATES: Removed {totals.get('duplicates', 0)} duplicate rows")
+    decisions.append("DATE PARSING: Converted all '*Date' columns to datetime")
+    decisions.append("CATEGORIES: Stripped whitespace from all categorical columns")
+    if totals.get('negative_profit'):
+        decisions.append(f"NEGATIVE PROFIT: Kept {totals['negative_profit']} negative profit rows "
+                         "(domain logic: some orders lose money)")
+    if totals.get('negative_quantity'):
+        decisions.append(f"NEGATIVE QUANTITY: Removed {totals['negative_quantity']} negative quantity rows "
+                         "(cancelled orders)")
+    if totals.get('zero_quantity'):
+        decisions.append(f"ZERO QUANTITY: Removed {totals['zero_quantity']} rows without a positive quantity "
+                         "(nothing sold; notebook 01 keeps them when there are no negatives)")
+    if totals.get('negative_discount'):
+        decisions.append(f"NEGATIVE DISCOUNT: Kept {totals['negative_discount']} negative discount rows "
+                         "(markup/special pricing)")
+    q1, q3 = quantity.quantile(0.25), quantity.quantile(0.75)
+    iqr = q3 - q1
+    outliers = quantity.count_outside(q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+    decisions.append(f"QUANTITY OUTLIERS: Kept {outliers} outliers (high-volume orders are valid)")
+    for key, value in totals.items():
+        if key.startswith('invalid_dates:') and value:
+            decisions.append(f"INVALID DATES in '{key.split(':', 1)[1]}': Removed {value} rows")
+    return decisions
+
+
+def run_pipeline(raw_path=RAW_CSV, out_dir=PROCESSED_DIR, chunksize=DEFAULT_CHUNKSIZE,
+                 write_columnar=True, spill_dir=None, state_dir=STATE_DIR):
+    """Clean + feature-engineer ``raw_path`` into ``out_dir`` in bounded memory.
+
+    When ``state_dir`` is set the streaming aggregates are persisted there so
+    later batches can be added with ``analytics.incremental``.
+    """
+    result = PipelineResult()
+    totals = {}
+    categories = {}
+
+    spill_root = tempfile.mkdtemp(prefix='pipeline-', dir=spill_dir)
+    state = PipelineState(dedup=DuplicateFilter(spill_dir=os.path.join(spill_root, 'row_hashes')))
+    try:
+        # ---------- Pass 1: clean, row features, streaming aggregates ----------
+        spilled = []
+        for i, raw in enumerate(pd.read_csv(raw_path, encoding='latin-1', chunksize=chunksize)):
+            chunk, counts = clean_chunk(raw, state.dedup)
+            for key, value in counts.items():
+                totals[key] = totals.get(key, 0) + value
+            chunk = add_row_features(chunk)
+
+            state.update(chunk)
+            for col in _string_columns(chunk):
+                if col not in ROW_LEVEL_COLUMNS:
+                    categories.setdefault(col, set()).update(chunk[col].dropna().unique())
+
+            path = os.path.join(spill_root, f"chunk-{i:05d}.pkl")
+            chunk.to_pickle(path)
+            spilled.append(path)
+            result.rows_written += len(chunk)
+
+        result.rows_read = totals.get('rows_in', 0)
+        result.customers = len(state.customers.table)
+        state.statistics = state.candidate_statistics()
+        result.discount_median = state.statistics['discount_median']
+        result.delivery_median = state.statistics['delivery_median']
+        result.revenue_cut_points = state.statistics['revenue_cut_points']
+        result.decisions = _decision_log(totals, state.quantity)
+
+        # ---------- Pass 2: dataset-wide features, append outputs ----------
+        os.makedirs(out_dir, exist_ok=True)
+        csv_path = os.path.join(out_dir, CLEANED_CSV)
+        csv_tmp = f"{csv_path}.tmp"
+        writer = None
+        if write_columnar:
+            column_categories = {col: sorted(values) for col, values in categories.items()}
+            column_categories['customer_type'] = CUSTOMER_TYPES
+            column_categories['revenue_segment'] = REVENUE_SEGMENTS
+            # Partitioned by order_year / order_month so date-range loads can skip whole months
+            writer = ColumnarWriter(os.path.join(out_dir, COLUMNAR_DIR), result.rows_written, column_categories,
+                                    partition_on=PARTITION_COLUMNS)
+
+        for i, path in enumerate(spilled):
+            chunk = add_dataset_features(
+                pd.read_pickle(path), state.customers,
+                result.discount_median, result.delivery_median, result.revenue_cut_points,
+            )
+            os.remove(path)
+            chunk.to_csv(csv_tmp, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            if writer is not None:
+                writer.write(chunk)
+
+        if spilled:
+            os.replace(csv_tmp, csv_path)
+            result.outputs.append(csv_path)
+        if writer is not None:
+            result.outputs.append(writer.close())
+        if state_dir is not None:
+            # A full run starts a fresh history for incremental ingest
+            shutil.rmtree(state_dir, ignore_errors=True)
+            state.save(state_dir)
+            result.outputs.append(state_dir)
+    finally:
+        shutil.rmtree(spill_root, ignore_errors=True)
+
+    return result
+
+
+# ======================== CLI ========================
+def prewarm_cache(out_dir):
+    """--prewarm: store the unfiltered dashboard's views so the next server start reads them from disk"""
+    # Imported here: the dashboard/service layer is built on top of this module
+    from analytics.diskcache import CACHE_DIR
+    from analytics.service import prewarm_processed
+    try:
+        stored = prewarm_processed(out_dir)
+    except (OSError, KeyError, ValueError) as e:
+        # e.g. no kpis.csv yet (written by notebook 02)
+        print(f"⚠️ Cache not pre-warmed: {e}")
+        return
+    print(f"🔥 Pre-warmed {stored} dashboard views in {os.path.relpath(os.path.join(out_dir, CACHE_DIR))}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean and feature-engineer the raw Superstore CSV in chunks")
+    parser.add_argument('--raw', default=RAW_CSV, help="raw Superstore CSV (default: data/raw/superstore.csv)")
+    parser.add_argument('--out-dir', default=PROCESSED_DIR, help="output directory (default: data/processed)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk")
+    parser.add_argument('--no-columnar', action='store_true', help="only write the CSV")
+    parser.add_argument('--spill-dir', default=None, help="where to spill cleaned chunks (default: system temp)")
+    parser.add_argument('--state-dir', default=STATE_DIR,
+                        help="where to persist aggregates for incremental ingest (default: data/processed/pipeline_state)")
+    parser.add_argument('--prewarm', action='store_true',
+                        help="then store the unfiltered dashboard's views in <out-dir>/cache for the next start")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("PHASE 2 & 3: DATA CLEANING & FEATURE ENGINEERING (CHUNKED)")
+    print("=" * 80)
+    result = run_pipeline(args.raw, args.out_dir, args.chunksize,
+                          write_columnar=not args.no_columnar, spill_dir=args.spill_dir,
+                          state_dir=args.state_dir)
+
+    print(f"\n📊 Rows read: {result.rows_read:,}  |  Rows written: {result.rows_written:,}  |  "
+          f"Customers: {result.customers:,}")
+    print(f"📏 Discount median: {result.discount_median}  |  Delivery days median: {result.delivery_median}")
+    print(f"💎 Revenue segment cut points: {[round(v, 4) for v in result.revenue_cut_points]}")
+    print("\n📋 Decision Log:")
+    for i, decision in enumerate(result.decisions, 1):
+        print(f"  {i}. {decision}")
+    print()
+    for path in result.outputs:
+        print(f"✅ Saved: {os.path.relpath(path)}")
+    if args.prewarm:
+        prewarm_cache(args.out_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
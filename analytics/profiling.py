@@ -0,0 +1,209 @@
+"""
+=================================================================
+HOT-PATH INSTRUMENTATION
+=================================================================
+``Profiler.section(name)`` times a block of code (and, optionally,
+the peak memory it allocates via tracemalloc). One profiler covers a
+single dashboard rerun; ``finish()`` turns it into a record that is
+added to a process-wide ``ProfileHistory`` for rolling percentiles
+and can be appended to a JSON-lines log.
+
+tracemalloc is process-wide: it runs while any profiler tracks memory
+and stops with the last one. Its peak is shared too, so while two
+sessions profile memory at once their peaks include each other's
+allocations; such records carry ``memory_approximate``.
+
+When profiling is off the dashboard uses ``NULL_PROFILER``, whose
+``section()`` hands back one shared no-op context manager - no
+clock reads, no allocations, no bookkeeping.
+=================================================================
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_HISTORY = 500
+PERCENTILES = (50, 90, 99)
+PERF_LOG_ENV = 'DASHBOARD_PERF_LOG'
+
+# Memory-tracking profilers alive in this process, and whether they started tracemalloc
+_tracing_lock = threading.Lock()
+_tracing = {'profilers': 0, 'started': False}
+
+
+def _start_tracing():
+    with _tracing_lock:
+        _tracing['profilers'] += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing['started'] = True
+
+
+def _stop_tracing():
+    with _tracing_lock:
+        _tracing['profilers'] -= 1
+        if _tracing['profilers'] == 0 and _tracing['started']:
+            tracemalloc.stop()
+            _tracing['started'] = False
+
+
+def _traced_memory(profiler, reset=False):
+    """(current, peak) bytes; the peak is reset only while ``profiler`` is the one tracing"""
+    with _tracing_lock:
+        current, peak = tracemalloc.get_traced_memory()
+        if _tracing['profilers'] > 1:
+            profiler.memory_approximate = True
+        elif reset:
+            tracemalloc.reset_peak()
+    return current, peak
+
+
+class _Section:
+    __slots__ = ('profiler', 'name', 'entry', 'start', 'mem_start', 'mem_peak')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.track_memory:
+            parent = self.profiler._stack[-1] if self.profiler._stack else None
+            current, peak = _traced_memory(self.profiler, reset=True)
+            if parent is not None:
+                parent.mem_peak = max(parent.mem_peak, peak)
+            self.mem_start = self.mem_peak = current
+        # Listed in entry order, so a tab precedes the views and charts inside it
+        self.entry = {'name': self.name, 'depth': len(self.profiler._stack), 'ms': None, 'peak_kb': None}
+        self.profiler.sections.append(self.entry)
+        self.profiler._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.profiler._stack.pop()
+        memory_kb = None
+        if self.profiler.track_memory:
+            peak = max(self.mem_peak, _traced_memory(self.profiler)[1])
+            memory_kb = (peak - self.mem_start) / 1024
+            if self.profiler._stack:
+                parent = self.profiler._stack[-1]
+                parent.mem_peak = max(parent.mem_peak, peak)
+        self.entry['ms'] = elapsed * 1000
+        self.entry['peak_kb'] = memory_kb
+        return False
+
+
+class Profiler:
+    """Per-rerun section timings; not shared between threads"""
+
+    enabled = True
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.sections = []
+        self._stack = []
+        self.memory_approximate = False  # Another profiler traced memory at the same time
+        self._tracing = False
+        if track_memory:
+            _start_tracing()
+            self._tracing = True
+        self.start = time.perf_counter()
+
+    def section(self, name):
+        return _Section(self, name)
+
+    def __del__(self):
+        # A rerun stopped early (st.stop(), an exception) never reaches finish()
+        if self._tracing:
+            _stop_tracing()
+
+    def finish(self):
+        """Stop the clock (and tracemalloc, if this was the last profiler tracing); returns the run record"""
+        total_ms = (time.perf_counter() - self.start) * 1000
+        if self._tracing:
+            _stop_tracing()
+            self._tracing = False
+        return {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'total_ms': total_ms,
+            'track_memory': self.track_memory,
+            'memory_approximate': self.memory_approximate,
+            'sections': list(self.sections),
+        }
+
+
+class _NullProfiler:
+    """Drop-in for Profiler when instrumentation is off"""
+
+    enabled = False
+    track_memory = False
+    sections = ()
+    _section = nullcontext()
+
+    def section(self, name):
+        return self._section
+
+    def finish(self):
+        return None
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class ProfileHistory:
+    """Rolling per-section latencies across reruns (all sessions), with percentiles"""
+
+    def __init__(self, maxlen=DEFAULT_HISTORY):
+        self.maxlen = maxlen
+        self._samples = {}
+        self._runs = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._runs.append(record['total_ms'])
+            for section in record['sections']:
+                self._samples.setdefault(section['name'], deque(maxlen=self.maxlen)).append(section['ms'])
+
+    def summary(self, percentiles=PERCENTILES):
+        """{section: {'count', 'p50', 'p90', 'p99'}} in milliseconds, plus '(rerun total)'"""
+        with self._lock:
+            samples = {name: np.fromiter(values, dtype=float) for name, values in self._samples.items()}
+            samples['(rerun total)'] = np.fromiter(self._runs, dtype=float)
+        result = {}
+        for name, values in samples.items():
+            if len(values) == 0:
+                continue
+            stats = {'count': int(len(values))}
+            stats.update({f'p{p}': float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))})
+            result[name] = stats
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._runs.clear()
+
+
+_log_lock = threading.Lock()
+
+
+def append_log(record, path=None):
+    """Append ``record`` as one JSON line to ``path`` (default: $DASHBOARD_PERF_LOG, if set)"""
+    path = path or os.environ.get(PERF_LOG_ENV)
+    if not path or record is None:
+        return None
+    line = json.dumps(record, default=str)
+    with _log_lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    return path
@@ -0,0 +1,281 @@
+"""
+=================================================================
+BACKGROUND HOT RELOAD OF THE PROCESSED DATA
+=================================================================
+The dashboard used to load data/processed once per process: a new
+pipeline run meant restarting Streamlit, and the first user after
+the restart paid the cold load.
+
+``HotReloader`` keeps one shared, immutable snapshot current:
+
+1. a daemon thread polls the (size, mtime) of the watched files;
+2. a change is acted on once it has been stable for one more poll
+   (the pipeline may still be writing) and the files' content hash
+   differs from the loaded one (a touch alone does not reload);
+3. the new snapshot - dataset, date bounds, KPIs and the indexes of
+   every date window the old one was serving - is built on that
+   thread, then swapped in with a single reference assignment.
+
+Readers take ``reloader.current`` once per rerun and use only that
+object, so a session mid-rerun finishes on the version it started
+with and picks up the new one on its next rerun. A failed build keeps
+the old snapshot (see ``last_error``) and is retried on later polls.
+=================================================================
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from analytics.cube import SalesCube
+from analytics.filters import FilterEngine
+from analytics.kpis import read_kpis
+from analytics.rfm import RFMTable
+from analytics.shared import shared_dataset
+from analytics.sketches import DistinctSketches
+from analytics.sqlbackend import SQLBackend
+from analytics.star import load_star
+from analytics.storage import DASHBOARD_COLUMNS, dataset_files, dataset_version, date_bounds
+from analytics.timeseries import DailySeries
+
+DEFAULT_INTERVAL = 5.0
+DEFAULT_MAX_WINDOWS = 4
+KPI_FILE = "kpis.csv"
+HASH_CHUNK = 1024 * 1024
+
+
+def file_signature(paths):
+    """(path, size, mtime) of each path; (path, None, None) for missing files"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+_file_hashes = {}
+
+
+def file_hash(path):
+    """SHA-1 of a file's bytes, streamed in chunks; remembered per (path, size, mtime)"""
+    _, size, mtime = file_signature([path])[0]
+    if size is None:
+        return None
+    key = os.path.abspath(path)
+    cached = _file_hashes.get(key)
+    if cached is None or cached[:2] != (size, mtime):
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+        cached = _file_hashes[key] = (size, mtime, digest.hexdigest())
+    return cached[2]
+
+
+def content_hash(paths):
+    """SHA-1 over the file names and bytes of every path (independent of where the project lives)"""
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(os.path.basename(path).encode('utf-8'))
+        digest.update((file_hash(path) or '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+class HotReloader:
+    """``current`` = build(previous) for the latest settled content of ``paths()``"""
+
+    def __init__(self, paths, build, interval=DEFAULT_INTERVAL):
+        self.paths = paths
+        self.build = build
+        self.interval = interval
+        self.reloads = 0
+        self.reloaded_at = None
+        self.last_error = None
+        self._current = None
+        self._signature = None
+        self._digest = None
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def current(self):
+        return self._current
+
+    def start(self):
+        """Build the first snapshot on the calling thread, then watch in the background"""
+        paths = self.paths()
+        signature, digest = file_signature(paths), content_hash(paths)
+        self._current = self.build(None)
+        self._signature, self._digest = signature, digest
+        self.reloaded_at = time.time()
+        if self.interval and self.interval > 0:
+            self._thread = threading.Thread(target=self._watch, name="data-reloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def check(self):
+        """One poll; True if a new snapshot was swapped in"""
+        paths = self.paths()
+        signature = file_signature(paths)
+        if signature == self._signature:
+            self._pending = None
+            return False
+        if signature != self._pending:
+            # Changed since the last poll: wait until it stops changing
+            self._pending = signature
+            return False
+        self._pending = None
+        digest = content_hash(paths)
+        if digest == self._digest:
+            # Touched or rewritten with the same bytes
+            self._signature = signature
+            return False
+        self._current = self.build(self._current)
+        self._signature, self._digest = signature, digest
+        self.reloads += 1
+        self.reloaded_at = time.time()
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the old snapshot; the build is retried on later polls
+                self.last_error = e
+
+
+class WindowData:
+    """Rows of one date window plus the indexes built from them.
+
+    With a ``disk`` cache the cube, RFM table, daily series and sketches
+    are read back from it under ``key`` (data fingerprint, window)
+    instead of being rebuilt by every new process.
+    """
+
+    def __init__(self, df, disk=None, key=None):
+        self._disk = disk
+        self._key = key
+        # Date-sorted rows + per-value bitmaps
+        self.engine = FilterEngine(df)
+        df = self.engine.df
+        self.cube = self._derived('cube', lambda: SalesCube(df))
+        self.rfm = self._derived('rfm', lambda: RFMTable(df))
+        self.daily = self._derived('daily', lambda: DailySeries(df))
+        self._sketches = None
+        self._lock = threading.Lock()
+
+    def _derived(self, name, build):
+        if self._disk is None:
+            return build()
+        return self._disk.get_or_compute((*self._key, name), build)
+
+    @property
+    def sketches(self):
+        """HyperLogLog sketches, built on first use of approximate counts"""
+        with self._lock:
+            if self._sketches is None:
+                self._sketches = self._derived('sketches', lambda: DistinctSketches(self.engine.df))
+            return self._sketches
+
+
+class DatasetSnapshot:
+    """One version of data/processed (or of the SQLite file) as seen by the dashboard"""
+
+    def __init__(self, processed_dir, sqlite_path=None, warm_windows=(), max_windows=DEFAULT_MAX_WINDOWS,
+                 shared=True, disk=None):
+        self.processed_dir = processed_dir
+        self.max_windows = max_windows
+        self.disk = disk
+        self.loaded_at = time.time()
+        self.sql = SQLBackend(sqlite_path) if sqlite_path else None
+        if self.sql is not None:
+            self.version = self.sql.version
+            self.min_date, self.max_date = self.sql.min_date, self.sql.max_date
+        else:
+            self.version = dataset_version(processed_dir)
+            self.min_date, self.max_date = date_bounds(processed_dir)
+        # Content hash of the data: the same across restarts and checkouts, unlike ``version``,
+        # and different whenever any value is (schema.json carries a digest of the columns)
+        self.fingerprint = content_hash([sqlite_path] if sqlite_path else dataset_files(processed_dir))
+        self.shared = None
+        if self.sql is None and shared:
+            try:
+                self.shared = shared_dataset(processed_dir, self.version)
+            except OSError:
+                # Read-only data directory: every window is loaded into this process instead
+                self.shared = None
+        self.kpis = read_kpis(os.path.join(processed_dir, KPI_FILE))
+
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+        self._building = {}
+        if self.sql is None:
+            for window in warm_windows:
+                self.window(window)
+
+    def windows(self):
+        """Loaded windows, least recently used first"""
+        with self._lock:
+            return list(self._windows)
+
+    def window(self, window):
+        """WindowData for a (first day, last day) window, built once and shared"""
+        while True:
+            with self._lock:
+                if window in self._windows:
+                    self._windows.move_to_end(window)
+                    return self._windows[window]
+                event = self._building.get(window)
+                if event is None:
+                    event = self._building[window] = threading.Event()
+                    break
+            # Another session is building this window: wait for it, then read it
+            event.wait()
+
+        try:
+            data = WindowData(self._window_frame(window), self.disk, (self.fingerprint, 'window', window))
+            with self._lock:
+                self._windows[window] = data
+                while len(self._windows) > self.max_windows:
+                    self._windows.popitem(last=False)
+            return data
+        finally:
+            with self._lock:
+                del self._building[window]
+            event.set()
+
+
+    def _window_frame(self, window):
+        if self.shared is not None:
+            # A view of the memory-mapped dataset: no rows are copied
+            return self.shared.window(*window)
+        # Only the order_year/order_month partitions inside the window
+        star = load_star(self.processed_dir, columns=DASHBOARD_COLUMNS, start=window[0], end=window[1])
+        return star.frame(DASHBOARD_COLUMNS)
+
+
+def watch_processed(processed_dir, sqlite_path=None, interval=DEFAULT_INTERVAL, shared=True, disk=None):
+    """A started HotReloader of DatasetSnapshots for the dashboard (``disk``: optional DiskCache)"""
+    def paths():
+        data = [sqlite_path] if sqlite_path else dataset_files(processed_dir)
+        return data + [os.path.join(processed_dir, KPI_FILE)]
+
+    def build(previous):
+        # Re-warm the windows sessions were using, so nobody pays the cold load after a reload
+        warm = previous.windows() if previous is not None else ()
+        return DatasetSnapshot(processed_dir, sqlite_path, warm_windows=warm, shared=shared, disk=disk)
+
+    return HotReloader(paths, build, interval).start()
@@ -0,0 +1,390 @@
+"""
+=================================================================
+HEADLESS REPORT RENDERER - reports/01..08 PNGs
+=================================================================
+Regenerates the eight analysis figures of notebook 02 without
+running the notebook:
+
+1. the cleaned data is loaded once (only the columns the figures use)
+   and every analysis' aggregates are computed from it;
+2. each figure's aggregates are fingerprinted and compared with the
+   fingerprints of the last run (reports/.report_hashes.json) -
+   unchanged figures are skipped;
+3. the remaining figures are rendered in parallel in a process pool
+   (matplotlib, Agg backend) and written atomically.
+
+Bump ``RENDER_VERSION`` when a figure's drawing code changes, so it
+is redrawn even though its data did not.
+
+Usage:
+    python -m analytics.reports
+    python -m analytics.reports --force --workers 4
+=================================================================
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analytics.bins import DISCOUNT_BINS
+from analytics.rfm import RFMTable
+from analytics.storage import load_cleaned
+from analytics.timeseries import DailySeries
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
+REPORTS_DIR = os.path.join(PROJECT_ROOT, "reports")
+HASH_FILE = ".report_hashes.json"
+RENDER_VERSION = 2
+DEFAULT_DPI = 300
+REPORT_COLUMNS = ['Order ID', 'Order Date', 'Customer ID', 'Region', 'Category', 'Product Name',
+                  'Sales', 'Quantity', 'Discount', 'Profit', 'profit_margin', 'customer_type']
+
+
+# ======================== AGGREGATES ========================
+def revenue_trends(df):
+    monthly = DailySeries(df).slice().trend('M')
+    monthly.columns = ['Month', 'Revenue', 'Profit', 'Orders']
+    monthly['Month'] = monthly['Month'].dt.to_period('M').astype(str)
+    return {'monthly': monthly}
+
+
+def top_products(df):
+    top = df.groupby('Product Name', observed=True).agg({
+        'Sales': 'sum',
+        'Profit': 'sum',
+        'Quantity': 'sum',
+        'Order ID': 'count'
+    }).sort_values('Sales', ascending=False).head(10)
+    top.columns = ['Revenue', 'Profit', 'Units Sold', 'Orders']
+    return {'top': top}
+
+
+def _performance(df, dim):
+    performance = df.groupby(dim, observed=True).agg({
+        'Sales': 'sum',
+        'Profit': 'sum',
+        'Order ID': 'count',
+        'Quantity': 'sum'
+    })
+    performance.columns = ['Revenue', 'Profit', 'Orders', 'Units']
+    performance['Profit_Margin_%'] = (performance['Profit'] / performance['Revenue'] * 100).round(2)
+    return performance
+
+
+def category_performance(df):
+    return {'performance': _performance(df, 'Category')}
+
+
+def customer_type(df):
+    return {
+        'counts': df['customer_type'].value_counts(),
+        'revenue': df.groupby('customer_type', observed=True)['Sales'].sum(),
+    }
+
+
+def pareto(df):
+    clv = df.groupby('Customer ID', observed=True).agg({
+        'Sales': 'sum',
+        'Order ID': 'count'
+    }).sort_values('Sales', ascending=False)
+    cumulative_pct = (clv['Sales'].cumsum() / clv['Sales'].sum() * 100).to_numpy()
+    return {
+        'cumulative_pct': cumulative_pct,
+        'customers_for_80_pct': int((cumulative_pct <= 80).sum()),
+        'top_20_orders': clv['Order ID'].to_numpy()[:int(len(clv) * 0.2)],
+    }
+
+
+def churn(df):
+    summary = RFMTable(df).churn()
+    risk_counts = summary['risk_counts']
+    return {'histogram': summary['histogram'], 'risk_counts': risk_counts[risk_counts > 0]}
+
+
+def region_performance(df):
+    return {'performance': _performance(df, 'Region')}
+
+
+def discount_impact(df):
+    stats = DISCOUNT_BINS.aggregate(df['Discount'], {'profit_margin': df['profit_margin']})
+    return {'margin': stats['profit_margin mean'], 'volume': stats['count']}
+
+
+# ======================== FIGURES ========================
+def _bar_grid(performance, colors, titles, ylabels):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    for ax, column, color, title, ylabel in zip(axes.flat, ['Revenue', 'Profit', 'Profit_Margin_%', 'Orders'],
+                                                colors, titles, ylabels):
+        performance[column].plot(kind='bar', ax=ax, color=color)
+        ax.set_title(title, fontsize=12, fontweight='bold')
+        ax.set_ylabel(ylabel)
+    return fig
+
+
+def draw_revenue_trends(data):
+    import matplotlib.pyplot as plt
+
+    monthly = data['monthly']
+    fig, axes = plt.subplots(2, 1, figsize=(14, 8))
+    axes[0].plot(monthly.index, monthly['Revenue'], marker='o', label='Revenue', linewidth=2)
+    axes[0].set_title('Monthly Revenue Trends', fontsize=14, fontweight='bold')
+    axes[0].set_ylabel('Revenue ($)')
+    axes[0].grid(True, alpha=0.3)
+    axes[0].legend()
+
+    axes[1].plot(monthly.index, monthly['Orders'], marker='s', label='Orders', color='orange', linewidth=2)
+    axes[1].set_title('Monthly Order Volume', fontsize=14, fontweight='bold')
+    axes[1].set_ylabel('Number of Orders')
+    axes[1].set_xlabel('Month')
+    axes[1].grid(True, alpha=0.3)
+    axes[1].legend()
+    return fig
+
+
+def draw_top_products(data):
+    import matplotlib.pyplot as plt
+
+    top = data['top']
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    top['Revenue'].plot(kind='barh', ax=axes[0], color='steelblue')
+    axes[0].set_title('Top 10 Products by Revenue', fontsize=14, fontweight='bold')
+    axes[0].set_xlabel('Revenue ($)')
+
+    top['Profit'].plot(kind='barh', ax=axes[1], color='green')
+    axes[1].set_title('Top 10 Products by Profit', fontsize=14, fontweight='bold')
+    axes[1].set_xlabel('Profit ($)')
+    return fig
+
+
+def draw_category_performance(data):
+    return _bar_grid(
+        data['performance'],
+        colors=['skyblue', 'green', 'orange', 'purple'],
+        titles=['Revenue by Category', 'Profit by Category', 'Profit Margin % by Category', 'Orders by Category'],
+        ylabels=['Revenue ($)', 'Profit ($)', 'Profit Margin %', 'Number of Orders'],
+    )
+
+
+def draw_customer_type(data):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    axes[0].pie(data['counts'], labels=data['counts'].index, autopct='%1.1f%%', startangle=90)
+    axes[0].set_title('New vs Repeat Customer Distribution', fontsize=12, fontweight='bold')
+
+    axes[1].pie(data['revenue'], labels=data['revenue'].index, autopct='%1.1f%%', startangle=90)
+    axes[1].set_title('Revenue from New vs Repeat Customers', fontsize=12, fontweight='bold')
+    return fig
+
+
+def draw_pareto(data):
+    import matplotlib.pyplot as plt
+
+    needed = data['customers_for_80_pct']
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    axes[0].plot(data['cumulative_pct'], linewidth=2, label='Cumulative Revenue %')
+    axes[0].axhline(y=80, color='r', linestyle='--', label='80% threshold')
+    axes[0].axvline(x=needed, color='g', linestyle='--', label=f'Customers needed ({needed})')
+    axes[0].set_title('Pareto Curve - Customer Contribution to Revenue', fontsize=12, fontweight='bold')
+    axes[0].set_xlabel('Customer Rank')
+    axes[0].set_ylabel('Cumulative Revenue %')
+    axes[0].legend()
+    axes[0].grid(True, alpha=0.3)
+
+    axes[1].hist(data['top_20_orders'], bins=20, color='steelblue', edgecolor='black')
+    axes[1].set_title('Order Frequency - Top 20% Customers', fontsize=12, fontweight='bold')
+    axes[1].set_xlabel('Number of Orders')
+    axes[1].set_ylabel('Count')
+    return fig
+
+
+def draw_churn(data):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    histogram = data['histogram']
+    axes[0].bar(histogram['From'], histogram['Customers'], width=histogram['To'] - histogram['From'],
+                align='edge', color='coral', edgecolor='black')
+    axes[0].axvline(x=180, color='r', linestyle='--', linewidth=2, label='High Risk (180 days)')
+    axes[0].axvline(x=90, color='orange', linestyle='--', linewidth=2, label='Medium Risk (90 days)')
+    axes[0].set_title('Days Since Last Order Distribution', fontsize=12, fontweight='bold')
+    axes[0].set_xlabel('Days')
+    axes[0].set_ylabel('Number of Customers')
+    axes[0].legend()
+
+    axes[1].pie(data['risk_counts'], labels=data['risk_counts'].index, autopct='%1.1f%%', startangle=90)
+    axes[1].set_title('Customer Churn Risk Distribution', fontsize=12, fontweight='bold')
+    return fig
+
+
+def draw_region_performance(data):
+    return _bar_grid(
+        data['performance'],
+        colors=['steelblue', 'green', 'orange', 'purple'],
+        titles=['Revenue by Region', 'Profit by Region', 'Profit Margin % by Region', 'Orders by Region'],
+        ylabels=['Revenue ($)', 'Profit ($)', 'Profit Margin %', 'Number of Orders'],
+    )
+
+
+def draw_discount_impact(data):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    data['margin'].plot(kind='bar', ax=axes[0], color='coral')
+    axes[0].set_title('Profit Margin by Discount Level', fontsize=12, fontweight='bold')
+    axes[0].set_ylabel('Profit Margin %')
+    axes[0].axhline(y=0, color='r', linestyle='--', alpha=0.5)
+    axes[0].set_xticklabels(axes[0].get_xticklabels(), rotation=45)
+
+    data['volume'].plot(kind='bar', ax=axes[1], color='steelblue')
+    axes[1].set_title('Order Volume by Discount Level', fontsize=12, fontweight='bold')
+    axes[1].set_ylabel('Number of Orders')
+    axes[1].set_xticklabels(axes[1].get_xticklabels(), rotation=45)
+    return fig
+
+
+# file name -> (aggregates, figure)
+REPORTS = {
+    '01_revenue_trends.png': (revenue_trends, draw_revenue_trends),
+    '02_top_products.png': (top_products, draw_top_products),
+    '03_category_performance.png': (category_performance, draw_category_performance),
+    '04_customer_type.png': (customer_type, draw_customer_type),
+    '05_pareto_analysis.png': (pareto, draw_pareto),
+    '06_churn_analysis.png': (churn, draw_churn),
+    '07_region_analysis.png': (region_performance, draw_region_performance),
+    '08_discount_impact.png': (discount_impact, draw_discount_impact),
+}
+
+
+# ======================== CHANGE DETECTION ========================
+def fingerprint(value, digest=None):
+    """Content hash of a figure's aggregates (frames, series, arrays, scalars, nested dicts)"""
+    top = digest is None
+    digest = digest or hashlib.sha256()
+    if isinstance(value, dict):
+        for key in sorted(value):
+            digest.update(repr(key).encode())
+            fingerprint(value[key], digest)
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        labels = list(value.columns) if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(repr((type(value).__name__, labels, list(value.index))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(str(value.dtype).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(repr(value).encode())
+    return digest.hexdigest() if top else digest
+
+
+def _load_hashes(out_dir):
+    path = os.path.join(out_dir, HASH_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_hashes(out_dir, hashes):
+    path = os.path.join(out_dir, HASH_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# ======================== RENDERING ========================
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Same look as notebook 02
+    sns.set_style("whitegrid")
+    sns.set_palette("husl")
+    plt.rcParams['figure.figsize'] = (14, 7)
+
+
+def render_figure(name, data, path, dpi=DEFAULT_DPI):
+    """Draw one figure and write it atomically; runs inside a pool worker"""
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    fig = REPORTS[name][1](data)
+    fig.tight_layout()
+    tmp_path = path + '.tmp.png'
+    fig.savefig(tmp_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    os.replace(tmp_path, path)
+    return name, time.perf_counter() - start
+
+
+def generate_reports(processed_dir=PROCESSED_DIR, out_dir=REPORTS_DIR, workers=None, force=False,
+                     dpi=DEFAULT_DPI, only=None):
+    """Render changed figures; returns {'rendered': {name: seconds}, 'skipped': [names]}"""
+    names = [n for n in REPORTS if not only or n in only or n.split('_', 1)[0] in only]
+    df = load_cleaned(processed_dir, columns=REPORT_COLUMNS)
+
+    previous = _load_hashes(out_dir)
+    hashes = dict(previous)
+    jobs = []
+    skipped = []
+    for name in names:
+        data = REPORTS[name][0](df)
+        digest = fingerprint({'data': data, 'render_version': RENDER_VERSION, 'dpi': dpi})
+        path = os.path.join(out_dir, name)
+        if not force and previous.get(name) == digest and os.path.exists(path):
+            skipped.append(name)
+            continue
+        hashes[name] = digest
+        jobs.append((name, data, path))
+
+    rendered = {}
+    if jobs:
+        os.makedirs(out_dir, exist_ok=True)
+        workers = workers or min(len(jobs), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(render_figure, name, data, path, dpi) for name, data, path in jobs]
+            for future in futures:
+                name, seconds = future.result()
+                rendered[name] = seconds
+        _save_hashes(out_dir, hashes)
+    return {'rendered': rendered, 'skipped': skipped}
+
+
+# ======================== CLI ========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the reports/ figures from the cleaned data")
+    parser.add_argument('--processed-dir', default=PROCESSED_DIR)
+    parser.add_argument('--out-dir', default=REPORTS_DIR)
+    parser.add_argument('--workers', type=int, default=None, help="Render processes (default: one per figure)")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--force', action='store_true', help="Redraw every figure, changed or not")
+    parser.add_argument('--only', nargs='*', help="Figure file names or numbers, e.g. 01 05_pareto_analysis.png")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = generate_reports(args.processed_dir, args.out_dir, workers=args.workers, force=args.force,
+                              dpi=args.dpi, only=args.only)
+    for name, seconds in result['rendered'].items():
+        print(f"✅ Rendered {name} ({seconds:.1f}s)")
+    for name in result['skipped']:
+        print(f"⏭️ Unchanged {name}")
+    print(f"\n✨ {len(result['rendered'])} rendered, {len(result['skipped'])} skipped "
+          f"in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
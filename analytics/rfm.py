@@ -0,0 +1,170 @@
+"""
+=================================================================
+MATERIALIZED RFM / CUSTOMER-RECENCY TABLE
+=================================================================
+Churn analytics (dashboard Tab 3, notebook 02 Analysis 6, reports/
+06_churn_analysis.png) need each customer's last order date, which
+used to be a groupby over every order line on every run and could
+only be taken "as of the latest order".
+
+``RFMTable`` is built once per loaded dataset. For every customer it
+holds the sorted distinct order days in CSR form (one flat array of
+days + per-customer offsets) together with running totals of orders
+and revenue per day. Recency, frequency and monetary value for any
+window [start, end] - and so churn risk as of any date - are then a
+vectorized binary search per customer, without touching the order
+lines again.
+
+The table knows nothing about Region, Category or customer_type, so
+``RFMTable.slice`` returns None when one of them is filtered and
+callers fall back to the filtered order lines (as with the cube).
+=================================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.bins import Bins
+
+RFM_COLUMNS = ['Customer ID', 'Order Date', 'Order ID', 'Sales']
+FILTER_DIMENSIONS = ['Region', 'Category', 'customer_type']
+
+# Days since the last order: <= 90 low, <= 180 medium, above that high risk
+RECENCY_THRESHOLDS = (90, 180)
+RISK_LABELS = ['Low Risk', 'Medium Risk', 'High Risk']
+RISK_BINS = Bins([-np.inf, *RECENCY_THRESHOLDS, np.inf], RISK_LABELS)
+HISTOGRAM_BINS = 30
+
+
+def _day_numbers(dates):
+    return np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+
+
+def days_histogram(days, n=HISTOGRAM_BINS):
+    """Customers per equal-width days-since-last-order bin: From, To, Customers"""
+    high = max(float(days.max()), 1.0) if len(days) else 1.0
+    bins = Bins.uniform(0, high, n)
+    return pd.DataFrame({
+        'From': bins.edges[:-1],
+        'To': bins.edges[1:],
+        'Customers': bins.aggregate(days, keep_empty=True)['count'].to_numpy(),
+    })
+
+
+def churn_summary(activity):
+    """Median split, risk counts and histogram for a frame with one Days_Since_Last_Order per customer"""
+    days = activity['Days_Since_Last_Order']
+    median_days = days.median()
+    at_risk = int((days > median_days).sum())
+    return {
+        'activity': activity,
+        'median_days': median_days,
+        'at_risk': at_risk,
+        'at_risk_pct': at_risk / len(activity) * 100 if len(activity) else 0,
+        'risk_counts': RISK_BINS.aggregate(days, keep_empty=True)['count'].rename_axis(None),
+        'histogram': days_histogram(days.to_numpy()),
+    }
+
+
+class RFMTable:
+    """Per-customer order days (CSR) with running order counts and revenue"""
+
+    def __init__(self, df):
+        customer_codes, self.customers = pd.factorize(df['Customer ID'], sort=True)
+        order_codes = pd.factorize(df['Order ID'])[0]
+        days = _day_numbers(df['Order Date'])
+        sales = df['Sales'].to_numpy(dtype=np.float64)
+        self.values = {dim: set(df[dim].unique()) for dim in FILTER_DIMENSIONS if dim in df.columns}
+
+        # One entry per (customer, order day): lines sorted by customer, day, order
+        order = np.lexsort((order_codes, days, customer_codes))
+        customer, day, order_code = customer_codes[order], days[order], order_codes[order]
+        new_day = np.ones(len(order), dtype=bool)
+        new_day[1:] = (customer[1:] != customer[:-1]) | (day[1:] != day[:-1])
+        new_order = new_day.copy()
+        new_order[1:] |= order_code[1:] != order_code[:-1]
+        starts = np.flatnonzero(new_day)
+
+        entry_customer = customer[starts]
+        self.days = day[starts]
+        self.offsets = np.searchsorted(entry_customer, np.arange(len(self.customers) + 1))
+        # Running totals restart at each customer
+        per_day = pd.DataFrame({
+            'orders': np.add.reduceat(new_order.astype(np.int64), starts) if len(starts) else [],
+            'revenue': np.add.reduceat(sales[order], starts) if len(starts) else [],
+        })
+        running = per_day.groupby(entry_customer, sort=False).cumsum()
+        self.orders = running['orders'].to_numpy(dtype=np.int64)
+        self.revenue = running['revenue'].to_numpy(dtype=np.float64)
+
+        # customer * span + day offset is globally sorted: one searchsorted answers every customer
+        self.first_day = int(self.days.min()) if len(self.days) else 0
+        self.span = int(self.days.max()) - self.first_day + 2 if len(self.days) else 2
+        self._keys = entry_customer.astype(np.int64) * self.span + (self.days - self.first_day)
+
+    def __len__(self):
+        return len(self.customers)
+
+    def _bounds(self, start, end):
+        """Per customer, the [lo, hi) range of entries with start <= day <= end"""
+        base = np.arange(len(self.customers), dtype=np.int64) * self.span
+        lo = 0 if start is None else int(np.clip(_day_numbers(start) - self.first_day, 0, self.span - 1))
+        hi = self.span - 2 if end is None else int(np.clip(_day_numbers(end) - self.first_day, -1, self.span - 2))
+        return (np.searchsorted(self._keys, base + lo, side='left'),
+                np.searchsorted(self._keys, base + hi, side='right'))
+
+    def rfm(self, start=None, end=None, as_of=None):
+        """Recency / frequency / monetary per customer with orders in [start, end].
+
+        Recency is counted from ``as_of`` (default: the latest order in the
+        window); ``end`` defaults to ``as_of``, so ``rfm(as_of=d)`` scores
+        every customer on the orders placed up to ``d``.
+        """
+        if end is None:
+            end = as_of
+        lo, hi = self._bounds(start, end)
+        active = np.flatnonzero(hi > lo)
+        lo, hi = lo[active], hi[active]
+
+        last = self.days[hi - 1]
+        if as_of is None:
+            as_of_day = last.max() if len(last) else self.first_day
+        else:
+            as_of_day = _day_numbers(as_of)
+        # Running totals at the window's end minus those just before its start
+        before = lo > self.offsets[active]
+        frequency = self.orders[hi - 1] - np.where(before, self.orders[lo - 1], 0)
+        monetary = self.revenue[hi - 1] - np.where(before, self.revenue[lo - 1], 0.0)
+        return pd.DataFrame({
+            'Customer_ID': self.customers[active],
+            'Last_Order': last.astype('datetime64[D]').astype('datetime64[ns]'),
+            'Days_Since_Last_Order': as_of_day - last,
+            'Frequency': frequency,
+            'Monetary': monetary,
+        })
+
+    def churn(self, start=None, end=None, as_of=None):
+        """churn_summary() of rfm(start, end, as_of)"""
+        return churn_summary(self.rfm(start, end, as_of))
+
+    def slice(self, start, end, regions=None, categories=None, customer_types=None):
+        """The table restricted to [start, end], or None if a dimension filter excludes order lines"""
+        for dim, selected in [('Region', regions), ('Category', categories), ('customer_type', customer_types)]:
+            if selected is not None and not self.values.get(dim, set()) <= set(selected):
+                return None
+        return RFMSlice(self, start, end)
+
+
+class RFMSlice:
+    """An RFMTable seen through one filter state's date range"""
+
+    def __init__(self, table, start, end):
+        self.table = table
+        self.start = start
+        self.end = end
+
+    def rfm(self):
+        return self.table.rfm(self.start, self.end)
+
+    def churn(self):
+        return self.table.churn(self.start, self.end)
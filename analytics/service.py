@@ -0,0 +1,381 @@
+"""
+=================================================================
+HEADLESS KPI / AGGREGATION HTTP SERVICE
+=================================================================
+The dashboard's views as JSON over HTTP, for tools that need the same
+numbers without the Streamlit UI (or the kpis.csv written once per
+notebook run):
+
+    GET /                     dataset version, view names, parameters
+    GET /health               liveness + dataset version
+    GET /views/<name>?...     one view, e.g. /views/regional_table
+    GET /export/<name>.<fmt>  the filtered order lines ('rows') or a view's
+                              full-resolution table as CSV or Parquet,
+                              streamed in chunks (analytics.export)
+
+Filter parameters mirror the sidebar - ``start`` / ``end`` (ISO dates,
+default: the whole dataset), ``region``, ``category`` and
+``customer_type`` (repeat the parameter or comma-separate values;
+omitted = every value) - plus ``freq`` for trend_<freq> views and
+``distinct=approx`` for HyperLogLog counts.
+
+Data comes from the same hot-reloaded snapshot and view functions as
+the dashboard (analytics.reload, analytics.aggregations or the SQLite
+backend). Encoded responses are kept in an in-process ResultCache
+keyed by (data fingerprint, filter state, view); the views behind them
+also go to the dashboard's disk cache (analytics.diskcache), so a
+restarted service starts warm. Every response carries an ETag derived
+from that key, so a client polling with If-None-Match gets
+``304 Not Modified`` without any computation until the data changes.
+Requests are served concurrently on one thread each.
+
+Usage:
+    python -m analytics.service
+    python -m analytics.service --port 8765 --backend sqlite
+=================================================================
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from analytics import aggregations as agg
+from analytics.cache import ResultCache
+from analytics.chartdata import MAX_POINTS
+from analytics.diskcache import default_cache
+from analytics.export import EXPORT_FORMATS, PARQUET_AVAILABLE, encode_chunks, frame_chunks, view_table
+from analytics.filters import FilterState
+from analytics.reload import DEFAULT_INTERVAL, DatasetSnapshot, watch_processed
+from analytics.sqlbackend import DB_FILE
+from analytics.storage import month_window
+from analytics.timeseries import TREND_FREQUENCIES
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+FILTER_PARAMETERS = ['region', 'category', 'customer_type']
+# Per-customer rows are left out of responses: clients get the counts, not the customer list
+OMITTED_FIELDS = {'churn': ['activity']}
+
+
+class BadRequest(ValueError):
+    """A query parameter the service cannot use"""
+
+
+# ======================== FILTERS ========================
+def _selected(query, parameter):
+    """Values of a multi-value parameter (repeated or comma-separated); None when absent"""
+    if parameter not in query:
+        return None
+    return [v.strip() for raw in query[parameter] for v in raw.split(',') if v.strip()]
+
+
+def _date(query, parameter, default):
+    if parameter not in query:
+        return default
+    try:
+        return pd.Timestamp(query[parameter][-1]).normalize()
+    except ValueError:
+        raise BadRequest(f"{parameter}: not a date: {query[parameter][-1]!r}") from None
+
+
+def filtered_views(snapshot, query, max_points=MAX_POINTS):
+    """(filter state, distinct mode, views, rows) for a parsed query string, as the sidebar does it.
+
+    ``views()`` builds {view name: compute}; it is only called on a cache miss,
+    so a request answered from its ETag or the cache never selects any rows.
+    ``rows()`` yields the filtered order lines in chunks, for exports.
+    """
+    start = _date(query, 'start', snapshot.min_date)
+    end = _date(query, 'end', snapshot.max_date)
+    if end < start:
+        raise BadRequest("end is before start")
+    regions, categories, customer_types = (_selected(query, p) for p in FILTER_PARAMETERS)
+    trend_freq = query.get('freq', ['M'])[-1]
+    if trend_freq not in TREND_FREQUENCIES:
+        raise BadRequest(f"freq: one of {', '.join(TREND_FREQUENCIES)}")
+    approximate = query.get('distinct', ['exact'])[-1] == 'approx'
+
+    if snapshot.sql is not None:
+        state = FilterState.normalize(snapshot.sql, start, end, regions, categories, customer_types)
+        return (state, 'exact', lambda: _flatten(snapshot.sql.tab_views(state, trend_freq, max_points)),
+                lambda: snapshot.sql.iter_rows(state))
+
+    data = snapshot.window(tuple(d.date().isoformat() for d in month_window(start, end)))
+    engine = data.engine
+    if len(engine) == 0:
+        raise BadRequest("No orders in the selected date range")
+    state = FilterState.normalize(engine, start, end, regions, categories, customer_types)
+    selection = (start, end, regions, categories, customer_types)
+    sketch_slice = data.sketches.slice(*selection) if approximate else None
+
+    def select():
+        rows = engine.date_slice(start, end)
+        row_mask = engine.combine(
+            engine.mask('Region', regions, rows),
+            engine.mask('Category', categories, rows),
+            engine.mask('customer_type', customer_types, rows),
+        )
+        return engine.select(rows, row_mask)
+
+    def views():
+        df_filtered = select()
+        cube_slice = data.cube.slice(*selection)
+        return _flatten(agg.tab_views(
+            df_filtered,
+            cube_slice if cube_slice is not None else df_filtered,
+            sketch_slice,
+            data.rfm.slice(*selection),
+            data.daily.slice(state.start, state.end, regions, categories, customer_types),
+            trend_freq,
+            max_points,
+        ))
+
+    return state, 'approx' if sketch_slice is not None else 'exact', views, lambda: frame_chunks(select())
+
+
+def filter_query(state, **extra):
+    """Query string selecting ``state`` (a FilterState) in this service"""
+    params = {'start': state.start, 'end': state.end, **extra}
+    for parameter, selected in zip(FILTER_PARAMETERS, [state.regions, state.categories, state.customer_types]):
+        if selected is not None:
+            params[parameter] = ','.join(selected)
+    return urlencode(params)
+
+
+def view_key(snapshot, state, distinct_mode, name):
+    """Cache key of one view - the dashboard's, so both find each other's results on disk"""
+    return (snapshot.fingerprint, state, distinct_mode, name)
+
+
+def cached_compute(disk, key, compute):
+    """``compute()``, through the disk cache when there is one"""
+    return compute() if disk is None else disk.get_or_compute(key, compute)
+
+
+def prewarm(snapshot, disk, queries=({},)):
+    """Store every view of each query (default: the unfiltered dashboard) in ``disk``; returns the count"""
+    stored = 0
+    for query in queries:
+        state, distinct_mode, views, _ = filtered_views(snapshot, query)
+        for name, compute in views().items():
+            disk.get_or_compute(view_key(snapshot, state, distinct_mode, name), compute)
+            stored += 1
+    return stored
+
+
+def prewarm_processed(processed_dir):
+    """Fill <processed_dir>/cache with the unfiltered dashboard's window indexes and views"""
+    disk = default_cache(processed_dir)
+    snapshot = DatasetSnapshot(processed_dir, disk=disk)
+    return prewarm(snapshot, disk)
+
+
+def _flatten(tab_views):
+    return {name: compute for computes in tab_views.values() for name, compute in computes.items()}
+
+
+# ======================== JSON ========================
+def to_jsonable(value):
+    """View results (frames, series, numpy scalars, timestamps) as plain JSON types"""
+    if isinstance(value, pd.DataFrame):
+        frame = value.reset_index() if not isinstance(value.index, pd.RangeIndex) else value
+        return [{str(k): to_jsonable(v) for k, v in row.items()} for row in frame.to_dict(orient='records')]
+    if isinstance(value, pd.Series):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def encode_view(name, result):
+    """UTF-8 JSON body of one view"""
+    if name in OMITTED_FIELDS:
+        result = {k: v for k, v in result.items() if k not in OMITTED_FIELDS[name]}
+    return json.dumps(to_jsonable(result), separators=(',', ':')).encode('utf-8')
+
+
+def etag(key):
+    return '"' + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20] + '"'
+
+
+# ======================== HTTP ========================
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "EcommerceAnalytics/1.0"
+    # Needed for chunked export responses; every other response sets Content-Length
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = [p for p in url.path.split('/') if p]
+        try:
+            if not parts:
+                self._index()
+            elif parts == ['health']:
+                snapshot = self.server.reloader.current
+                self._send(200, {'status': 'ok', 'version': snapshot.version,
+                                 'reloads': self.server.reloader.reloads})
+            elif len(parts) == 2 and parts[0] == 'views':
+                self._view(parts[1], query)
+            elif len(parts) == 2 and parts[0] == 'export':
+                self._export(parts[1], query)
+            else:
+                self._send(404, {'error': f"Unknown path: {url.path}"})
+        except BadRequest as e:
+            self._send(400, {'error': str(e)})
+        except Exception as e:
+            self._send(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def _index(self):
+        snapshot = self.server.reloader.current
+        views = filtered_views(snapshot, {})[2]()
+        self._send(200, {
+            'version': snapshot.version,
+            'min_date': snapshot.min_date.date().isoformat(),
+            'max_date': snapshot.max_date.date().isoformat(),
+            'views': sorted(views) + [f'trend_{f}' for f in TREND_FREQUENCIES if f'trend_{f}' not in views],
+            'parameters': ['start', 'end', *FILTER_PARAMETERS, 'freq', 'distinct'],
+        })
+
+    def _view(self, name, query):
+        if name.startswith('trend_'):
+            query = {**query, 'freq': [name[len('trend_'):]]}
+        # One snapshot per request, even if a reload lands meanwhile
+        snapshot = self.server.reloader.current
+        state, distinct_mode, views, _ = filtered_views(snapshot, query)
+        key = view_key(snapshot, state, distinct_mode, name)
+        tag = etag(key)
+        if tag in [t.strip() for t in self.headers.get('If-None-Match', '').split(',')]:
+            self._send(304, None, tag)
+            return
+        body = self.server.cache.get(key)
+        if body is None:
+            computes = views()
+            if name not in computes:
+                self._send(404, {'error': f"Unknown view: {name}", 'views': sorted(computes)})
+                return
+            body = self.server.cache.get_or_compute(
+                key, lambda: encode_view(name, cached_compute(self.server.disk, key, computes[name]))
+            )
+        self._send(200, body, tag)
+
+    def _export(self, file_name, query):
+        name, _, fmt = file_name.rpartition('.')
+        if fmt not in EXPORT_FORMATS:
+            raise BadRequest(f"Export as {' or '.join(f'<name>.{f}' for f in EXPORT_FORMATS)}")
+        if fmt == 'parquet' and not PARQUET_AVAILABLE:
+            raise BadRequest("Parquet export needs pyarrow on the server")
+        if name.startswith('trend_'):
+            query = {**query, 'freq': [name[len('trend_'):]]}
+        # Full resolution: the rows behind the chart, not the chart's sample
+        _, _, views, rows = filtered_views(self.server.reloader.current, query, max_points=None)
+        if name == 'rows':
+            chunks = rows()
+        else:
+            computes = views()
+            if name not in computes:
+                self._send(404, {'error': f"Unknown view: {name}", 'views': ['rows', *sorted(computes)]})
+                return
+            chunks = frame_chunks(view_table(name, computes[name]()))
+
+        # Chunked transfer: one encoded chunk of rows in memory at a time, whatever the export size
+        self.send_response(200)
+        self.send_header('Content-Type', EXPORT_FORMATS[fmt])
+        self.send_header('Content-Disposition', f'attachment; filename="{file_name}"')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for piece in encode_chunks(chunks, fmt):
+                if piece:
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(piece), piece))
+            self.wfile.write(b'0\r\n\r\n')
+        except Exception as e:
+            # Status already sent: drop the connection so the client sees a truncated transfer
+            self.close_connection = True
+            self.log_error("Export of %s failed: %s", file_name, e)
+
+    def _send(self, status, payload, tag=None):
+        body = b'' if payload is None else payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        if tag is not None:
+            self.send_header('ETag', tag)
+            # Revalidate on every poll: cheap, and never stale after a reload
+            self.send_header('Cache-Control', 'no-cache')
+        if status != 304:
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class AnalyticsServer(ThreadingHTTPServer):
+    """One thread per request, sharing the data snapshot and the result cache"""
+
+    daemon_threads = True
+
+    def __init__(self, address, reloader, cache=None, disk=None, quiet=False):
+        super().__init__(address, ServiceHandler)
+        self.reloader = reloader
+        # Encoded responses in memory; the views behind them on disk (shared with the dashboard)
+        self.cache = cache if cache is not None else ResultCache()
+        self.disk = disk
+        self.quiet = quiet
+
+
+# ======================== CLI ========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard's KPIs and breakdowns as JSON")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"interface to bind (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument('--processed-dir', default=PROCESSED_DIR, help="cleaned data directory (default: data/processed)")
+    parser.add_argument('--backend', choices=['pandas', 'sqlite'], default='pandas',
+                        help="rows in memory (default) or queries against the SQLite file")
+    parser.add_argument('--db', default=None, help="SQLite file for --backend sqlite (default: data/processed/superstore.sqlite)")
+    parser.add_argument('--reload-interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f"seconds between checks for new data, 0 = never (default: {DEFAULT_INTERVAL:g})")
+    parser.add_argument('--no-disk-cache', action='store_true',
+                        help="do not read or write the persistent cache in <processed-dir>/cache")
+    parser.add_argument('--quiet', action='store_true', help="do not log every request")
+    args = parser.parse_args(argv)
+
+    sqlite_path = (args.db or os.path.join(args.processed_dir, DB_FILE)) if args.backend == 'sqlite' else None
+    disk = None if args.no_disk_cache else default_cache(args.processed_dir)
+    reloader = watch_processed(args.processed_dir, sqlite_path=sqlite_path, interval=args.reload_interval, disk=disk)
+    server = AnalyticsServer((args.host, args.port), reloader, disk=disk, quiet=args.quiet)
+    print(f"🌐 Serving {args.backend} views of data version {reloader.current.version} "
+          f"on http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    finally:
+        server.server_close()
+        reloader.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
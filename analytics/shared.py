@@ -0,0 +1,146 @@
+"""
+=================================================================
+ZERO-COPY SHARED DATASET (MEMORY-MAPPED)
+=================================================================
+Every Streamlit server process used to hold its own copy of the
+dashboard columns, once per loaded date window. Memory grew with the
+number of processes on the host, and overlapping windows loaded the
+same months again.
+
+The dashboard frame (DASHBOARD_COLUMNS, joined through the star
+schema, sorted by 'Order Date') is exported once per dataset version
+to data/processed/shared/<version>/, with one raw ``.npy`` per column
+(category codes for categoricals) and a small ``meta.json``:
+
+    shared/
+    └── 4aff9ffe6f00a5ff/
+        ├── meta.json        # rows, columns, kinds, category lists
+        ├── order_date.npy
+        ├── region.npy       # integer category codes
+        └── sales.npy
+
+``open_shared`` maps those files read-only (``np.load(mmap_mode='r')``)
+and wraps them in a DataFrame without copying. Every session in a
+process uses the same mapping, and every process on the host maps the
+same files, so they all read the same page-cache pages. Only the
+category lists live in each process.
+
+Rows are date-sorted, so a date window is a contiguous row range and
+``SharedDataset.window`` returns a slice *view*. Pages of months that
+nobody looks at are never read from disk. The mapped arrays are
+read-only: pandas' copy-on-write gives any code that modifies them its
+own copy.
+=================================================================
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from analytics.star import load_star
+from analytics.storage import DASHBOARD_COLUMNS, _column_file, _encode_column
+
+SHARED_DIR = "shared"
+META_FILE = "meta.json"
+# Versions kept on disk: the current one plus the one processes may still be switching from
+KEEP_VERSIONS = 2
+
+
+def export_shared(df, path):
+    """Write ``df`` as mappable column files at directory ``path``; no-op if it already exists.
+
+    The directory appears atomically, so several processes may race to
+    export the same version: the first one wins, the others reuse it.
+    """
+    if os.path.isfile(os.path.join(path, META_FILE)):
+        return path
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    columns = []
+    for name in df.columns:
+        kind, values, extra = _encode_column(df[name])
+        file_name = _column_file(name)
+        np.save(os.path.join(tmp_path, file_name), np.ascontiguousarray(values), allow_pickle=False)
+        columns.append({'name': name, 'file': file_name, 'kind': kind, **extra})
+    with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'rows': len(df), 'columns': columns}, f)
+
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Another process exported this version first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.isfile(os.path.join(path, META_FILE)):
+            raise
+    return path
+
+
+def open_shared(path):
+    """The frame at ``path`` over read-only memory maps of its column files"""
+    with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+        meta = json.load(f)
+    data = {}
+    for spec in meta['columns']:
+        values = np.load(os.path.join(path, spec['file']), mmap_mode='r', allow_pickle=False)
+        if spec['kind'] == 'category':
+            dtype = pd.CategoricalDtype(spec['categories'], ordered=spec['ordered'])
+            values = pd.Categorical.from_codes(values, dtype=dtype)
+        data[spec['name']] = values
+    return pd.DataFrame(data, columns=[c['name'] for c in meta['columns']], copy=False)
+
+
+def remove_stale(root, keep=KEEP_VERSIONS):
+    """Delete all but the ``keep`` most recent exports under ``root`` (skipping files still in use)"""
+    if not os.path.isdir(root):
+        return
+    entries = sorted((os.path.join(root, name) for name in os.listdir(root)), key=os.path.getmtime, reverse=True)
+    exports = [e for e in entries if os.path.isfile(os.path.join(e, META_FILE))]
+    for path in exports[keep:]:
+        # Processes that mapped these files keep their pages; Windows refuses while they are open
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class SharedDataset:
+    """A frame written by ``export_shared``, memory-mapped, with date windows as views"""
+
+    def __init__(self, path):
+        self.path = path
+        self.df = open_shared(path)
+        self.dates = self.df['Order Date'].to_numpy(dtype='datetime64[ns]')
+
+    def __len__(self):
+        return len(self.df)
+
+    def window(self, start=None, end=None):
+        """Rows with start <= Order Date <= end (inclusive days), as a view of the mapped columns"""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).normalize()))
+        hi = len(self.dates) if end is None else np.searchsorted(
+            self.dates, np.datetime64(pd.Timestamp(end).normalize() + pd.Timedelta(days=1)))
+        return self.df.iloc[int(lo):int(hi)].reset_index(drop=True)
+
+    def memory_usage(self):
+        """Bytes mapped from the shared files vs. held by this process alone (category lists)"""
+        mapped = sum(os.path.getsize(os.path.join(self.path, name))
+                     for name in os.listdir(self.path) if name.endswith('.npy'))
+        private = sum(self.df[c].cat.categories.memory_usage(deep=True) for c in self.df.columns
+                      if isinstance(self.df[c].dtype, pd.CategoricalDtype))
+        return {'mapped': int(mapped), 'private': int(private)}
+
+
+def shared_dataset(processed_dir, version, columns=DASHBOARD_COLUMNS):
+    """SharedDataset of the dashboard frame of ``version``, exported first if no process has yet"""
+    root = os.path.join(processed_dir, SHARED_DIR)
+    path = os.path.join(root, version)
+    if not os.path.isfile(os.path.join(path, META_FILE)):
+        df = load_star(processed_dir, columns=columns).frame(columns)
+        order = np.argsort(df['Order Date'].to_numpy(), kind='stable')
+        export_shared(df.iloc[order].reset_index(drop=True), path)
+        del df
+        remove_stale(root)
+    return SharedDataset(path)
@@ -0,0 +1,140 @@
+"""
+=================================================================
+MERGEABLE DISTINCT-COUNT SKETCHES (HYPERLOGLOG)
+=================================================================
+Exact distinct counts (unique customers, orders) cannot be rolled up
+from partial results, so they cost a full pass over the filtered
+order lines on every filter change. Here one HyperLogLog sketch of
+'Customer ID' and one of 'Order ID' is kept per
+(order month x Region x Category x customer_type) partition. The
+count for any whole-month filter state is the estimate of the
+union of the matching sketches: an element-wise max over registers.
+
+Error bound: with p = 12 (4096 one-byte registers per sketch) the
+relative standard error is 1.04 / sqrt(4096) ~= 1.6%, i.e. about
+95% of estimates lie within +/-3.3% of the exact count. Small counts
+(below ~10k) use linear counting and are usually much closer.
+
+Like the cube, sketches only answer month-aligned date ranges;
+``DistinctSketches.slice`` returns None otherwise and callers fall
+back to exact counts.
+=================================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.cube import covers_whole_months, order_month
+
+DEFAULT_PRECISION = 12
+SKETCH_DIMENSIONS = ['order_month', 'Region', 'Category', 'customer_type']
+SKETCH_COLUMNS = ['Customer ID', 'Order ID']
+
+
+def relative_error(precision=DEFAULT_PRECISION):
+    """HyperLogLog relative standard error for 2**precision registers"""
+    return 1.04 / np.sqrt(2 ** precision)
+
+
+def hash_values(values):
+    """Stable 64-bit hashes; categoricals hash their categories once and gather by code"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        hashed = pd.util.hash_array(np.asarray(values.cat.categories, dtype=object))
+        return hashed[values.cat.codes.to_numpy()]
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def register_updates(hashes, precision=DEFAULT_PRECISION):
+    """(register index, rank) for each hash: top ``precision`` bits pick the register,
+    the rank is the position of the first 1-bit in the remaining bits"""
+    width = 64 - precision
+    index = (hashes >> np.uint64(width)).astype(np.intp)
+    rest = hashes & np.uint64((1 << width) - 1)
+    # rest < 2**52 is exact in float64, so frexp's exponent is its bit length
+    bit_length = np.frexp(rest.astype(np.float64))[1]
+    rank = (width - bit_length + 1).astype(np.uint8)
+    return index, rank
+
+
+def estimate(registers):
+    """Cardinality estimate(s) from registers of shape (m,) or (n, m)"""
+    registers = np.asarray(registers)
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.ldexp(1.0, -registers.astype(np.int32)).sum(axis=-1)
+    zeros = (registers == 0).sum(axis=-1)
+    # Linear counting is more accurate while many registers are still empty
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class DistinctSketches:
+    """HyperLogLog registers per (month, Region, Category, customer_type) partition"""
+
+    def __init__(self, df, columns=SKETCH_COLUMNS, precision=DEFAULT_PRECISION):
+        self.precision = precision
+        self.min_date = df['Order Date'].min()
+        self.max_date = df['Order Date'].max()
+
+        groups = df.groupby([order_month(df['Order Date'])] + SKETCH_DIMENSIONS[1:], observed=True, sort=True)
+        partition = groups.ngroup().to_numpy()
+        self.partitions = groups.size().index.to_frame(index=False)
+        self.values = {dim: set(self.partitions[dim].unique()) for dim in SKETCH_DIMENSIONS[1:]}
+
+        self.registers = {}
+        for column in columns:
+            index, rank = register_updates(hash_values(df[column]), precision)
+            registers = np.zeros((len(self.partitions), 2 ** precision), dtype=np.uint8)
+            np.maximum.at(registers, (partition, index), rank)
+            self.registers[column] = registers
+
+    def __len__(self):
+        return len(self.partitions)
+
+    @property
+    def relative_error(self):
+        return relative_error(self.precision)
+
+    def covers(self, start, end):
+        return covers_whole_months(self.min_date, self.max_date, start, end)
+
+    def slice(self, start, end, regions=None, categories=None, customer_types=None):
+        """Sketches of the partitions matching the filter state, or None if not month-aligned"""
+        if not self.covers(start, end):
+            return None
+        months = self.partitions['order_month']
+        mask = (months >= pd.Period(start, 'M')) & (months <= pd.Period(end, 'M'))
+        for dim, selected in [('Region', regions), ('Category', categories), ('customer_type', customer_types)]:
+            if selected is not None and not self.values[dim] <= set(selected):
+                mask &= self.partitions[dim].isin(selected)
+        return SketchSlice(self, mask.to_numpy())
+
+
+class SketchSlice:
+    """Distinct counts over a set of partitions, by merging their sketches"""
+
+    def __init__(self, sketches, mask):
+        self.sketches = sketches
+        self.mask = mask
+
+    @property
+    def relative_error(self):
+        return self.sketches.relative_error
+
+    def distinct(self, column, **where):
+        """Estimated distinct ``column`` values, optionally restricted, e.g. customer_type=['Returning']"""
+        mask = self.mask
+        for dim, values in where.items():
+            mask = mask & self.sketches.partitions[dim].isin(values).to_numpy()
+        if not mask.any():
+            return 0.0
+        return float(estimate(self.sketches.registers[column][mask].max(axis=0)))
+
+    def distinct_by(self, column, dim):
+        """Estimated distinct ``column`` values per value of partition dimension ``dim``"""
+        keys = self.sketches.partitions[dim][self.mask]
+        registers = self.sketches.registers[column][self.mask]
+        counts = {value: float(estimate(registers[(keys == value).to_numpy()].max(axis=0)))
+                  for value in keys.unique()}
+        return pd.Series(counts, name=column).sort_index()
@@ -0,0 +1,414 @@
+"""
+=================================================================
+EMBEDDED SQLITE QUERY BACKEND
+=================================================================
+Optional alternative to holding the dataset in every Streamlit
+process: the dashboard columns of the cleaned data are loaded once
+into a local SQLite file (standard library only) with indexes on
+order date, Region, Category, customer_type and Customer ID. Each
+tab's numbers are a parameterized GROUP BY query that returns only
+the small result set, in the same shape as analytics.aggregations.
+
+Read-only connections come from a pool shared by all sessions, so
+many users query one file on disk instead of each process keeping
+its own copy of the order lines.
+
+Usage:
+    python -m analytics.sqlbackend                 # build data/processed/superstore.sqlite
+    python -m analytics.sqlbackend --db /srv/superstore.sqlite
+    DASHBOARD_BACKEND=sqlite streamlit run dashboard/app.py
+=================================================================
+"""
+
+import argparse
+import hashlib
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from analytics.aggregations import discount_table
+from analytics.bins import DISCOUNT_BINS
+from analytics.chartdata import MAX_POINTS, PARETO_THRESHOLD, pareto_frame, trend_chart
+from analytics.kpis import kpis_from_totals
+from analytics.rfm import churn_summary
+from analytics.timeseries import LINES, bucket_series, running_totals
+from analytics.storage import DASHBOARD_COLUMNS, load_cleaned
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
+DB_FILE = "superstore.sqlite"
+
+TABLE = 'orders'
+DEFAULT_POOL_SIZE = 4
+INSERT_BATCH = 50_000
+
+# Dataset column -> SQL column (dates are ISO 'YYYY-MM-DD' text, which sorts correctly)
+SQL_COLUMNS = {
+    'Order ID': 'order_id',
+    'Order Date': 'order_date',
+    'Customer ID': 'customer_id',
+    'Segment': 'segment',
+    'Region': 'region',
+    'Category': 'category',
+    'Product Name': 'product_name',
+    'Sales': 'sales',
+    'Quantity': 'quantity',
+    'Discount': 'discount',
+    'Profit': 'profit',
+    'customer_type': 'customer_type',
+}
+SQL_TYPES = {'sales': 'REAL', 'quantity': 'INTEGER', 'discount': 'REAL', 'profit': 'REAL'}
+INDEXED_COLUMNS = ['order_date', 'region', 'category', 'customer_type', 'customer_id']
+# Sidebar dimension -> FilterState field
+FILTER_FIELDS = {'Region': 'regions', 'Category': 'categories', 'customer_type': 'customer_types'}
+
+
+# ======================== BUILD ========================
+def _sql_values(series):
+    """A column as a list of Python values ready for sqlite3 (NaN -> NULL)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        text = np.datetime_as_string(series.to_numpy(dtype='datetime64[D]'), unit='D').astype(object)
+        text[series.isna().to_numpy()] = None
+        return text.tolist()
+    if pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(object).where(series.notna(), None).tolist()
+    return series.astype(object).where(series.notna(), None).map(lambda v: v if v is None else str(v)).tolist()
+
+
+def build_database(processed_dir=PROCESSED_DIR, db_path=None):
+    """Load the cleaned dataset into a new SQLite file at ``db_path`` (replacing any existing one)"""
+    db_path = db_path or os.path.join(processed_dir, DB_FILE)
+    df = load_cleaned(processed_dir, columns=DASHBOARD_COLUMNS)
+    columns = [c for c in SQL_COLUMNS if c in df.columns]
+    names = [SQL_COLUMNS[c] for c in columns] + ['order_month']
+
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    con = sqlite3.connect(tmp_path)
+    try:
+        definitions = ', '.join(f"{name} {SQL_TYPES.get(name, 'TEXT')}" for name in names)
+        con.execute(f"CREATE TABLE {TABLE} ({definitions})")
+        insert = f"INSERT INTO {TABLE} VALUES ({', '.join('?' * len(names))})"
+        for start in range(0, len(df), INSERT_BATCH):
+            block = df.iloc[start:start + INSERT_BATCH]
+            values = [_sql_values(block[c]) for c in columns]
+            values.append([d[:7] if d else None for d in values[columns.index('Order Date')]])
+            con.executemany(insert, zip(*values))
+        # Indexes after the bulk insert: one sort per index instead of per-row updates
+        for name in INDEXED_COLUMNS:
+            if name in names:
+                con.execute(f"CREATE INDEX idx_{TABLE}_{name} ON {TABLE} ({name})")
+        con.execute("ANALYZE")
+        con.commit()
+    finally:
+        con.close()
+
+    # Readers never see a half-built database
+    os.replace(tmp_path, db_path)
+    return db_path
+
+
+def has_database(db_path):
+    return os.path.isfile(db_path)
+
+
+# ======================== CONNECTION POOL ========================
+class ConnectionPool:
+    """Up to ``size`` read-only connections, opened on demand and shared between threads"""
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE, timeout=30.0):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        con.execute("PRAGMA query_only = ON")
+        return con
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No SQLite connection free after {self.timeout}s (pool size {self.size})") from None
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; blocks while all ``size`` are in use"""
+        con = self._acquire()
+        try:
+            yield con
+        finally:
+            self._idle.put(con)
+
+    def close(self):
+        """Close the idle connections (borrowed ones are closed when the pool is garbage-collected)"""
+        while True:
+            try:
+                con = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            con.close()
+            with self._lock:
+                self._opened -= 1
+
+
+# ======================== QUERIES ========================
+class SQLBackend:
+    """The dashboard's views as parameterized GROUP BY queries over the SQLite file.
+
+    Filter states are analytics.filters.FilterState values; every method
+    returns the same shape as its analytics.aggregations counterpart.
+    """
+
+    def __init__(self, db_path, pool_size=DEFAULT_POOL_SIZE):
+        if not has_database(db_path):
+            raise FileNotFoundError(f"{db_path} not found - build it with: python -m analytics.sqlbackend")
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, pool_size)
+        stat = os.stat(db_path)
+        token = f"{os.path.abspath(db_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        self.version = hashlib.sha1(token.encode('utf-8')).hexdigest()[:16]
+
+        sql_names = {row[1] for row in self._query(f"PRAGMA table_info({TABLE})")}
+        self.columns = [c for c, name in SQL_COLUMNS.items() if name in sql_names]
+        first, last = self._query(f"SELECT MIN(order_date), MAX(order_date) FROM {TABLE}")[0]
+        self.min_date = pd.Timestamp(first)
+        self.max_date = pd.Timestamp(last)
+        self._values = {}
+        for dim in FILTER_FIELDS:
+            if dim in self.columns:
+                column = SQL_COLUMNS[dim]
+                rows = self._query(f"SELECT DISTINCT {column} FROM {TABLE} WHERE {column} IS NOT NULL")
+                self._values[dim] = {r[0] for r in rows}
+
+    def _query(self, sql, params=()):
+        with self.pool.connection() as con:
+            return con.execute(sql, params).fetchall()
+
+    def _frame(self, sql, params, columns):
+        return pd.DataFrame(self._query(sql, params), columns=columns)
+
+    def _where(self, state):
+        """WHERE clause and parameters for a FilterState (None fields are not filtered)"""
+        clauses, params = ['1'], []
+        # A range spanning the whole dataset is a full scan, cheaper without the date index
+        if state.start > self.min_date.date().isoformat() or state.end < self.max_date.date().isoformat():
+            clauses.append('order_date BETWEEN ? AND ?')
+            params += [state.start, state.end]
+        for dim, field in FILTER_FIELDS.items():
+            selected = getattr(state, field)
+            if selected is not None:
+                clauses.append(f"{SQL_COLUMNS[dim]} IN ({', '.join('?' * len(selected))})")
+                params.extend(selected)
+        return ' AND '.join(clauses), params
+
+    # ---------- sidebar ----------
+    def values(self, dim):
+        """Every value of filter dimension ``dim`` in the dataset"""
+        return self._values.get(dim, set())
+
+    def options(self, dim, state):
+        """Values of ``dim`` present under ``state`` (its own selection for ``dim`` ignored), sorted"""
+        where, params = self._where(state._replace(**{FILTER_FIELDS[dim]: None}))
+        column = SQL_COLUMNS[dim]
+        rows = self._query(f"SELECT DISTINCT {column} FROM {TABLE} WHERE {where} AND {column} IS NOT NULL "
+                           f"ORDER BY {column}", params)
+        return [r[0] for r in rows]
+
+    def count(self, state):
+        where, params = self._where(state)
+        return self._query(f"SELECT COUNT(*) FROM {TABLE} WHERE {where}", params)[0][0]
+
+    def iter_rows(self, state, chunk_rows=INSERT_BATCH):
+        """The filtered order lines as DataFrames of at most ``chunk_rows`` rows, in date order"""
+        where, params = self._where(state)
+        names = [SQL_COLUMNS[c] for c in self.columns]
+        with self.pool.connection() as con:
+            cursor = con.execute(f"SELECT {', '.join(names)} FROM {TABLE} WHERE {where} ORDER BY order_date", params)
+            while True:
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+                chunk = pd.DataFrame(rows, columns=self.columns)
+                chunk['Order Date'] = pd.to_datetime(chunk['Order Date'])
+                yield chunk
+
+    # ---------- TAB 1: OVERVIEW ----------
+    def overview_metrics(self, state):
+        where, params = self._where(state)
+        has_type = 'customer_type' in self.columns
+        returning = ("COUNT(DISTINCT CASE WHEN customer_type = 'Returning' THEN customer_id END)"
+                     if has_type else "0")
+        row = self._query(
+            f"SELECT COALESCE(SUM(sales), 0), COALESCE(SUM(profit), 0), COUNT(*), COUNT(DISTINCT order_id), "
+            f"COUNT(DISTINCT customer_id), {returning}, COALESCE(SUM(discount > 0), 0) "
+            f"FROM {TABLE} WHERE {where}", params)[0]
+        revenue, profit, lines, orders, customers, returning, discounted = row
+        metrics = kpis_from_totals(revenue, profit, lines, orders, customers, returning, discounted).to_dict()
+        metrics['approximate'] = False
+        return metrics
+
+    def revenue_by(self, state, dim):
+        where, params = self._where(state)
+        column = SQL_COLUMNS[dim]
+        rows = self._query(f"SELECT {column}, SUM(sales) AS revenue FROM {TABLE} WHERE {where} "
+                           f"GROUP BY {column} ORDER BY revenue DESC", params)
+        return pd.Series([r[1] for r in rows], index=pd.Index([r[0] for r in rows], name=dim), name='Sales')
+
+    # ---------- TAB 2: SALES TRENDS ----------
+    def sales_trend(self, state, freq='M'):
+        """Daily sums from SQL, bucketed to ``freq`` periods with analytics.timeseries"""
+        where, params = self._where(state)
+        daily = self._frame(f"SELECT order_date, SUM(sales), SUM(profit), COUNT(*) FROM {TABLE} WHERE {where} "
+                            f"GROUP BY order_date", params, ['order_date', 'Sales', 'Profit', LINES])
+        start_day, end_day = (int(np.datetime64(d, 'D').astype(np.int64)) for d in (state.start, state.end))
+        days = np.asarray(daily['order_date'].to_numpy(dtype=str), dtype='datetime64[D]').astype(np.int64) - start_day
+        cumulative = {}
+        for measure in ['Sales', 'Profit', LINES]:
+            dense = np.zeros(end_day - start_day + 1, dtype=np.float64 if measure != LINES else np.int64)
+            dense[days] = daily[measure].to_numpy()
+            cumulative[measure] = running_totals(dense)
+        return bucket_series(cumulative, start_day, start_day, end_day, freq)
+
+    def top_products(self, state, n=10):
+        where, params = self._where(state)
+        top = self._frame(f"SELECT product_name, SUM(sales) AS revenue, SUM(profit), COUNT(*) FROM {TABLE} "
+                          f"WHERE {where} GROUP BY product_name ORDER BY revenue DESC LIMIT ?", params + [n],
+                          ['Product Name', 'Revenue', 'Profit', 'Orders']).set_index('Product Name')
+        top['Profit Margin %'] = (top['Profit'] / top['Revenue'] * 100).round(2)
+        return top
+
+    # ---------- TAB 3: CUSTOMER INSIGHTS ----------
+    def customer_type_revenue(self, state):
+        where, params = self._where(state)
+        return self._frame(f"SELECT customer_type, SUM(sales), SUM(profit) FROM {TABLE} WHERE {where} "
+                           f"GROUP BY customer_type ORDER BY customer_type", params, ['Type', 'Revenue', 'Profit'])
+
+    def pareto_curve(self, state, points=MAX_POINTS):
+        """Cumulative revenue % by customer rank, sampled in SQL at the ranks of chartdata.pareto_points (None: all)"""
+        where, params = self._where(state)
+        sample, sample_params = "", []
+        if points:
+            sample = ("WHERE (rank - 1) % ((n + ? - 1) / ?) = 0 OR rank = n "
+                      "OR rank = (SELECT MIN(rank) FROM ranked WHERE pct >= ?) ")
+            sample_params = [points, points, PARETO_THRESHOLD]
+        rows = self._query(
+            f"WITH ranked AS (SELECT ROW_NUMBER() OVER w AS rank, "
+            f"SUM(value) OVER w * 100.0 / SUM(value) OVER () AS pct, COUNT(*) OVER () AS n "
+            f"FROM (SELECT SUM(sales) AS value FROM {TABLE} WHERE {where} GROUP BY customer_id) "
+            f"WINDOW w AS (ORDER BY value DESC ROWS UNBOUNDED PRECEDING)) "
+            f"SELECT rank, pct, n FROM ranked {sample}ORDER BY rank",
+            params + sample_params)
+        count = rows[0][2] if rows else 0
+        return pareto_frame([r[0] for r in rows], [r[1] for r in rows], count)
+
+    def churn_activity(self, state):
+        """Days since each customer's last order (as of the latest order in the filter)"""
+        where, params = self._where(state)
+        activity = self._frame(
+            f"WITH filtered AS (SELECT customer_id, order_date FROM {TABLE} WHERE {where}) "
+            f"SELECT customer_id, MAX(order_date), "
+            f"CAST(julianday((SELECT MAX(order_date) FROM filtered)) - julianday(MAX(order_date)) AS INTEGER) "
+            f"FROM filtered GROUP BY customer_id", params,
+            ['Customer_ID', 'Last_Order', 'Days_Since_Last_Order'])
+        activity['Last_Order'] = pd.to_datetime(activity['Last_Order'])
+        return churn_summary(activity)
+
+    # ---------- TAB 4: REGIONAL ANALYSIS ----------
+    def regional_table(self, state):
+        where, params = self._where(state)
+        region_data = self._frame(
+            f"SELECT region, SUM(sales), SUM(profit), COUNT(*), COUNT(DISTINCT customer_id) FROM {TABLE} "
+            f"WHERE {where} GROUP BY region ORDER BY region", params,
+            ['Region', 'Revenue', 'Profit', 'Orders', 'Customers'])
+        region_data['Profit_Margin_%'] = (region_data['Profit'] / region_data['Revenue'] * 100).round(2)
+        region_data['Avg_Order_Value'] = (region_data['Revenue'] / region_data['Orders']).round(2)
+        return region_data
+
+    # ---------- TAB 5: DISCOUNT IMPACT ----------
+    def discount_segments(self, state):
+        where, params = self._where(state)
+        # A dozen distinct discount rates: sums per rate in SQL, binned by the shared engine
+        rates = self._frame(f"SELECT discount, COUNT(*), SUM(sales), SUM(profit) FROM {TABLE} WHERE {where} "
+                            f"GROUP BY discount", params, ['Discount', 'lines', 'Sales', 'Profit'])
+        return discount_table(DISCOUNT_BINS.aggregate(
+            rates['Discount'], {'Sales': rates['Sales'], 'Profit': rates['Profit']}, counts=rates['lines']
+        ))
+
+    # ---------- VIEW REGISTRY ----------
+    def tab_views(self, state, trend_freq='M', max_points=MAX_POINTS):
+        """Same contract as analytics.aggregations.tab_views, answered by SQL"""
+        columns = set(self.columns)
+        views = {
+            'overview': [
+                ('overview', None, lambda: self.overview_metrics(state)),
+                ('revenue_by_category', 'Category', lambda: self.revenue_by(state, 'Category')),
+                ('revenue_by_region', 'Region', lambda: self.revenue_by(state, 'Region')),
+            ],
+            'trends': [
+                (f'trend_{trend_freq}', None, lambda: trend_chart(self.sales_trend(state, trend_freq), max_points)),
+                ('top_products', 'Product Name', lambda: self.top_products(state, n=10)),
+            ],
+            'customers': [
+                ('customer_type_revenue', 'customer_type', lambda: self.customer_type_revenue(state)),
+                ('pareto_curve', None, lambda: self.pareto_curve(state, max_points)),
+                ('churn', 'Order Date', lambda: self.churn_activity(state)),
+            ],
+            'regional': [
+                ('regional_table', 'Region', lambda: self.regional_table(state)),
+            ],
+            'discount': [
+                ('discount_segments', 'Discount', lambda: self.discount_segments(state)),
+            ],
+        }
+        return {
+            tab: {name: compute for name, needs, compute in entries if needs is None or needs in columns}
+            for tab, entries in views.items()
+        }
+
+
+# ======================== CLI ========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the SQLite query backend for the dashboard")
+    parser.add_argument('--processed-dir', default=PROCESSED_DIR, help="cleaned data directory (default: data/processed)")
+    parser.add_argument('--db', default=None, help="SQLite file to write (default: data/processed/superstore.sqlite)")
+    args = parser.parse_args(argv)
+
+    path = build_database(args.processed_dir, args.db)
+    backend = SQLBackend(path, pool_size=1)
+    print(f"✅ Built: {os.path.relpath(path)} ({os.path.getsize(path) / 1e6:.1f} MB, "
+          f"{backend.min_date.date()} to {backend.max_date.date()})")
+    print(f"🗂️ Indexes: {', '.join(INDEXED_COLUMNS)}")
+    backend.pool.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
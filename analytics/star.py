@@ -0,0 +1,171 @@
+"""
+=================================================================
+STAR SCHEMA: NARROW FACT TABLE + CUSTOMER / PRODUCT DIMENSIONS
+=================================================================
+The cleaned dataset repeats every customer attribute (name, segment,
+first order date, order_frequency, total_customer_sales, ...) and
+every product attribute (name, category, sub-category) on each order
+line. In memory they are split out:
+
+    facts      one row per order line: Order ID, dates, Region,
+               customer_type, measures, plus integer customer_key /
+               product_key (smallest int type that fits)
+    customers  one row per Customer ID, indexed by customer_key
+    products   one row per (Product ID, Product Name), by product_key
+
+Strings become categoricals, integers are downcast to the smallest
+type that holds them and facts are kept in 'Order Date' order.
+Money columns (Sales, Profit) and Discount stay float64: totals
+are shown to the cent and Discount is compared to exact band edges.
+
+``StarSchema.frame(columns)`` joins dimension attributes onto the
+facts only when asked for; a joined categorical shares its category
+list with the dimension, so it costs one small code per line.
+
+When incremental ingest has left older lines with stale customer
+aggregates, the dimension keeps the most recently ingested values.
+=================================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.storage import load_cleaned
+
+CUSTOMER_KEY = 'customer_key'
+PRODUCT_KEY = 'product_key'
+
+# Dimension: (fact key, natural key, extra key columns if loaded, attribute columns).
+# A dimension is built only when its natural key is among the loaded columns.
+DIMENSIONS = {
+    'customers': (CUSTOMER_KEY, 'Customer ID', [], [
+        'Customer Name', 'Segment', 'First Order Date', 'customer_first_order', 'order_frequency',
+        'total_customer_sales', 'avg_order_value', 'total_customer_profit',
+    ]),
+    # Product IDs and names are not 1:1 in Superstore, so a product is the pair
+    'products': (PRODUCT_KEY, 'Product Name', ['Product ID'], ['Category', 'Sub-Category']),
+}
+
+
+def _key_dtype(n):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _compact(series):
+    """Categorical for strings, smallest integer type for integers, everything else as is"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.remove_unused_categories()
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series.dtype):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return series.astype('category')
+
+
+def _dimension(df, keys, attributes):
+    """(fact key codes, dimension table) for the distinct values of ``keys``"""
+    groups = df.groupby(keys, sort=True, observed=True, dropna=False)
+    codes = groups.ngroup().to_numpy()
+    dim = df[keys + attributes].iloc[_last_positions(codes, groups.ngroups)].reset_index(drop=True)
+    dim = dim.apply(_compact)
+    dim.index.name = None
+    return codes.astype(_key_dtype(len(dim))), dim
+
+
+def _last_positions(codes, n):
+    """Row position of the last occurrence of each code (the most recently ingested line)"""
+    last = np.empty(n, dtype=np.int64)
+    last[codes] = np.arange(len(codes))
+    return last
+
+
+class StarSchema:
+    """Order-line facts with customer and product attributes moved to dimension tables"""
+
+    def __init__(self, facts, customers=None, products=None):
+        self.facts = facts
+        self.customers = customers
+        self.products = products
+        self._dimensions = [(dim, key) for dim, key in [(customers, CUSTOMER_KEY), (products, PRODUCT_KEY)]
+                            if dim is not None]
+
+    @classmethod
+    def from_frame(cls, df):
+        """Split a cleaned order-line frame (any subset of its columns) into facts + dimensions"""
+        if 'Order Date' in df.columns and not df['Order Date'].is_monotonic_increasing:
+            df = df.iloc[np.argsort(df['Order Date'].to_numpy(), kind='stable')]
+        df = df.reset_index(drop=True)
+
+        facts = {}
+        moved = set()
+        dims = {}
+        for name, (key, natural_key, extra_keys, attributes) in DIMENSIONS.items():
+            if natural_key not in df.columns:
+                continue
+            keys = [c for c in extra_keys if c in df.columns] + [natural_key]
+            present_attributes = [c for c in attributes if c in df.columns]
+            facts[key], dims[name] = _dimension(df, keys, present_attributes)
+            moved.update(keys + present_attributes)
+
+        for column in df.columns:
+            if column not in moved:
+                facts[column] = _compact(df[column])
+        facts = pd.DataFrame(facts)
+        # Dimension keys last, so the fact columns keep the dataset's order
+        facts = facts[[c for c in facts.columns if c not in (CUSTOMER_KEY, PRODUCT_KEY)]
+                      + [c for c in (CUSTOMER_KEY, PRODUCT_KEY) if c in facts.columns]]
+        return cls(facts, dims.get('customers'), dims.get('products'))
+
+    def __len__(self):
+        return len(self.facts)
+
+    @property
+    def columns(self):
+        """Every dataset column available through ``frame()``"""
+        fact_columns = [c for c in self.facts.columns if c not in (CUSTOMER_KEY, PRODUCT_KEY)]
+        return fact_columns + [c for dim, _ in self._dimensions for c in dim.columns]
+
+    def _joined(self, column):
+        for dim, key in self._dimensions:
+            if column in dim.columns:
+                values = dim[column]
+                keys = self.facts[key].to_numpy()
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    # Same dtype object: the category list is shared, not copied
+                    return pd.Categorical.from_codes(values.cat.codes.to_numpy()[keys], dtype=values.dtype)
+                return values.to_numpy()[keys]
+        raise KeyError(column)
+
+    def frame(self, columns=None):
+        """Order-line frame of ``columns`` (default: all), joining dimension attributes as needed"""
+        columns = self.columns if columns is None else list(columns)
+        missing = [c for c in columns if c not in self.facts.columns and c not in self.columns]
+        if missing:
+            raise KeyError(f"Columns not in the star schema: {missing}")
+        data = {c: self.facts[c] if c in self.facts.columns else self._joined(c) for c in columns}
+        return pd.DataFrame(data, columns=columns)
+
+    def memory_usage(self):
+        """Deep memory in bytes per table"""
+        usage = {'facts': int(self.facts.memory_usage(deep=True).sum())}
+        for name, table in [('customers', self.customers), ('products', self.products)]:
+            if table is not None:
+                usage[name] = int(table.memory_usage(deep=True).sum())
+        usage['total'] = sum(usage.values())
+        return usage
+
+
+def load_star(processed_dir, columns=None, start=None, end=None):
+    """Load the cleaned dataset (``columns``, optionally only the months in [start, end]) as a StarSchema"""
+    if columns is not None:
+        columns = list(columns)
+        for _, natural_key, _, attributes in DIMENSIONS.values():
+            # A dimension attribute needs the dimension's key to be joined back
+            if natural_key not in columns and any(c in columns for c in attributes):
+                columns.append(natural_key)
+    return StarSchema.from_frame(load_cleaned(processed_dir, columns=columns, start=start, end=end))
@@ -0,0 +1,623 @@
+"""
+=================================================================
+COLUMNAR STORAGE FOR THE CLEANED DATASET
+=================================================================
+The cleaned dataset is stored as a directory of typed NumPy column
+files (one ``.npy`` per column) split into immutable row parts, plus
+a small ``schema.json``. The pipeline partitions the rows by
+``order_year`` / ``order_month``:
+
+    superstore_cleaned_columns/
+    ├── schema.json          # columns, kinds, categories + part manifest
+    ├── order_year=2014/
+    │   ├── order_month=1/
+    │   │   └── part-00000/
+    │   │       ├── order_date.npy   # datetime64 values
+    │   │       ├── region.npy       # integer category codes
+    │   │       └── sales.npy        # numeric values
+    │   └── order_month=2/ ...
+    └── order_year=2017/
+        └── order_month=12/
+            ├── part-00047/
+            └── part-00048/  # rows added later by append_columnar()
+
+Dates, categoricals and numerics are stored already typed, so
+loading skips CSV parsing and ``pd.to_datetime`` entirely, and only
+the requested columns are touched on disk. Category lists only ever
+grow at the end, so codes written into older parts stay valid.
+
+The ``parts`` list in schema.json doubles as the partition manifest:
+row count, partition key and min/max 'Order Date' of every part.
+Reads given a date range open only the parts that overlap it, so a
+"last quarter" load costs the same however many years are on disk.
+
+schema.json also records a SHA-1 ``digest`` of all column data,
+computed while writing and chained on every append: a re-run that
+changes only values changes schema.json, so watching that one file
+is enough to notice new data.
+=================================================================
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = "schema.json"
+SCHEMA_VERSION = 3
+# Bytes reserved for the header of column files streamed into partitions
+NPY_HEADER_BYTES = 128
+
+CLEANED_CSV = "superstore_cleaned.csv"
+COLUMNAR_DIR = "superstore_cleaned_columns"
+
+# Columns read by dashboard/app.py - everything else stays on disk
+DASHBOARD_COLUMNS = [
+    'Order ID',
+    'Order Date',
+    'Customer ID',
+    'Segment',
+    'Region',
+    'Category',
+    'Product Name',
+    'Sales',
+    'Quantity',
+    'Discount',
+    'Profit',
+    'customer_type',
+]
+
+DATE_COLUMNS = ['Order Date', 'Ship Date', 'First Order Date', 'customer_first_order']
+
+# Partition key of the cleaned dataset (derived by the pipeline) and the date the manifest tracks
+PARTITION_COLUMNS = ['order_year', 'order_month']
+PARTITION_DATE_COLUMN = 'Order Date'
+
+
+def _column_file(name):
+    """Turn a column name like 'Order Date' into 'order_date.npy'"""
+    slug = re.sub(r'[^0-9a-zA-Z]+', '_', name).strip('_').lower()
+    return f"{slug}.npy"
+
+
+def _codes_dtype(n_categories):
+    """Smallest signed integer type able to hold the category codes (and -1 for missing)"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode_column(series):
+    """Return (kind, values, extra schema fields) for one column"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime', series.to_numpy(dtype='datetime64[ns]'), {}
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        cat = series.cat
+    elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        if pd.api.types.is_extension_array_dtype(series.dtype):
+            # Nullable ints (e.g. isocalendar().week) -> plain NumPy when no NA present
+            if series.isna().any():
+                return 'numeric', series.to_numpy(dtype='float64', na_value=np.nan), {}
+            return 'numeric', series.to_numpy(dtype=series.dtype.numpy_dtype), {}
+        return 'numeric', series.to_numpy(), {}
+    else:
+        cat = series.astype('category').cat
+
+    categories = [str(c) for c in cat.categories]
+    codes = cat.codes.to_numpy().astype(_codes_dtype(len(categories)))
+    return 'category', codes, {'categories': categories, 'ordered': bool(cat.ordered)}
+
+
+def _encode_codes(name, series, categories):
+    """Category codes of ``series`` against a fixed category list"""
+    codes = pd.Categorical(series, categories=categories).codes
+    if ((codes < 0) & series.notna().to_numpy()).any():
+        raise ValueError(f"{name}: value outside the declared categories")
+    return codes
+
+
+def _encode_growing(series, lookup):
+    """Category codes of ``series`` against ``lookup`` (value -> code), adding unseen values at the end.
+
+    Work is proportional to the block, not to the list, which keeps encoding
+    high-cardinality columns (IDs) linear in the rows streamed.
+    """
+    local, uniques = pd.factorize(series)
+    codes = np.array([lookup.setdefault(str(value), len(lookup)) for value in uniques], dtype='int64')
+    return np.where(local >= 0, codes[local] if len(codes) else local, -1)
+
+
+def _part_name(index):
+    return f"part-{index:05d}"
+
+
+def _next_part_index(schema):
+    return max(int(os.path.basename(p['dir']).split('-')[1]) for p in schema['parts']) + 1
+
+
+def _partition_dir(partition_on, key):
+    """'order_year=2016/order_month=3' for key (2016, 3)"""
+    return '/'.join(f"{name}={int(value)}" for name, value in zip(partition_on, key))
+
+
+def _part_entry(part_dir, rows, partition_on=(), key=(), dates=None):
+    """One manifest entry: where the part lives, its rows, partition key and date span"""
+    entry = {'dir': part_dir, 'rows': int(rows)}
+    if partition_on:
+        entry['partition'] = {name: int(value) for name, value in zip(partition_on, key)}
+    if dates is not None and len(dates):
+        entry['min_date'] = str(np.datetime_as_string(dates.min(), unit='D'))
+        entry['max_date'] = str(np.datetime_as_string(dates.max(), unit='D'))
+    return entry
+
+
+def _check_partition_columns(columns, partition_on):
+    kinds = {c['name']: c['kind'] for c in columns}
+    bad = [name for name in partition_on if kinds.get(name) != 'numeric']
+    if bad:
+        raise ValueError(f"Partition columns must be numeric columns of the dataset: {bad}")
+
+
+def _npy_header(dtype, rows):
+    """Fixed-size .npy (v1.0) header of a 1-D array, so it can be rewritten once the row count is known"""
+    header = repr({'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': (int(rows),)})
+    body = header.ljust(NPY_HEADER_BYTES - 11).encode('latin1') + b'\n'
+    return np.lib.format.MAGIC_PREFIX + bytes([1, 0]) + struct.pack('<H', len(body)) + body
+
+
+def _update_digest(digest, columns, encoded):
+    """Feed one encoded block (column -> array) into ``digest``, columns in schema order"""
+    for spec in columns:
+        digest.update(spec['name'].encode('utf-8'))
+        digest.update(np.ascontiguousarray(encoded[spec['name']]).tobytes())
+
+
+def _finish_digest(digest, columns):
+    """Category lists give the codes their meaning: they are part of the digest too"""
+    digest.update(json.dumps(columns, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _write_schema(path, schema):
+    """Replace schema.json atomically so readers see either the old or the new part list"""
+    tmp_file = os.path.join(path, f"{SCHEMA_FILE}.tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(schema, f, indent=1)
+    os.replace(tmp_file, os.path.join(path, SCHEMA_FILE))
+
+
+class ColumnarWriter:
+    """Stream row blocks into a new bundle whose row count is known up front.
+
+    Category columns get their full category list before the first block
+    arrives - either in ``categories`` or as blocks whose column is already a
+    categorical with the complete category set. Any other string column
+    (e.g. IDs, which grow with the rows) builds its list as blocks arrive,
+    values in order of first appearance.
+
+    With ``partition_on`` each block's rows are appended to their partition's
+    part as the block arrives, so blocks may come in any order and only one
+    block is ever held in memory.
+    """
+
+    def __init__(self, path, rows, categories=None, partition_on=None):
+        self.path = path
+        self.rows = int(rows)
+        self.categories = dict(categories or {})
+        self.partition_on = list(partition_on or [])
+        self._tmp_path = f"{path}.tmp"
+        self._part_path = os.path.join(self._tmp_path, _part_name(0))
+        self._columns = None
+        self._dtypes = {}
+        self._arrays = {}
+        self._growing = {}  # column -> {value: code} of columns without a declared list
+        self._partitions = {}  # key -> {'dir', 'rows', 'min_date', 'max_date'} while streaming
+        self._digest = hashlib.sha1()
+        self._offset = 0
+
+        if os.path.exists(self._tmp_path):
+            shutil.rmtree(self._tmp_path)
+        os.makedirs(self._part_path if not self.partition_on else self._tmp_path)
+
+    def _open(self, df):
+        self._columns = []
+        more_blocks = len(df) < self.rows
+        for name in df.columns:
+            series = df[name]
+            declared = name in self.categories or isinstance(series.dtype, pd.CategoricalDtype)
+            if name in self.categories and not isinstance(series.dtype, pd.CategoricalDtype):
+                series = pd.Series(pd.Categorical(series, categories=self.categories[name]))
+            kind, values, extra = _encode_column(series)
+            if kind == 'category' and more_blocks and not declared:
+                self._growing[name] = {}
+                values = values.astype(np.int32)  # The final list size is not known yet
+                extra['categories'] = []
+            elif kind == 'category':
+                self.categories[name] = extra['categories']
+            file_name = _column_file(name)
+            self._dtypes[name] = values.dtype
+            if not self.partition_on:
+                self._arrays[name] = np.lib.format.open_memmap(
+                    os.path.join(self._part_path, file_name), mode='w+', dtype=values.dtype, shape=(self.rows,)
+                )
+            self._columns.append({'name': name, 'file': file_name, 'kind': kind, **extra})
+        if self.partition_on:
+            _check_partition_columns(self._columns, self.partition_on)
+
+    def write(self, df):
+        """Append the next block of rows"""
+        if self._columns is None:
+            self._open(df)
+        end = self._offset + len(df)
+        if end > self.rows:
+            raise ValueError(f"{self.path}: got more than the declared {self.rows} rows")
+
+        encoded = {}
+        for spec in self._columns:
+            series = df[spec['name']]
+            if spec['name'] in self._growing:
+                values = _encode_growing(series, self._growing[spec['name']])
+            elif spec['kind'] == 'category':
+                values = _encode_codes(spec['name'], series, spec['categories'])
+            else:
+                _, values, _ = _encode_column(series)
+            encoded[spec['name']] = np.asarray(values).astype(self._dtypes[spec['name']], copy=False)
+            if not self.partition_on:
+                self._arrays[spec['name']][self._offset:end] = encoded[spec['name']]
+        _update_digest(self._digest, self._columns, encoded)
+        if self.partition_on and len(df):
+            self._append_partitions(encoded)
+        self._offset = end
+
+    def _append_partitions(self, encoded):
+        """Append each partition's rows of one encoded block to that partition's staged files"""
+        keys = [encoded[name] for name in self.partition_on]
+        order = np.lexsort(keys[::-1])
+        sorted_keys = np.column_stack([k[order] for k in keys])
+        starts = np.flatnonzero(np.r_[True, (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)])
+        dates = encoded.get(PARTITION_DATE_COLUMN)
+        for a, b in zip(starts, np.r_[starts[1:], len(order)]):
+            key = tuple(int(value) for value in sorted_keys[a])
+            rows = order[a:b]
+            partition = self._partitions.get(key)
+            if partition is None:
+                staged = os.path.join(self._tmp_path, _partition_dir(self.partition_on, key), 'staging')
+                os.makedirs(staged)
+                for spec in self._columns:
+                    with open(os.path.join(staged, spec['file']), 'wb') as f:
+                        f.write(_npy_header(self._dtypes[spec['name']], 0))
+                partition = self._partitions[key] = {'dir': staged, 'rows': 0, 'min_date': None, 'max_date': None}
+            for spec in self._columns:
+                with open(os.path.join(partition['dir'], spec['file']), 'ab') as f:
+                    f.write(np.ascontiguousarray(encoded[spec['name']][rows]).tobytes())
+            partition['rows'] += len(rows)
+            if dates is not None:
+                block = dates[rows]
+                low, high = block.min(), block.max()
+                partition['min_date'] = low if partition['min_date'] is None else min(partition['min_date'], low)
+                partition['max_date'] = high if partition['max_date'] is None else max(partition['max_date'], high)
+
+    def _close_partitions(self):
+        """Write the final row counts into the staged headers and name the parts in key order"""
+        parts = []
+        for index, key in enumerate(sorted(self._partitions)):
+            partition = self._partitions[key]
+            for spec in self._columns:
+                with open(os.path.join(partition['dir'], spec['file']), 'r+b') as f:
+                    f.write(_npy_header(self._dtypes[spec['name']], partition['rows']))
+            part_dir = f"{_partition_dir(self.partition_on, key)}/{_part_name(index)}"
+            os.replace(partition['dir'], os.path.join(self._tmp_path, part_dir))
+            dates = None
+            if partition['min_date'] is not None:
+                dates = np.array([partition['min_date'], partition['max_date']])
+            parts.append(_part_entry(part_dir, partition['rows'], self.partition_on, key, dates))
+        return parts
+
+    def close(self):
+        """Flush everything and swap the finished bundle into place"""
+        if self._offset != self.rows:
+            raise ValueError(f"{self.path}: wrote {self._offset} of {self.rows} declared rows")
+        for array in self._arrays.values():
+            array.flush()
+        self._arrays.clear()
+        for spec in self._columns or []:
+            if spec['name'] in self._growing:
+                spec['categories'] = list(self._growing[spec['name']])
+
+        if self._partitions:
+            parts = self._close_partitions()
+        else:
+            if self.partition_on:
+                # No rows: one empty part keeps the column dtypes readable
+                os.makedirs(self._part_path)
+                for spec in self._columns or []:
+                    np.save(os.path.join(self._part_path, spec['file']),
+                            np.empty(0, dtype=self._dtypes[spec['name']]), allow_pickle=False)
+            parts = [_part_entry(_part_name(0), self.rows)]
+        schema = {
+            'version': SCHEMA_VERSION,
+            'rows': self.rows,
+            'columns': self._columns or [],
+            'partition_on': self.partition_on,
+            'parts': parts,
+            'digest': _finish_digest(self._digest, self._columns or []),
+        }
+        _write_schema(self._tmp_path, schema)
+
+        # Readers never see a half-written bundle
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+
+def write_columnar(df, path, partition_on=None):
+    """Write ``df`` as a typed columnar bundle at directory ``path`` (replacing any existing one)"""
+    writer = ColumnarWriter(path, len(df), partition_on=partition_on)
+    writer.write(df)
+    return writer.close()
+
+
+def append_columnar(df, path):
+    """Add ``df`` as new part(s) of the bundle at ``path``; only the new rows are written.
+
+    A partitioned bundle gets one new part per partition key present in ``df``.
+    """
+    if not has_columnar(path):
+        return write_columnar(df, path)
+
+    schema = read_schema(path)
+    missing = [c['name'] for c in schema['columns'] if c['name'] not in df.columns]
+    if missing:
+        raise KeyError(f"Rows appended to {path} lack columns: {missing}")
+
+    encoded = {}
+    for spec in schema['columns']:
+        series = df[spec['name']]
+        if spec['kind'] == 'category':
+            # New values go to the end of the list so existing codes keep their meaning
+            known = set(spec['categories'])
+            new = sorted(set(series.dropna().astype(str).unique()) - known)
+            spec['categories'] = spec['categories'] + new
+            values = _encode_codes(spec['name'], series, spec['categories'])
+            encoded[spec['name']] = values.astype(_codes_dtype(len(spec['categories'])))
+        else:
+            encoded[spec['name']] = _encode_column(series)[1]
+
+    partition_on = schema.get('partition_on', [])
+    if partition_on:
+        _check_partition_columns(schema['columns'], partition_on)
+        groups = (df[partition_on].reset_index(drop=True)
+                  .groupby(partition_on, sort=True).indices.items())
+        groups = [(key if isinstance(key, tuple) else (key,), rows) for key, rows in groups]
+    else:
+        groups = [((), np.arange(len(df)))]
+
+    index = _next_part_index(schema)
+    new_parts = []
+    for i, (key, rows) in enumerate(groups):
+        part_dir = _part_name(index + i)
+        if partition_on:
+            part_dir = f"{_partition_dir(partition_on, key)}/{part_dir}"
+        tmp_part = os.path.join(path, f"{part_dir}.tmp")
+        if os.path.exists(tmp_part):
+            shutil.rmtree(tmp_part)
+        os.makedirs(tmp_part)
+        for spec in schema['columns']:
+            np.save(os.path.join(tmp_part, spec['file']), encoded[spec['name']][rows], allow_pickle=False)
+        os.replace(tmp_part, os.path.join(path, part_dir))
+        dates = encoded.get(PARTITION_DATE_COLUMN)
+        new_parts.append(_part_entry(part_dir, len(rows), partition_on, key,
+                                     dates[rows] if dates is not None else None))
+
+    # Chained on the previous digest: new rows, or new values for old codes, give a new digest
+    digest = hashlib.sha1(schema.get('digest', '').encode('utf-8'))
+    _update_digest(digest, schema['columns'], encoded)
+    schema['digest'] = _finish_digest(digest, schema['columns'])
+
+    # Parts become visible to readers only with the new schema.json
+    schema['parts'].extend(new_parts)
+    schema['rows'] = int(schema['rows']) + int(len(df))
+    _write_schema(path, schema)
+    return path
+
+
+def read_schema(path):
+    """Load the schema.json of a columnar bundle"""
+    with open(os.path.join(path, SCHEMA_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+_schema_cache = {}
+
+
+def _cached_schema(path):
+    """read_schema() for readers: parsed once per schema.json version (category lists grow with
+    history, so re-parsing them would make even a one-month load scale with the whole dataset).
+    The result is shared - do not modify it."""
+    schema_file = os.path.join(path, SCHEMA_FILE)
+    stat = os.stat(schema_file)
+    token = (stat.st_size, stat.st_mtime_ns)
+    key = os.path.abspath(path)
+    cached = _schema_cache.get(key)
+    if cached is None or cached[0] != token:
+        cached = (token, read_schema(path))
+        _schema_cache[key] = cached
+    return cached[1]
+
+
+def has_columnar(path):
+    """True when ``path`` holds a complete columnar bundle"""
+    return os.path.isfile(os.path.join(path, SCHEMA_FILE))
+
+
+def prune_parts(parts, start=None, end=None):
+    """Manifest entries whose 'Order Date' span overlaps [start, end] (inclusive days).
+
+    Parts without a recorded span (older bundles) are always kept.
+    """
+    if start is None and end is None:
+        return list(parts)
+    start = pd.Timestamp(start).normalize() if start is not None else None
+    end = pd.Timestamp(end).normalize() if end is not None else None
+    kept = []
+    for part in parts:
+        if 'min_date' in part:
+            if end is not None and pd.Timestamp(part['min_date']) > end:
+                continue
+            if start is not None and pd.Timestamp(part['max_date']) < start:
+                continue
+        elif part['rows'] == 0:
+            continue
+        kept.append(part)
+    return kept
+
+
+def read_manifest(path):
+    """One row per partition of the bundle at ``path``: key, parts, rows, min/max 'Order Date'"""
+    schema = _cached_schema(path)
+    partition_on = schema.get('partition_on', [])
+    manifest = pd.DataFrame([
+        {**part.get('partition', {}), 'parts': 1, 'rows': part['rows'],
+         'min_date': pd.Timestamp(part['min_date']) if 'min_date' in part else pd.NaT,
+         'max_date': pd.Timestamp(part['max_date']) if 'max_date' in part else pd.NaT}
+        for part in schema['parts']
+    ])
+    if not partition_on or manifest.empty:
+        return manifest
+    return (manifest.groupby(partition_on, sort=True)
+            .agg(parts=('parts', 'sum'), rows=('rows', 'sum'), min_date=('min_date', 'min'), max_date=('max_date', 'max'))
+            .reset_index())
+
+
+def read_columnar(path, columns=None, mmap_mode=None, start=None, end=None):
+    """Read a columnar bundle into a DataFrame, loading only ``columns`` (default: all).
+
+    With ``start`` / ``end`` only the parts whose dates overlap that range are
+    read: whole partitions, so rows just outside the range can come along.
+    """
+    schema = _cached_schema(path)
+    specs = {c['name']: c for c in schema['columns']}
+    if columns is None:
+        columns = [c['name'] for c in schema['columns']]
+    missing = [c for c in columns if c not in specs]
+    if missing:
+        raise KeyError(f"Columns not in {path}: {missing}")
+    parts = prune_parts(schema['parts'], start, end)
+
+    data = {}
+    for name in columns:
+        spec = specs[name]
+        arrays = [np.load(os.path.join(path, part['dir'], spec['file']), mmap_mode=mmap_mode, allow_pickle=False)
+                  for part in (parts or schema['parts'][:1])]
+        if not parts:
+            arrays = [arrays[0][:0]]  # nothing overlaps: keep the column's dtype
+        values = arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+        if spec['kind'] == 'category':
+            categories = spec['categories']
+            if len(parts) < len(schema['parts']):
+                # Pruned read: keep only the categories these rows use (IDs grow with history)
+                used = np.unique(values[values >= 0])
+                if len(used) < len(categories):
+                    values = np.where(values >= 0, np.searchsorted(used, values), -1).astype(values.dtype)
+                    categories = [categories[i] for i in used]
+            dtype = pd.CategoricalDtype(categories, ordered=spec['ordered'])
+            data[name] = pd.Categorical.from_codes(values, dtype=dtype)
+        else:
+            data[name] = values
+    return pd.DataFrame(data, columns=columns)
+
+
+def read_cleaned_csv(path, columns=None, start=None, end=None):
+    """CSV fallback: parse only ``columns`` with dates and low-cardinality strings typed on read.
+
+    ``start`` / ``end`` keep the same whole months a partitioned read would.
+    """
+    header = pd.read_csv(path, encoding='latin-1', nrows=0).columns
+    usecols = list(header) if columns is None else [c for c in columns if c in header]
+    pruned = start is not None or end is not None
+    readcols = usecols + [PARTITION_DATE_COLUMN] if pruned and PARTITION_DATE_COLUMN not in usecols else usecols
+    dtypes = {c: 'category' for c in readcols
+              if c in ('Ship Mode', 'Segment', 'Region', 'Category', 'Sub-Category', 'customer_type', 'revenue_segment')}
+    df = pd.read_csv(
+        path,
+        encoding='latin-1',
+        usecols=readcols,
+        parse_dates=[c for c in readcols if c in DATE_COLUMNS],
+        dtype=dtypes,
+    )
+    if pruned:
+        first, last = month_window(start, end)
+        dates = df[PARTITION_DATE_COLUMN]
+        df = df[(dates >= first) & (dates.dt.normalize() <= last)].reset_index(drop=True)
+    return df[usecols]
+
+
+def month_window(start=None, end=None):
+    """[first day of start's month, last day of end's month] - the span whole-month partitions cover"""
+    first = pd.Timestamp(start).to_period('M').start_time if start is not None else pd.Timestamp.min
+    last = pd.Timestamp(end).to_period('M').end_time.normalize() if end is not None else pd.Timestamp.max.normalize()
+    return first, last
+
+
+def dataset_path(processed_dir):
+    """The file that identifies the data ``load_cleaned`` would read (manifest or CSV)"""
+    columnar_path = os.path.join(processed_dir, COLUMNAR_DIR)
+    if has_columnar(columnar_path):
+        return os.path.join(columnar_path, SCHEMA_FILE)
+    return os.path.join(processed_dir, CLEANED_CSV)
+
+
+def dataset_files(processed_dir):
+    """Files whose content identifies the data ``load_cleaned`` would read.
+
+    schema.json carries a digest of the columns; bundles written before that
+    was recorded are identified by their part files as well.
+    """
+    path = dataset_path(processed_dir)
+    if os.path.basename(path) != SCHEMA_FILE:
+        return [path]
+    columnar_path = os.path.dirname(path)
+    schema = _cached_schema(columnar_path)
+    if 'digest' in schema:
+        return [path]
+    return [path] + [os.path.join(columnar_path, part['dir'], spec['file'])
+                     for part in schema['parts'] for spec in schema['columns']]
+
+
+def dataset_version(processed_dir):
+    """Cheap fingerprint (path, size, mtime) of the data ``load_cleaned`` would read"""
+    path = dataset_path(processed_dir)
+    stat = os.stat(path)
+    token = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(token.encode('utf-8')).hexdigest()[:16]
+
+
+def load_cleaned(processed_dir, columns=None, start=None, end=None):
+    """Load the cleaned dataset, preferring the columnar bundle and falling back to the CSV.
+
+    ``start`` / ``end`` restrict the load to the months overlapping that range.
+    """
+    columnar_path = os.path.join(processed_dir, COLUMNAR_DIR)
+    if has_columnar(columnar_path):
+        return read_columnar(columnar_path, columns=columns, start=start, end=end)
+    return read_cleaned_csv(os.path.join(processed_dir, CLEANED_CSV), columns=columns, start=start, end=end)
+
+
+def date_bounds(processed_dir):
+    """(min, max) 'Order Date' of the cleaned dataset - from the manifest when it has them"""
+    columnar_path = os.path.join(processed_dir, COLUMNAR_DIR)
+    if has_columnar(columnar_path):
+        parts = [p for p in _cached_schema(columnar_path)['parts'] if p['rows']]
+        if parts and all('min_date' in p for p in parts):
+            return (pd.Timestamp(min(p['min_date'] for p in parts)),
+                    pd.Timestamp(max(p['max_date'] for p in parts)))
+    dates = load_cleaned(processed_dir, columns=[PARTITION_DATE_COLUMN])[PARTITION_DATE_COLUMN]
+    return dates.min(), dates.max()
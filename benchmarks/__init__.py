@@ -0,0 +1,9 @@
+"""
+=================================================================
+E-COMMERCE ANALYTICS - BENCHMARK SUITE
+=================================================================
+Synthetic Superstore data (benchmarks.synthetic) and stage timings
+for the pipeline, the data layer and the dashboard views
+(benchmarks.run).
+=================================================================
+"""
@@ -0,0 +1,382 @@
+"""
+=================================================================
+BENCHMARK SUITE - PIPELINE, DATA LAYER & DASHBOARD VIEWS
+=================================================================
+For every requested size a synthetic raw CSV is generated (and
+kept in benchmarks/data/ for the next run), then each stage is timed
+and its peak memory recorded:
+
+  raw_load        read the raw CSV (notebook 01, cell 1)
+  clean_features  cleaning + feature engineering (analytics.pipeline)
+  load_data       the dashboard's load_data(): columnar bundle
+  load_data_csv   the same columns from the cleaned CSV fallback
+  load_last_quarter  load_data() for the last three months only
+                  (partition pruning)
+  build_star      split the loaded columns into the star schema the
+                  dashboard keeps in memory, and join them back
+  export_shared   write the date-sorted dashboard frame as mappable
+                  column files (once per data version)
+  open_shared     map them read-only - what every further process pays
+                  (mostly parsing the category lists)
+  shared_window   the last three months as a view of the mapping
+  build_indexes   FilterEngine + SalesCube (built once per load)
+  build_sketches  HyperLogLog distinct-count sketches
+  build_rfm       the materialized per-customer recency table
+  build_daily     prefix-sum daily series per Region x Category x
+                  customer_type
+  disk_cache_write  store the cube, sketches, RFM table and daily series
+                  in the persistent cache (analytics.diskcache)
+  disk_cache_read   read them back - what a restarted server pays
+                  instead of the four build stages
+  sidebar_filter  the sidebar's filter logic, per filter state
+  view.<name>     every tab aggregation, for all data and a subset
+                  (plus the sketch-backed views on all data: 'approx',
+                  churn from the recency table: 'rfm' / 'rfm_subset',
+                  and the SQLite backend's queries: 'sql_all' / 'sql_subset')
+  build_sqlite    load the dashboard columns into the SQLite backend
+  kpis            the KPI computation behind kpis.csv
+
+Timings are the median of ``--repeat`` untraced runs; peak memory
+comes from one extra run under tracemalloc (numpy and pandas
+buffers included). Results are written as JSON (one file per run
+plus latest.json) and appended to history.csv for comparisons.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 10k,100k,1M,10M --repeat 3
+    python -m benchmarks.run --sizes 1M --stages load_data,sidebar_filter --no-memory
+=================================================================
+"""
+
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analytics import aggregations as agg
+from analytics.cube import SalesCube
+from analytics.diskcache import DiskCache
+from analytics.filters import FilterEngine, FilterState
+from analytics.kpis import KPI_COLUMNS, compute_kpis
+from analytics.pipeline import run_pipeline
+from analytics.rfm import RFMTable
+from analytics.shared import SharedDataset, export_shared
+from analytics.sketches import DistinctSketches
+from analytics.timeseries import DailySeries
+from analytics.star import StarSchema
+from analytics.sqlbackend import SQLBackend, build_database
+from analytics.storage import CLEANED_CSV, DASHBOARD_COLUMNS, date_bounds, load_cleaned, read_cleaned_csv
+from benchmarks.synthetic import DEFAULT_SEED, generate_superstore
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "data")
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+DEFAULT_SIZES = '10k,100k,1M'
+FILTER_STATES = 20
+HISTORY_FIELDS = ['run_id', 'timestamp', 'commit', 'rows', 'stage', 'scenario',
+                  'seconds', 'seconds_min', 'repeat', 'peak_mb']
+
+
+def parse_size(text):
+    """'10k' -> 10_000, '1M' -> 1_000_000, '2500' -> 2500"""
+    text = text.strip().lower().replace('_', '')
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+# ======================== MEASUREMENT ========================
+def measure(fn, repeat=1, memory=True):
+    """Run ``fn`` ``repeat`` times; returns (last result, timings dict)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    peak_mb = None
+    if memory:
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+
+    return result, {
+        'seconds': statistics.median(times),
+        'seconds_min': min(times),
+        'repeat': repeat,
+        'peak_mb': round(peak_mb, 2) if peak_mb is not None else None,
+    }
+
+
+# ======================== STAGES ========================
+def sidebar_filter(engine, cube, state):
+    """The sidebar's work for one filter state, as dashboard/app.py does it"""
+    start, end, regions, categories, customer_types = state
+    date_rows = engine.date_slice(start, end)
+    engine.options('Region', date_rows)
+    region_mask = engine.mask('Region', regions, date_rows)
+    engine.options('Category', date_rows, region_mask)
+    row_mask = engine.combine(region_mask, engine.mask('Category', categories, date_rows))
+    engine.options('customer_type', date_rows, row_mask)
+    row_mask = engine.combine(row_mask, engine.mask('customer_type', customer_types, date_rows))
+    df_filtered = engine.select(date_rows, row_mask)
+    cube_slice = cube.slice(start, end, regions, categories, customer_types)
+    return df_filtered, (cube_slice if cube_slice is not None else df_filtered)
+
+
+def random_filter_states(engine, n, seed):
+    """Reproducible mix of filter states: month-aligned and arbitrary ranges, partial selections"""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(engine.min_date.normalize(), engine.max_date.normalize(), freq='D')
+    states = []
+    for i in range(n):
+        a, b = np.sort(rng.integers(len(days), size=2))
+        start, end = days[a], days[b]
+        if i % 2 == 0:
+            start, end = start.replace(day=1), end + pd.offsets.MonthEnd(0)
+
+        def pick(dim):
+            values = list(engine.bitmaps.get(dim, {}))
+            if not values or rng.random() < 0.5:
+                return values or None
+            return sorted(rng.choice(values, size=rng.integers(1, len(values) + 1), replace=False))
+
+        states.append((start, end, pick('Region'), pick('Category'), pick('customer_type')))
+    return states
+
+
+def benchmark_size(rows, raw_path, work_dir, repeat, memory, stages, seed):
+    """All stages for one dataset; returns a list of result records"""
+    records = []
+
+    def record(stage, fn, scenario='', n=1):
+        if stages and stage.split('.')[0] not in stages and stage not in stages:
+            return None
+        result, timing = measure(fn, repeat, memory)
+        if n > 1:
+            timing['seconds'] /= n
+            timing['seconds_min'] /= n
+        records.append({'rows': rows, 'stage': stage, 'scenario': scenario, **timing})
+        print(f"   {stage:<32} {scenario:<8} {timing['seconds'] * 1000:>11.2f} ms"
+              + (f" {timing['peak_mb']:>10.1f} MB" if timing['peak_mb'] is not None else ''))
+        return result
+
+    record('raw_load', lambda: pd.read_csv(raw_path, encoding='latin-1'))
+
+    out_dir = os.path.join(work_dir, 'processed')
+
+    def clean():
+        shutil.rmtree(out_dir, ignore_errors=True)
+        return run_pipeline(raw_path, out_dir, state_dir=os.path.join(out_dir, 'pipeline_state'))
+
+    if record('clean_features', clean) is None and not os.path.exists(os.path.join(out_dir, CLEANED_CSV)):
+        clean()  # Later stages need the processed outputs even when this one is skipped
+
+    df = record('load_data', lambda: load_cleaned(out_dir, columns=DASHBOARD_COLUMNS))
+    record('load_data_csv', lambda: read_cleaned_csv(os.path.join(out_dir, CLEANED_CSV), DASHBOARD_COLUMNS))
+    last_date = date_bounds(out_dir)[1]
+    quarter_start = (last_date.to_period('M') - 2).start_time
+    record('load_last_quarter', lambda: load_cleaned(out_dir, columns=DASHBOARD_COLUMNS,
+                                                     start=quarter_start, end=last_date))
+    if df is None:
+        df = load_cleaned(out_dir, columns=DASHBOARD_COLUMNS)
+    record('build_star', lambda: StarSchema.from_frame(df).frame(DASHBOARD_COLUMNS))
+
+    shared_path = os.path.join(work_dir, 'shared')
+
+    def export():
+        shutil.rmtree(shared_path, ignore_errors=True)
+        return export_shared(df.sort_values('Order Date', kind='stable').reset_index(drop=True), shared_path)
+
+    if record('export_shared', export) is None and stages and {'open_shared', 'shared_window'} & set(stages):
+        export()
+
+    shared = record('open_shared', lambda: SharedDataset(shared_path))
+    if shared is None and stages and 'shared_window' in stages:
+        shared = SharedDataset(shared_path)
+    if shared is not None:
+        record('shared_window', lambda: shared.window(quarter_start, last_date))
+
+    indexes = record('build_indexes', lambda: (FilterEngine(df), SalesCube(df)))
+    engine, cube = indexes if indexes is not None else (FilterEngine(df), SalesCube(df))
+
+    sketches = record('build_sketches', lambda: DistinctSketches(df))
+    if sketches is None:
+        sketches = DistinctSketches(df)
+
+    rfm = record('build_rfm', lambda: RFMTable(df))
+    if rfm is None:
+        rfm = RFMTable(df)
+
+    daily = record('build_daily', lambda: DailySeries(df))
+    if daily is None:
+        daily = DailySeries(df)
+
+    disk = DiskCache(os.path.join(work_dir, 'cache'))
+    disk.clear()
+    derived = {'cube': cube, 'sketches': sketches, 'rfm': rfm, 'daily': daily}
+
+    def store():
+        return [disk.put(name, value) for name, value in derived.items()]
+
+    if record('disk_cache_write', store) is None and stages and 'disk_cache_read' in stages:
+        store()
+    record('disk_cache_read', lambda: [disk.get(name) for name in derived])
+
+    states = random_filter_states(engine, FILTER_STATES, seed)
+    record('sidebar_filter', lambda: [sidebar_filter(engine, cube, s) for s in states],
+           scenario='per_state', n=len(states))
+
+    full_state = (engine.min_date, engine.max_date, None, None, None)
+    subset_state = next((s for s in states if cube.slice(*s) is None), states[-1])
+    for scenario, state in [('all', full_state), ('subset', subset_state)]:
+        df_filtered, agg_source = sidebar_filter(engine, cube, state)
+        for tab, views in agg.tab_views(df_filtered, agg_source, daily=daily.slice(*state)).items():
+            for name, compute in views.items():
+                record(f'view.{name}', compute, scenario=scenario)
+        for freq in ['D', 'W']:
+            trend_views = agg.tab_views(df_filtered, agg_source, daily=daily.slice(*state), trend_freq=freq)
+            record(f'view.trend_{freq}', trend_views['trends'][f'trend_{freq}'], scenario=scenario)
+
+    df_filtered, agg_source = sidebar_filter(engine, cube, full_state)
+    approx_views = agg.tab_views(df_filtered, agg_source, sketches.slice(*full_state))
+    for name in ['overview', 'regional_table']:
+        record(f'view.{name}', approx_views['overview' if name == 'overview' else 'regional'][name],
+               scenario='approx')
+
+    for scenario, state in [('rfm', full_state), ('rfm_subset', (subset_state[0], subset_state[1], None, None, None))]:
+        df_filtered, agg_source = sidebar_filter(engine, cube, state)
+        rfm_views = agg.tab_views(df_filtered, agg_source, rfm=rfm.slice(*state))
+        record('view.churn', rfm_views['customers']['churn'], scenario=scenario)
+
+    db_path = os.path.join(work_dir, 'superstore.sqlite')
+    if record('build_sqlite', lambda: build_database(out_dir, db_path)) is None:
+        build_database(out_dir, db_path)
+    backend = SQLBackend(db_path)
+    for scenario, state in [('sql_all', full_state), ('sql_subset', subset_state)]:
+        for tab, views in backend.tab_views(FilterState.normalize(backend, *state)).items():
+            for name, compute in views.items():
+                record(f'view.{name}', compute, scenario=scenario)
+    backend.pool.close()
+
+    kpi_frame = load_cleaned(out_dir, columns=KPI_COLUMNS) if not stages or 'kpis' in stages else None
+    record('kpis', lambda: compute_kpis(kpi_frame))
+    return records
+
+
+# ======================== RESULTS ========================
+def run_metadata(sizes, seed):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ''
+    now = datetime.now()
+    return {
+        'run_id': now.strftime('%Y%m%d-%H%M%S'),
+        'timestamp': now.isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'sizes': sizes,
+        'seed': seed,
+    }
+
+
+def write_results(meta, records, results_dir=RESULTS_DIR):
+    """``bench-<run_id>.json`` + ``latest.json`` + rows appended to ``history.csv``"""
+    os.makedirs(results_dir, exist_ok=True)
+    payload = {'meta': meta, 'results': records}
+    paths = [os.path.join(results_dir, f"bench-{meta['run_id']}.json"),
+             os.path.join(results_dir, "latest.json")]
+    for path in paths:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+
+    history = os.path.join(results_dir, "history.csv")
+    new_file = not os.path.exists(history)
+    with open(history, 'a', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS, extrasaction='ignore')
+        if new_file:
+            writer.writeheader()
+        for rec in records:
+            writer.writerow({**{k: meta[k] for k in ['run_id', 'timestamp', 'commit']}, **rec})
+    return paths + [history]
+
+
+def run_benchmarks(sizes, repeat=1, memory=True, stages=None, seed=DEFAULT_SEED,
+                   data_dir=DATA_DIR, results_dir=RESULTS_DIR, raw_path=None):
+    """Benchmark every size (or the given raw CSV); returns (metadata, records)"""
+    meta = run_metadata(sizes if raw_path is None else [raw_path], seed)
+    records = []
+    os.makedirs(data_dir, exist_ok=True)
+    targets = [(None, raw_path)] if raw_path else [(rows, None) for rows in sizes]
+    for rows, path in targets:
+        if path is None:
+            path = os.path.join(data_dir, f"superstore_{rows}_s{seed}.csv")
+            if not os.path.exists(path):
+                print(f"\n🧪 Generating {rows:,} synthetic rows -> {path}")
+                generate_superstore(path, rows, seed=seed)
+        if rows is None:
+            with open(path, 'rb') as f:
+                rows = sum(1 for _ in f) - 1
+
+        print(f"\n⏱️ {rows:,} rows ({os.path.basename(path)})")
+        work_dir = tempfile.mkdtemp(prefix='bench-', dir=data_dir)
+        try:
+            records.extend(benchmark_size(rows, path, work_dir, repeat, memory, stages, seed))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if results_dir:
+        for path in write_results(meta, records, results_dir):
+            print(f"💾 {path}")
+    return meta, records
+
+
+# ======================== CLI ========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analytics pipeline and dashboard views")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"Comma-separated row counts, k/M suffixes allowed (default: {DEFAULT_SIZES})")
+    parser.add_argument('--raw', default=None, help="Benchmark this raw CSV instead of synthetic data")
+    parser.add_argument('--repeat', type=int, default=1, help="Timed runs per stage (median is reported)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak-memory run")
+    parser.add_argument('--stages', default=None, help="Comma-separated stage names to run (default: all)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    stages = set(s.strip() for s in args.stages.split(',')) if args.stages else None
+    run_benchmarks(sizes, repeat=args.repeat, memory=not args.no_memory, stages=stages, seed=args.seed,
+                   data_dir=args.data_dir, results_dir=args.results_dir, raw_path=args.raw)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
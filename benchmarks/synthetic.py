@@ -0,0 +1,279 @@
+"""
+=================================================================
+SYNTHETIC SUPERSTORE GENERATOR
+=================================================================
+Writes a raw CSV with the exact columns and formats of
+data/raw/superstore.csv at any size, from 10k to 10M+ order lines.
+Rows are generated and written one block of orders at a time, so
+memory stays flat however many rows are requested.
+
+Shapes follow the real file:
+
+* ~2 lines per order, ~13 lines per customer, ~5 lines per product
+  (product and customer counts grow with the row count);
+* 4 regions, 3 segments, 3 categories / 17 sub-categories, 4 ship
+  modes with their delivery-day ranges;
+* order dates over 4 years with yearly growth and a Q4 peak;
+* the real discount levels and frequencies (48% undiscounted,
+  37% at 20%, a long tail up to 80%) and loss-making deep discounts.
+
+Usage:
+    python -m benchmarks.synthetic --rows 1000000 --out benchmarks/data/superstore_1m.csv
+=================================================================
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+RAW_COLUMNS = [
+    'Row ID', 'Order ID', 'Order Date', 'Ship Date', 'Ship Mode', 'Customer ID',
+    'Customer Name', 'Segment', 'Country', 'City', 'State', 'Postal Code', 'Region',
+    'Product ID', 'Category', 'Sub-Category', 'Product Name', 'Sales', 'Quantity',
+    'Discount', 'Profit',
+]
+DATE_FORMAT = '%m/%d/%Y'
+DEFAULT_SEED = 42
+ORDERS_PER_BLOCK = 250_000
+
+START_DATE = pd.Timestamp('2014-01-03')
+END_DATE = pd.Timestamp('2017-12-30')
+YEARLY_GROWTH = 1.2
+MONTH_WEIGHTS = np.array([0.5, 0.4, 0.9, 0.8, 0.8, 0.8, 0.8, 0.8, 1.5, 1.0, 1.6, 1.7])
+
+SEGMENTS = (['Consumer', 'Corporate', 'Home Office'], [0.52, 0.30, 0.18])
+SHIP_MODES = {
+    # mode: (share, min delivery days, max delivery days)
+    'Standard Class': (0.60, 4, 7),
+    'Second Class': (0.19, 2, 5),
+    'First Class': (0.16, 1, 4),
+    'Same Day': (0.05, 0, 0),
+}
+REGIONS = {
+    # region: (share, [(state, number of cities)])
+    'West': (0.32, [('California', 48), ('Washington', 24), ('Arizona', 18), ('Colorado', 18), ('Oregon', 12)]),
+    'East': (0.28, [('New York', 36), ('Pennsylvania', 24), ('Ohio', 24), ('Massachusetts', 12), ('Delaware', 6)]),
+    'Central': (0.23, [('Texas', 36), ('Illinois', 30), ('Michigan', 18), ('Indiana', 12), ('Wisconsin', 12)]),
+    'South': (0.17, [('Florida', 30), ('Virginia', 18), ('North Carolina', 18), ('Georgia', 12), ('Kentucky', 12)]),
+}
+CATEGORIES = {
+    # category: (share, code, [(sub-category, code, median unit price, base margin)])
+    'Office Supplies': (0.60, 'OFF', [
+        ('Binders', 'BI', 18, 0.25), ('Paper', 'PA', 15, 0.42), ('Storage', 'ST', 80, 0.09),
+        ('Art', 'AR', 9, 0.24), ('Appliances', 'AP', 70, 0.17), ('Labels', 'LA', 5, 0.44),
+        ('Envelopes', 'EN', 18, 0.42), ('Fasteners', 'FA', 4, 0.31), ('Supplies', 'SU', 25, 0.08),
+    ]),
+    'Furniture': (0.21, 'FUR', [
+        ('Furnishings', 'FU', 30, 0.14), ('Chairs', 'CH', 190, 0.08),
+        ('Tables', 'TA', 260, -0.05), ('Bookcases', 'BO', 170, 0.02),
+    ]),
+    'Technology': (0.19, 'TEC', [
+        ('Phones', 'PH', 110, 0.13), ('Accessories', 'AC', 60, 0.22),
+        ('Machines', 'MA', 170, 0.10), ('Copiers', 'CO', 700, 0.32),
+    ]),
+}
+# Discount levels and their share of order lines in the real data
+DISCOUNTS = (
+    np.array([0.0, 0.2, 0.7, 0.8, 0.3, 0.4, 0.6, 0.1, 0.5, 0.15, 0.32, 0.45]),
+    np.array([0.480, 0.366, 0.042, 0.030, 0.023, 0.021, 0.014, 0.009, 0.007, 0.005, 0.003, 0.001]),
+)
+QUANTITY_WEIGHTS = np.array([9.0, 24.0, 24.0, 12.0, 12.0, 6.0, 6.0, 3.0, 3.0, 1.0, 0.5, 0.3, 0.3, 0.2])
+FIRST_NAMES = ['Claire', 'Darrin', 'Sean', 'Brosina', 'Andrew', 'Irene', 'Harold', 'Pete', 'Alejandro',
+               'Zuschuss', 'Ken', 'Sandra', 'Emily', 'Eric', 'Tracy', 'Matt', 'Gene', 'Steve', 'Linda', 'Ruben']
+LAST_NAMES = ['Gute', 'Van Huff', "O'Donnell", 'Hoffman', 'Allen', 'Maddox', 'Pawlan', 'Kriz', 'Grove',
+              'Carroll', 'Black', 'Flathmann', 'Burns', 'Hoffmann', 'Blumstein', 'Abelman', 'Hale', 'Nguyen']
+PRODUCT_WORDS = ['Premium', 'Deluxe', 'Economy', 'Classic', 'Heavy-Duty', 'Compact', 'Ergonomic',
+                 'Wireless', 'Recycled', 'Executive', 'Portable', 'Adjustable']
+
+
+def default_customers(rows):
+    """~13 order lines per customer, as in the real data"""
+    return max(50, rows // 13)
+
+
+def default_products(rows):
+    """Catalogue grows with the data but much slower than the order lines"""
+    return int(min(max(200, 1850 * np.sqrt(rows / 10_000)), 250_000))
+
+
+def _choice(rng, options, weights, size):
+    weights = np.asarray(weights, dtype=float)
+    return rng.choice(len(options), size=size, p=weights / weights.sum())
+
+
+def _geography():
+    """One row per (region, state, city) with the region's share split evenly across its cities"""
+    rows = []
+    postal = 10001
+    for region, (share, states) in REGIONS.items():
+        n_cities = sum(n for _, n in states)
+        for state, cities in states:
+            for i in range(cities):
+                rows.append((region, state, f"{state.split()[0]} City {i + 1}", postal, share / n_cities))
+                postal += 37
+    return pd.DataFrame(rows, columns=['Region', 'State', 'City', 'Postal Code', 'weight'])
+
+
+def _customers(n, rng):
+    geography = _geography()
+    first = np.array(FIRST_NAMES)[rng.integers(len(FIRST_NAMES), size=n)]
+    last = np.array(LAST_NAMES)[rng.integers(len(LAST_NAMES), size=n)]
+    initials = pd.Series(first).str[0] + pd.Series(last).str[0]
+    ids = initials + '-' + pd.Series(np.arange(10000, 10000 + n)).astype(str)
+    home = geography.iloc[_choice(rng, geography.index, geography['weight'], n)].reset_index(drop=True)
+    segment = np.array(SEGMENTS[0])[_choice(rng, SEGMENTS[0], SEGMENTS[1], n)]
+    return pd.DataFrame({
+        'Customer ID': ids,
+        'Customer Name': pd.Series(first) + ' ' + pd.Series(last),
+        'Segment': segment,
+        'City': home['City'],
+        'State': home['State'],
+        'Postal Code': home['Postal Code'],
+        'Region': home['Region'],
+        # Heavy-tailed activity: a few customers place many orders
+        'weight': rng.pareto(2.5, size=n) + 1,
+    })
+
+
+def _products(n, rng):
+    sub_rows = [(cat, cat_code, sub, sub_code, price, margin, share / len(subs))
+                for cat, (share, cat_code, subs) in CATEGORIES.items()
+                for sub, sub_code, price, margin in subs]
+    subs = pd.DataFrame(sub_rows, columns=['Category', 'cat_code', 'Sub-Category', 'sub_code',
+                                           'price', 'margin', 'weight'])
+    picked = subs.iloc[_choice(rng, subs.index, subs['weight'], n)].reset_index(drop=True)
+    words = np.array(PRODUCT_WORDS)[rng.integers(len(PRODUCT_WORDS), size=n)]
+    serial = pd.Series(np.arange(10000000, 10000000 + n)).astype(str)
+    return pd.DataFrame({
+        'Product ID': picked['cat_code'] + '-' + picked['sub_code'] + '-' + serial,
+        'Category': picked['Category'],
+        'Sub-Category': picked['Sub-Category'],
+        'Product Name': words + ' ' + picked['Sub-Category'] + ' ' + serial.str[-5:],
+        'unit_price': picked['price'].to_numpy() * rng.lognormal(-0.6, 0.7, size=n),
+        'margin': picked['margin'].to_numpy() + rng.normal(0, 0.05, size=n),
+        'weight': rng.pareto(1.5, size=n) + 1,
+    })
+
+
+def _calendar():
+    """Formatted dates (with room for the longest delivery), their years and order-day weights"""
+    max_delivery = max(v[2] for v in SHIP_MODES.values())
+    days = pd.date_range(START_DATE, END_DATE + pd.Timedelta(days=max_delivery), freq='D')
+    order_days = days[days <= END_DATE]
+    growth = YEARLY_GROWTH ** (order_days.year - START_DATE.year)
+    weights = MONTH_WEIGHTS[order_days.month - 1] * growth
+    # Formatting a few thousand distinct days once is far cheaper than per row
+    return days.strftime(DATE_FORMAT).to_numpy(), days.year.to_numpy(), weights
+
+
+def _order_block(first_order, n_orders, customers, products, calendar, rng):
+    """Order lines for ``n_orders`` consecutive order numbers"""
+    lines_per_order = 1 + rng.poisson(1.0, size=n_orders)
+    order_idx = np.repeat(np.arange(n_orders), lines_per_order)
+    n = len(order_idx)
+
+    labels, years, day_weights = calendar
+    order_day = _choice(rng, day_weights, day_weights, n_orders)
+    mode_names = list(SHIP_MODES)
+    mode = _choice(rng, mode_names, [v[0] for v in SHIP_MODES.values()], n_orders)
+    lo = np.array([SHIP_MODES[m][1] for m in mode_names])[mode]
+    hi = np.array([SHIP_MODES[m][2] for m in mode_names])[mode]
+    ship_day = order_day + rng.integers(lo, hi + 1)
+    customer = _choice(rng, customers.index, customers['weight'], n_orders)
+
+    order_numbers = first_order + np.arange(n_orders)
+    order_ids = ('CA-' + pd.Series(years[order_day]).astype(str) + '-'
+                 + pd.Series(100000 + order_numbers).astype(str))
+
+    product = products.iloc[_choice(rng, products.index, products['weight'], n)].reset_index(drop=True)
+    quantity = 1 + _choice(rng, QUANTITY_WEIGHTS, QUANTITY_WEIGHTS, n)
+    discount = DISCOUNTS[0][_choice(rng, DISCOUNTS[0], DISCOUNTS[1], n)]
+    sales = np.round(product['unit_price'].to_numpy() * quantity * (1 - discount), 4)
+    # Discounts above 20% push lines into a loss, as in the real data
+    penalty = 0.35 * discount + 1.1 * np.maximum(discount - 0.2, 0)
+    margin = product['margin'].to_numpy() + 0.05 - penalty + rng.normal(0, 0.08, size=n)
+    profit = np.round(sales * margin, 4)
+
+    cust = customers.iloc[customer[order_idx]].reset_index(drop=True)
+    return pd.DataFrame({
+        'Order ID': order_ids.to_numpy()[order_idx],
+        'Order Date': labels[order_day][order_idx],
+        'Ship Date': labels[ship_day][order_idx],
+        'Ship Mode': np.array(mode_names)[mode][order_idx],
+        'Customer ID': cust['Customer ID'],
+        'Customer Name': cust['Customer Name'],
+        'Segment': cust['Segment'],
+        'Country': 'United States',
+        'City': cust['City'],
+        'State': cust['State'],
+        'Postal Code': cust['Postal Code'],
+        'Region': cust['Region'],
+        'Product ID': product['Product ID'],
+        'Category': product['Category'],
+        'Sub-Category': product['Sub-Category'],
+        'Product Name': product['Product Name'],
+        'Sales': sales,
+        'Quantity': quantity,
+        'Discount': discount,
+        'Profit': profit,
+    })
+
+
+def generate_superstore(path, rows, seed=DEFAULT_SEED, customers=None, products=None,
+                        duplicate_rate=0.0, orders_per_block=ORDERS_PER_BLOCK):
+    """Write ``rows`` synthetic order lines to ``path``; returns the number written.
+
+    ``duplicate_rate`` re-emits that share of lines verbatim, Row ID
+    included, so the pipeline's de-duplication has work to do.
+    """
+    rng = np.random.default_rng(seed)
+    customer_table = _customers(customers or default_customers(rows), rng)
+    product_table = _products(products or default_products(rows), rng)
+    calendar = _calendar()
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    written = 0
+    next_order = 0
+    next_row_id = 1
+    with open(tmp_path, 'w', encoding='latin-1', newline='') as f:
+        while written < rows:
+            # ~2 lines per order; the last block is trimmed to the exact row count
+            n_orders = min(orders_per_block, max(1, (rows - written) // 2 + 1))
+            block = _order_block(next_order, n_orders, customer_table, product_table, calendar, rng)
+            next_order += n_orders
+            block.insert(0, 'Row ID', np.arange(next_row_id, next_row_id + len(block)))
+            next_row_id += len(block)
+            if duplicate_rate > 0:
+                dupes = block.sample(frac=duplicate_rate, random_state=int(rng.integers(2**31)))
+                # Each copy lands right after its original, as a re-sent export would
+                block = pd.concat([block, dupes]).sort_index(kind='stable').reset_index(drop=True)
+            block = block.iloc[:rows - written]
+            block.to_csv(f, header=written == 0, index=False, columns=RAW_COLUMNS)
+            written += len(block)
+    os.replace(tmp_path, path)
+    return written
+
+
+# ======================== CLI ========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic raw Superstore CSV")
+    parser.add_argument('--rows', type=int, required=True, help="Number of order lines")
+    parser.add_argument('--out', required=True, help="Output CSV path")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--customers', type=int, default=None, help="Default: rows / 13")
+    parser.add_argument('--products', type=int, default=None, help="Default: grows with sqrt(rows)")
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    written = generate_superstore(args.out, args.rows, seed=args.seed, customers=args.customers,
+                                  products=args.products, duplicate_rate=args.duplicate_rate)
+    print(f"✅ {written:,} synthetic order lines written to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,11 +13,46 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import warnings
+import json
 import os
+import sys
 warnings.filterwarnings('ignore')
 
 # Get the project root directory (parent of dashboard folder)
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from analytics import aggregations as agg
+from analytics.cache import ResultCache
+from analytics.diskcache import CACHE_DIR, DEFAULT_MAX_BYTES as DEFAULT_DISK_BYTES, DiskCache
+from analytics.export import (
+    EXPORT_FORMATS, INLINE_MAX_ROWS, PARQUET_AVAILABLE, deferred_export, frame_chunks, view_table,
+)
+from analytics.filters import FilterState
+from analytics.profiling import NULL_PROFILER, ProfileHistory, Profiler, append_log
+from analytics.reload import DEFAULT_INTERVAL, watch_processed
+from analytics.service import filter_query
+from analytics.sqlbackend import DB_FILE
+from analytics.rfm import RECENCY_THRESHOLDS
+from analytics.timeseries import TREND_FREQUENCIES
+from analytics.storage import month_window
+
+# "pandas" (rows in memory, default) or "sqlite" (queries against a shared file)
+BACKEND = os.environ.get("DASHBOARD_BACKEND", "pandas").lower()
+SQLITE_PATH = os.environ.get("DASHBOARD_SQLITE", os.path.join(PROCESSED_DIR, DB_FILE))
+# Seconds between checks for a new pipeline output; 0 disables hot reload
+RELOAD_INTERVAL = float(os.environ.get("DASHBOARD_RELOAD_INTERVAL", DEFAULT_INTERVAL))
+# Map one on-disk copy of the rows shared by every server process ("0": private copy per window)
+SHARED_DATA = os.environ.get("DASHBOARD_SHARED", "1") != "0"
+# Views and window indexes persisted across restarts and deploys ("0" disables), capped in MB
+DISK_CACHE_DIR = os.environ.get("DASHBOARD_DISK_CACHE", os.path.join(PROCESSED_DIR, CACHE_DIR))
+DISK_CACHE_MB = float(os.environ.get("DASHBOARD_DISK_CACHE_MB", DEFAULT_DISK_BYTES / 1024 ** 2))
+# Base URL of a running `python -m analytics.service`, offered for streamed exports
+SERVICE_URL = os.environ.get("DASHBOARD_SERVICE_URL", "")
+# Row exports above this go to the service instead (the download button is built in memory)
+EXPORT_MAX_ROWS = int(os.environ.get("DASHBOARD_EXPORT_MAX_ROWS", INLINE_MAX_ROWS))
 
 # ======================== PAGE CONFIG ========================
 st.set_page_config(
@@ -39,27 +74,54 @@ st.markdown("""
 
 st.markdown("---")
 
+# ======================== INSTRUMENTATION ========================
+@st.cache_resource
+def get_profile_history():
+    # Rolling section timings across reruns and sessions
+    return ProfileHistory()
+
+# The panel's toggles live at the bottom of the sidebar; their state is read up front
+perf_enabled = st.session_state.get("perf_panel", os.environ.get("DASHBOARD_PROFILE") == "1")
+profiler = Profiler(track_memory=st.session_state.get("perf_memory", False)) if perf_enabled else NULL_PROFILER
+
 # ======================== LOAD DATA ========================
-@st.cache_data
-def load_data():
-    data_path = os.path.join(PROJECT_ROOT, "data", "processed", "superstore_cleaned.csv")
-    df = pd.read_csv(data_path, encoding='latin-1')
-    # Convert date columns
-    for col in df.columns:
-        if 'date' in col.lower():
-            df[col] = pd.to_datetime(df[col])
-    return df
-
-@st.cache_data
-def load_kpis():
-    kpi_path = os.path.join(PROJECT_ROOT, "data", "processed", "kpis.csv")
-    kpis_df = pd.read_csv(kpi_path)
-    # Convert to dictionary: {'KPI Name': 'Value'}
-    return dict(zip(kpis_df['KPI'], kpis_df['Value']))
+@st.cache_resource
+def get_disk_cache():
+    # Shared with every server process and with `python -m analytics.pipeline --prewarm`
+    if DISK_CACHE_DIR == "0":
+        return None
+    return DiskCache(DISK_CACHE_DIR, max_bytes=int(DISK_CACHE_MB * 1024 ** 2))
+
+@st.cache_resource
+def get_data_reloader():
+    # One shared snapshot of data/processed (dataset, date bounds, KPIs and the
+    # per-window FilterEngine / cube / RFM table / daily series); a background thread
+    # rebuilds it when the pipeline rewrites the files and swaps it in atomically.
+    # Window rows are views of a memory-mapped file, not copies
+    return watch_processed(
+        PROCESSED_DIR,
+        sqlite_path=SQLITE_PATH if BACKEND == "sqlite" else None,
+        interval=RELOAD_INTERVAL,
+        shared=SHARED_DATA,
+        disk=get_disk_cache(),
+    )
+
+@st.cache_resource
+def get_result_cache():
+    # One LRU of computed views shared by all sessions, backed by the disk cache
+    return ResultCache(disk=get_disk_cache())
 
 try:
-    df = load_data()
-    kpis = load_kpis()
+    with profiler.section("load_bounds"):
+        # Taken once per rerun: this run keeps using it even if a reload lands meanwhile
+        snapshot = get_data_reloader().current
+        sql_backend = snapshot.sql
+        min_date, max_date = snapshot.min_date, snapshot.max_date
+        # Content hash of the loaded data - part of every cache key, in memory and on disk
+        data_version = snapshot.fingerprint
+        result_cache = get_result_cache()
+        # Numeric {'KPI Name': value}, written by notebook 02 via analytics.kpis
+        kpis = snapshot.kpis
 except Exception as e:
     st.error(f"❌ Error loading data: {e}")
     st.stop()
@@ -68,120 +130,238 @@ except Exception as e:
 st.sidebar.markdown("### 🎯 FILTERS")
 st.sidebar.markdown("---")
 
-# Date range filter
+# Date range filter - picked before any rows are loaded
 date_range = st.sidebar.date_input(
     "📅 Select Date Range",
-    value=(df['Order Date'].min().date(), df['Order Date'].max().date()),
-    min_value=df['Order Date'].min().date(),
-    max_value=df['Order Date'].max().date()
+    value=(min_date.date(), max_date.date()),
+    min_value=min_date.date(),
+    max_value=max_date.date()
 )
 
 if len(date_range) == 2:
-    df_filtered = df[(df['Order Date'].dt.date >= date_range[0]) & 
-                     (df['Order Date'].dt.date <= date_range[1])]
+    date_start, date_end = date_range
 else:
-    df_filtered = df.copy()
+    date_start, date_end = min_date, max_date
+
+if sql_backend is None:
+    # Load only the months the date range touches (partition pruning)
+    window = tuple(d.date().isoformat() for d in month_window(date_start, date_end))
+    try:
+        with profiler.section("load_data"):
+            # Only the order_year/order_month partitions inside the (first day, last day) window
+            window_data = snapshot.window(window)
+            engine = window_data.engine
+            cube = window_data.cube
+    except Exception as e:
+        st.error(f"❌ Error loading data: {e}")
+        st.stop()
+
+    if len(engine) == 0:
+        st.warning("⚠️ No orders in the selected date range.")
+        st.stop()
+
+    columns = set(engine.df.columns)
+    with profiler.section("filter.date"):
+        date_rows = engine.date_slice(date_start, date_end)
+else:
+    columns = set(sql_backend.columns)
+
+def sql_state(**selected):
+    # SQL backend: the filter state of the selections made so far
+    return FilterState.normalize(sql_backend, date_start, date_end, **selected)
 
 # Region filter
-regions = df_filtered['Region'].unique() if 'Region' in df_filtered.columns else []
-selected_regions = st.sidebar.multiselect(
-    "🌍 Select Regions",
-    options=sorted(regions),
-    default=sorted(regions)
-)
-df_filtered = df_filtered[df_filtered['Region'].isin(selected_regions)]
+with profiler.section("filter.region"):
+    if sql_backend is not None:
+        regions = sql_backend.options('Region', sql_state())
+    else:
+        regions = engine.options('Region', date_rows)
+    selected_regions = st.sidebar.multiselect(
+        "🌍 Select Regions",
+        options=regions,
+        default=regions
+    )
+    if sql_backend is None:
+        region_mask = engine.mask('Region', selected_regions, date_rows)
 
 # Category filter
-categories = df_filtered['Category'].unique() if 'Category' in df_filtered.columns else []
-selected_categories = st.sidebar.multiselect(
-    "📦 Select Categories",
-    options=sorted(categories),
-    default=sorted(categories)
-)
-df_filtered = df_filtered[df_filtered['Category'].isin(selected_categories)]
+with profiler.section("filter.category"):
+    if sql_backend is not None:
+        categories = sql_backend.options('Category', sql_state(regions=selected_regions))
+    else:
+        categories = engine.options('Category', date_rows, region_mask)
+    selected_categories = st.sidebar.multiselect(
+        "📦 Select Categories",
+        options=categories,
+        default=categories
+    )
+    if sql_backend is None:
+        row_mask = engine.combine(region_mask, engine.mask('Category', selected_categories, date_rows))
 
 # Customer type filter
-if 'customer_type' in df_filtered.columns:
-    customer_types = df_filtered['customer_type'].unique()
-    selected_cust_types = st.sidebar.multiselect(
-        "👥 Select Customer Types",
-        options=sorted(customer_types),
-        default=sorted(customer_types)
-    )
-    df_filtered = df_filtered[df_filtered['customer_type'].isin(selected_cust_types)]
+if 'customer_type' in columns:
+    with profiler.section("filter.customer_type"):
+        if sql_backend is not None:
+            customer_types = sql_backend.options(
+                'customer_type', sql_state(regions=selected_regions, categories=selected_categories)
+            )
+        else:
+            customer_types = engine.options('customer_type', date_rows, row_mask)
+        selected_cust_types = st.sidebar.multiselect(
+            "👥 Select Customer Types",
+            options=customer_types,
+            default=customer_types
+        )
+        if sql_backend is None:
+            row_mask = engine.combine(row_mask, engine.mask('customer_type', selected_cust_types, date_rows))
+else:
+    selected_cust_types = None
+
+filter_state = FilterState.normalize(
+    sql_backend or engine, date_start, date_end, selected_regions, selected_categories, selected_cust_types
+)
+
+if sql_backend is None:
+    # One row selection shared by every tab
+    with profiler.section("filter.select"):
+        df_filtered = engine.select(date_rows, row_mask)
+        filtered_rows = len(df_filtered)
 
+        # Additive views (sums, line counts) come from the cube when the filters line up with it
+        cube_slice = cube.slice(date_start, date_end, selected_regions, selected_categories, selected_cust_types)
+        agg_source = cube_slice if cube_slice is not None else df_filtered
+else:
+    with profiler.section("filter.count"):
+        filtered_rows = sql_backend.count(filter_state)
+
+# ======================== PERFORMANCE OPTIONS ========================
 st.sidebar.markdown("---")
-st.sidebar.markdown(f"**📊 Filtered Data:** {len(df_filtered):,} orders")
+lazy_tabs = st.sidebar.toggle(
+    "⚡ Render only the selected tab",
+    value=True,
+    help="Compute charts for the visible tab only instead of all five on every change"
+)
+prefetch_tabs = st.sidebar.toggle(
+    "🔮 Prefetch other tabs",
+    value=True,
+    disabled=not lazy_tabs,
+    help="Compute the hidden tabs' numbers in the background after the visible one renders"
+)
+approximate_counts = st.sidebar.toggle(
+    "≈ Approximate distinct counts",
+    value=False,
+    disabled=sql_backend is not None,
+    help="Unique customers and orders from HyperLogLog sketches (±1.6% standard error); "
+         "only for whole-month date ranges, exact counts otherwise"
+)
 
-# ======================== TAB LAYOUT ========================
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "📈 Overview KPIs",
-    "💹 Sales Trends",
-    "👥 Customer Insights",
-    "🌍 Regional Analysis",
-    "🏷️ Discount Impact"
-])
+# Distinct counts from merged HyperLogLog sketches when asked for and the filters line up with them
+sketch_slice = None
+if approximate_counts and sql_backend is None:
+    with profiler.section("filter.sketch_slice"):
+        sketch_slice = window_data.sketches.slice(
+            date_start, date_end, selected_regions, selected_categories, selected_cust_types
+        )
+distinct_mode = 'approx' if sketch_slice is not None else 'exact'
+
+# Churn from the materialized recency table unless a dimension filter drops order lines;
+# trends from running daily sums at the granularity picked in the Sales Trends tab
+rfm_slice = daily_slice = None
+trend_freq = st.session_state.get("trend_freq", "M")
+if sql_backend is None:
+    with profiler.section("filter.rfm_slice"):
+        rfm_slice = window_data.rfm.slice(
+            date_start, date_end, selected_regions, selected_categories, selected_cust_types
+        )
+    with profiler.section("filter.daily_slice"):
+        daily_slice = window_data.daily.slice(
+            filter_state.start, filter_state.end, selected_regions, selected_categories, selected_cust_types
+        )
+
+if sql_backend is not None:
+    # Every view is a GROUP BY query returning only its small result
+    views = sql_backend.tab_views(filter_state, trend_freq)
+else:
+    views = agg.tab_views(df_filtered, agg_source, sketch_slice, rfm_slice, daily_slice, trend_freq)
+view_computes = {name: compute for tab_computes in views.values() for name, compute in tab_computes.items()}
+
+def view_key(name):
+    return (data_version, filter_state, distinct_mode, name)
+
+def cached_view(name):
+    # Same dataset + same filters + same view => computed once for every session
+    with profiler.section(f"view.{name}"):
+        return result_cache.get_or_compute(view_key(name), view_computes[name])
+
+
+st.sidebar.markdown("---")
+st.sidebar.markdown(f"**📊 Filtered Data:** {filtered_rows:,} orders")
+reloader = get_data_reloader()
+st.sidebar.caption(
+    f"🔄 Data loaded {datetime.fromtimestamp(snapshot.loaded_at):%Y-%m-%d %H:%M:%S}"
+    + (f" · {reloader.reloads:,} reloads" if reloader.reloads else "")
+    + (f" · last reload failed: {reloader.last_error}" if reloader.last_error else "")
+)
 
 # ======================== TAB 1: OVERVIEW KPIs ========================
-with tab1:
+def render_overview():
     st.markdown("### 🎯 KEY PERFORMANCE INDICATORS")
     
     # Calculate KPIs for filtered data
     col1, col2, col3, col4 = st.columns(4)
     
-    total_revenue = df_filtered['Sales'].sum()
-    total_profit = df_filtered['Profit'].sum()
-    profit_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else 0
-    aov = df_filtered['Sales'].mean()
+    overview = cached_view('overview')
     
     col1.metric(
         "💰 Total Revenue",
-        f"${total_revenue:,.0f}",
+        f"${overview['total_revenue']:,.0f}",
         delta="Current period"
     )
     col2.metric(
         "📊 Total Profit",
-        f"${total_profit:,.0f}",
-        delta=f"{profit_margin:.2f}% margin"
+        f"${overview['total_profit']:,.0f}",
+        delta=f"{overview['profit_margin']:.2f}% margin"
     )
     col3.metric(
         "💵 Average Order Value",
-        f"${aov:.2f}",
+        f"${overview['average_order_value']:.2f}",
         delta="Per transaction"
     )
+    approx = "≈ " if overview['approximate'] else ""
     col4.metric(
         "📦 Total Orders",
-        f"{df_filtered['Order ID'].nunique():,}",
+        f"{approx}{overview['total_orders']:,}",
         delta="Unique transactions"
     )
     
     col5, col6, col7, col8 = st.columns(4)
     
-    unique_customers = df_filtered['Customer ID'].nunique()
-    revenue_per_customer = total_revenue / unique_customers if unique_customers > 0 else 0
-    repeat_rate = (df_filtered[df_filtered['customer_type'] == 'Returning']['Customer ID'].nunique() / unique_customers * 100) if 'customer_type' in df_filtered.columns and unique_customers > 0 else 0
-    avg_profit_per_order = total_profit / df_filtered['Order ID'].nunique() if df_filtered['Order ID'].nunique() > 0 else 0
-    
     col5.metric(
         "👥 Unique Customers",
-        f"{unique_customers:,}",
+        f"{approx}{overview['unique_customers']:,}",
         delta="Total customers"
     )
     col6.metric(
         "💎 Revenue Per Customer",
-        f"${revenue_per_customer:.2f}",
+        f"{approx}${overview['revenue_per_customer']:.2f}",
         delta="Lifetime value"
     )
     col7.metric(
         "🔁 Repeat Customer Rate",
-        f"{repeat_rate:.1f}%",
+        f"{approx}{overview['repeat_customer_rate']:.1f}%",
         delta="Retention indicator"
     )
     col8.metric(
         "💰 Profit Per Order",
-        f"${avg_profit_per_order:.2f}",
+        f"{approx}${overview['profit_per_order']:.2f}",
         delta="Average profitability"
     )
+    if approximate_counts:
+        if overview['approximate']:
+            st.caption(f"≈ Distinct counts estimated from HyperLogLog sketches "
+                       f"(±{sketch_slice.relative_error:.1%} standard error).")
+        else:
+            st.caption("Exact distinct counts: approximate mode needs a date range of whole months.")
     
     st.markdown("---")
     
@@ -190,230 +370,245 @@ with tab1:
     
     with col1:
         st.markdown("### 📦 Revenue by Category")
-        if 'Category' in df_filtered.columns:
-            category_data = df_filtered.groupby('Category')['Sales'].sum().sort_values(ascending=False)
-            fig = px.pie(
-                values=category_data.values,
-                names=category_data.index,
-                hole=0.3,
-                title="Category Revenue Distribution"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        if 'Category' in columns:
+            category_data = cached_view('revenue_by_category')
+            with profiler.section("chart.category_pie"):
+                fig = px.pie(
+                    values=category_data.values,
+                    names=category_data.index,
+                    hole=0.3,
+                    title="Category Revenue Distribution"
+                )
+                st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.markdown("### 🌍 Revenue by Region")
-        if 'Region' in df_filtered.columns:
-            region_data = df_filtered.groupby('Region')['Sales'].sum().sort_values(ascending=False)
-            fig = px.pie(
-                values=region_data.values,
-                names=region_data.index,
-                hole=0.3,
-                title="Region Revenue Distribution"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        if 'Region' in columns:
+            region_data = cached_view('revenue_by_region')
+            with profiler.section("chart.region_pie"):
+                fig = px.pie(
+                    values=region_data.values,
+                    names=region_data.index,
+                    hole=0.3,
+                    title="Region Revenue Distribution"
+                )
+                st.plotly_chart(fig, use_container_width=True)
 
 # ======================== TAB 2: SALES TRENDS ========================
-with tab2:
+def render_trends():
     st.markdown("### 💹 SALES & REVENUE TRENDS")
     
-    # Monthly trend
-    monthly_data = df_filtered.groupby(df_filtered['Order Date'].dt.to_period('M')).agg({
-        'Sales': 'sum',
-        'Profit': 'sum',
-        'Order ID': 'count'
-    }).reset_index()
-    monthly_data['Order Date'] = monthly_data['Order Date'].astype(str)
+    # Revenue trend at the chosen granularity (kept outside the widget so it survives tab switches)
+    st.radio(
+        "Granularity",
+        options=list(TREND_FREQUENCIES),
+        index=list(TREND_FREQUENCIES).index(trend_freq),
+        format_func=TREND_FREQUENCIES.get,
+        horizontal=True,
+        key="trend_freq_picker",
+        on_change=lambda: st.session_state.update(trend_freq=st.session_state["trend_freq_picker"])
+    )
+    trend_label = TREND_FREQUENCIES[trend_freq]
+    trend_data = cached_view(f'trend_{trend_freq}')
+    if 'points' in trend_data.attrs:
+        st.caption(f"Showing {len(trend_data):,} of {trend_data.attrs['points']:,} periods, "
+                   f"sampled to keep peaks and dips")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("#### 📈 Monthly Revenue Trend")
-        fig = px.line(
-            monthly_data,
-            x='Order Date',
-            y='Sales',
-            markers=True,
-            title="Monthly Revenue",
-            labels={'Sales': 'Revenue ($)', 'Order Date': 'Month'}
-        )
-        fig.add_trace(go.Scatter(
-            x=monthly_data['Order Date'],
-            y=monthly_data['Profit'],
-            name='Profit',
-            yaxis='y2',
-            line=dict(color='red')
-        ))
-        fig.update_layout(
-            yaxis2=dict(title='Profit ($)', overlaying='y', side='right'),
-            hovermode='x unified'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.markdown(f"#### 📈 {trend_label} Revenue Trend")
+        with profiler.section("chart.trend_revenue"):
+            fig = px.line(
+                trend_data,
+                x='Order Date',
+                y='Sales',
+                markers=trend_freq != 'D',
+                title=f"{trend_label} Revenue",
+                labels={'Sales': 'Revenue ($)', 'Order Date': 'Period'}
+            )
+            fig.add_trace(go.Scatter(
+                x=trend_data['Order Date'],
+                y=trend_data['Profit'],
+                name='Profit',
+                yaxis='y2',
+                line=dict(color='red')
+            ))
+            fig.update_layout(
+                yaxis2=dict(title='Profit ($)', overlaying='y', side='right'),
+                hovermode='x unified'
+            )
+            st.plotly_chart(fig, use_container_width=True)
     
     with col2:
-        st.markdown("#### 📦 Monthly Order Volume")
-        fig = px.bar(
-            monthly_data,
-            x='Order Date',
-            y='Order ID',
-            title="Monthly Orders",
-            labels={'Order ID': 'Number of Orders', 'Order Date': 'Month'},
-            color='Order ID',
-            color_continuous_scale='Blues'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.markdown(f"#### 📦 {trend_label} Order Volume")
+        with profiler.section("chart.trend_orders"):
+            fig = px.bar(
+                trend_data,
+                x='Order Date',
+                y='Order ID',
+                title=f"{trend_label} Orders",
+                labels={'Order ID': 'Number of Orders', 'Order Date': 'Period'},
+                color='Order ID',
+                color_continuous_scale='Blues'
+            )
+            st.plotly_chart(fig, use_container_width=True)
     
     # Top products
     st.markdown("---")
     st.markdown("#### 🔥 TOP 10 PRODUCTS BY REVENUE")
-    if 'Product Name' in df_filtered.columns:
-        top_products = df_filtered.groupby('Product Name').agg({
-            'Sales': 'sum',
-            'Profit': 'sum',
-            'Order ID': 'count'
-        }).sort_values('Sales', ascending=False).head(10)
-        top_products.columns = ['Revenue', 'Profit', 'Orders']
-        top_products['Profit Margin %'] = (top_products['Profit'] / top_products['Revenue'] * 100).round(2)
+    if 'Product Name' in columns:
+        top_products = cached_view('top_products')
         
-        fig = px.bar(
-            top_products.reset_index(),
-            x='Revenue',
-            y='Product Name',
-            orientation='h',
-            color='Profit',
-            color_continuous_scale='RdYlGn',
-            title="Top 10 Products",
-            labels={'Revenue': 'Revenue ($)', 'Profit': 'Profit ($)'}
-        )
-        fig.update_yaxes(automargin=True)
-        st.plotly_chart(fig, use_container_width=True)
+        with profiler.section("chart.top_products"):
+            fig = px.bar(
+                top_products.reset_index(),
+                x='Revenue',
+                y='Product Name',
+                orientation='h',
+                color='Profit',
+                color_continuous_scale='RdYlGn',
+                title="Top 10 Products",
+                labels={'Revenue': 'Revenue ($)', 'Profit': 'Profit ($)'}
+            )
+            fig.update_yaxes(automargin=True)
+            st.plotly_chart(fig, use_container_width=True)
 
 # ======================== TAB 3: CUSTOMER INSIGHTS ========================
-with tab3:
+def render_customers():
     st.markdown("### 👥 CUSTOMER INSIGHTS & SEGMENTATION")
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("#### 🆕 New vs Repeat Customers")
-        if 'customer_type' in df_filtered.columns:
-            cust_type_data = df_filtered.groupby('customer_type').agg({
-                'Customer ID': 'nunique',
-                'Sales': 'sum',
-                'Profit': 'sum'
-            }).reset_index()
-            cust_type_data.columns = ['Type', 'Customers', 'Revenue', 'Profit']
+        if 'customer_type' in columns:
+            cust_type_data = cached_view('customer_type_revenue')
             
-            fig = px.bar(
-                cust_type_data,
-                x='Type',
-                y=['Revenue', 'Profit'],
-                barmode='group',
-                title="Revenue by Customer Type",
-                labels={'value': 'Amount ($)'}
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with profiler.section("chart.customer_type_revenue"):
+                fig = px.bar(
+                    cust_type_data,
+                    x='Type',
+                    y=['Revenue', 'Profit'],
+                    barmode='group',
+                    title="Revenue by Customer Type",
+                    labels={'value': 'Amount ($)'}
+                )
+                st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.markdown("#### 💎 PARETO ANALYSIS")
-        customer_value = df_filtered.groupby('Customer ID')['Sales'].sum().sort_values(ascending=False)
-        total_revenue = customer_value.sum()
-        cumsum_pct = (customer_value.cumsum() / total_revenue * 100).values[:100]
+        pareto = cached_view('pareto_curve')
         
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            y=cumsum_pct,
-            mode='lines+markers',
-            name='Cumulative Revenue %',
-            fill='tozeroy'
-        ))
-        fig.add_hline(y=80, line_dash="dash", line_color="red", annotation_text="80% Rule")
-        fig.update_layout(
-            title="Pareto Curve: Customer Contribution",
-            xaxis_title="Top N Customers",
-            yaxis_title="Cumulative Revenue %",
-            hovermode='x unified'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        with profiler.section("chart.pareto"):
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=pareto['Customers'],
+                y=pareto['Revenue %'],
+                customdata=pareto['Customers %'],
+                mode='lines',
+                name='Cumulative Revenue %',
+                fill='tozeroy',
+                hovertemplate="Top %{x:,} customers (%{customdata:.1f}%): %{y:.1f}% of revenue<extra></extra>"
+            ))
+            fig.add_hline(y=80, line_dash="dash", line_color="red", annotation_text="80% Rule")
+            fig.update_layout(
+                title="Pareto Curve: Customer Contribution",
+                xaxis_title="Top N Customers",
+                yaxis_title="Cumulative Revenue %",
+                hovermode='x unified'
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        reaching = pareto[pareto['Revenue %'] >= 80]
+        if len(reaching):
+            st.caption(
+                f"{reaching['Customers'].iloc[0]:,} of {pareto.attrs['points']:,} customers "
+                f"({reaching['Customers %'].iloc[0]:.1f}%) bring in 80% of revenue"
+            )
     
     # Customer churn
     st.markdown("---")
     st.markdown("#### ⚠️ CHURN RISK ANALYSIS")
-    if 'Order Date' in df_filtered.columns:
-        today = df_filtered['Order Date'].max()
-        customer_activity = df_filtered.groupby('Customer ID')['Order Date'].max().reset_index()
-        customer_activity.columns = ['Customer_ID', 'Last_Order']
-        customer_activity['Days_Since_Last_Order'] = (today - customer_activity['Last_Order']).dt.days
-        
-        median_days = customer_activity['Days_Since_Last_Order'].median()
-        at_risk = (customer_activity['Days_Since_Last_Order'] > median_days).sum()
+    if 'Order Date' in columns:
+        churn = cached_view('churn')
+        median_days = churn['median_days']
         
         col1, col2, col3 = st.columns(3)
         col1.metric("⏱️ Median Days Since Order", f"{median_days:.0f} days")
-        col2.metric("🔴 At-Risk Customers", f"{at_risk:,}")
-        col3.metric("% At Risk", f"{(at_risk/len(customer_activity)*100):.1f}%")
-        
-        fig = px.histogram(
-            customer_activity,
-            x='Days_Since_Last_Order',
-            nbins=30,
-            title="Distribution: Days Since Last Order",
-            labels={'Days_Since_Last_Order': 'Days'}
+        col2.metric("🔴 At-Risk Customers", f"{churn['at_risk']:,}")
+        col3.metric("% At Risk", f"{churn['at_risk_pct']:.1f}%")
+        low, medium = RECENCY_THRESHOLDS
+        risk_counts = churn['risk_counts']
+        st.caption(
+            f"Days since last order: ≤{low} {risk_counts.iloc[0]:,} customers · "
+            f"{low + 1}-{medium} {risk_counts.iloc[1]:,} · >{medium} {risk_counts.iloc[2]:,}"
         )
-        fig.add_vline(x=median_days, line_dash="dash", line_color="red", annotation_text=f"Median: {median_days:.0f}")
-        st.plotly_chart(fig, use_container_width=True)
+        
+        with profiler.section("chart.churn_histogram"):
+            # Binned on the server: one bar per bin instead of one point per customer
+            histogram = churn['histogram']
+            fig = go.Figure(go.Bar(
+                x=(histogram['From'] + histogram['To']) / 2,
+                y=histogram['Customers'],
+                width=histogram['To'] - histogram['From'],
+                name='Customers'
+            ))
+            fig.update_layout(
+                title="Distribution: Days Since Last Order",
+                xaxis_title="Days",
+                yaxis_title="Customers",
+                bargap=0
+            )
+            fig.add_vline(x=median_days, line_dash="dash", line_color="red", annotation_text=f"Median: {median_days:.0f}")
+            st.plotly_chart(fig, use_container_width=True)
 
 # ======================== TAB 4: REGIONAL ANALYSIS ========================
-with tab4:
+def render_regional():
     st.markdown("### 🌍 REGIONAL PERFORMANCE ANALYSIS")
     
-    if 'Region' in df_filtered.columns:
-        region_data = df_filtered.groupby('Region').agg({
-            'Sales': 'sum',
-            'Profit': 'sum',
-            'Order ID': 'count',
-            'Customer ID': 'nunique'
-        }).reset_index()
-        region_data.columns = ['Region', 'Revenue', 'Profit', 'Orders', 'Customers']
-        region_data['Profit_Margin_%'] = (region_data['Profit'] / region_data['Revenue'] * 100).round(2)
-        region_data['Avg_Order_Value'] = (region_data['Revenue'] / region_data['Orders']).round(2)
+    if 'Region' in columns:
+        region_data = cached_view('regional_table')
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
             st.markdown("#### 📊 Revenue by Region")
-            fig = px.bar(
-                region_data.sort_values('Revenue', ascending=False),
-                x='Region',
-                y='Revenue',
-                color='Revenue',
-                color_continuous_scale='Blues',
-                title="Regional Revenue"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with profiler.section("chart.regional_revenue"):
+                fig = px.bar(
+                    region_data.sort_values('Revenue', ascending=False),
+                    x='Region',
+                    y='Revenue',
+                    color='Revenue',
+                    color_continuous_scale='Blues',
+                    title="Regional Revenue"
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             st.markdown("#### 💰 Profit by Region")
-            fig = px.bar(
-                region_data.sort_values('Profit', ascending=False),
-                x='Region',
-                y='Profit',
-                color='Profit',
-                color_continuous_scale='RdYlGn',
-                title="Regional Profit"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with profiler.section("chart.regional_profit"):
+                fig = px.bar(
+                    region_data.sort_values('Profit', ascending=False),
+                    x='Region',
+                    y='Profit',
+                    color='Profit',
+                    color_continuous_scale='RdYlGn',
+                    title="Regional Profit"
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
         with col3:
             st.markdown("#### 📈 Profit Margin by Region")
-            fig = px.bar(
-                region_data.sort_values('Profit_Margin_%', ascending=False),
-                x='Region',
-                y='Profit_Margin_%',
-                color='Profit_Margin_%',
-                color_continuous_scale='RdYlGn',
-                title="Regional Profit Margin"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with profiler.section("chart.regional_margin"):
+                fig = px.bar(
+                    region_data.sort_values('Profit_Margin_%', ascending=False),
+                    x='Region',
+                    y='Profit_Margin_%',
+                    color='Profit_Margin_%',
+                    color_continuous_scale='RdYlGn',
+                    title="Regional Profit Margin"
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
         # Regional comparison table
         st.markdown("---")
@@ -429,78 +624,59 @@ with tab4:
         )
 
 # ======================== TAB 5: DISCOUNT IMPACT ========================
-with tab5:
+def render_discount():
     st.markdown("### 🏷️ DISCOUNT IMPACT ANALYSIS")
     
-    if 'Discount' in df_filtered.columns:
-        # Discount segments
-        discount_segments = []
-        for bin_label, bin_range in [
-            ('No Discount (0%)', (0, 0)),
-            ('Low (1-10%)', (0.01, 0.10)),
-            ('Medium (11-20%)', (0.11, 0.20)),
-            ('High (20%+)', (0.20, 1.0))
-        ]:
-            seg_data = df_filtered[
-                (df_filtered['Discount'] >= bin_range[0]) &
-                (df_filtered['Discount'] <= bin_range[1])
-            ]
-            if len(seg_data) > 0:
-                discount_segments.append({
-                    'Discount Level': bin_label,
-                    'Orders': len(seg_data),
-                    'Revenue': seg_data['Sales'].sum(),
-                    'Profit': seg_data['Profit'].sum(),
-                    'Avg Order Value': seg_data['Sales'].mean(),
-                    'Profit Margin %': (seg_data['Profit'].sum() / seg_data['Sales'].sum() * 100)
-                })
-        
-        discount_df = pd.DataFrame(discount_segments)
+    if 'Discount' in columns:
+        discount_df = cached_view('discount_segments')
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("#### 📊 Profit Margin by Discount Level")
-            fig = px.bar(
-                discount_df,
-                x='Discount Level',
-                y='Profit Margin %',
-                color='Profit Margin %',
-                color_continuous_scale='RdYlGn',
-                title="Does Discount Hurt Profit?"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with profiler.section("chart.discount_margin"):
+                fig = px.bar(
+                    discount_df,
+                    x='Discount Level',
+                    y='Profit Margin %',
+                    color='Profit Margin %',
+                    color_continuous_scale='RdYlGn',
+                    title="Does Discount Hurt Profit?"
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             st.markdown("#### 📦 Order Volume by Discount Level")
-            fig = px.bar(
-                discount_df,
-                x='Discount Level',
-                y='Orders',
-                color='Orders',
-                color_continuous_scale='Blues',
-                title="Volume Impact of Discounts"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            with profiler.section("chart.discount_volume"):
+                fig = px.bar(
+                    discount_df,
+                    x='Discount Level',
+                    y='Orders',
+                    color='Orders',
+                    color_continuous_scale='Blues',
+                    title="Volume Impact of Discounts"
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
         # Revenue vs Profit
         st.markdown("---")
         st.markdown("#### 💰 REVENUE vs PROFIT by Discount Level")
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=discount_df['Discount Level'],
-            y=discount_df['Revenue'],
-            name='Revenue',
-            marker_color='lightblue'
-        ))
-        fig.add_trace(go.Bar(
-            x=discount_df['Discount Level'],
-            y=discount_df['Profit'],
-            name='Profit',
-            marker_color='lightgreen'
-        ))
-        fig.update_layout(barmode='group', title="Revenue vs Profit by Discount")
-        st.plotly_chart(fig, use_container_width=True)
+        with profiler.section("chart.discount_revenue_profit"):
+            fig = go.Figure()
+            fig.add_trace(go.Bar(
+                x=discount_df['Discount Level'],
+                y=discount_df['Revenue'],
+                name='Revenue',
+                marker_color='lightblue'
+            ))
+            fig.add_trace(go.Bar(
+                x=discount_df['Discount Level'],
+                y=discount_df['Profit'],
+                name='Profit',
+                marker_color='lightgreen'
+            ))
+            fig.update_layout(barmode='group', title="Revenue vs Profit by Discount")
+            st.plotly_chart(fig, use_container_width=True)
         
         # Detailed table
         st.markdown("---")
@@ -515,6 +691,164 @@ with tab5:
             use_container_width=True
         )
 
+# ======================== TAB LAYOUT ========================
+TAB_LABELS = {
+    'overview': "📈 Overview KPIs",
+    'trends': "💹 Sales Trends",
+    'customers': "👥 Customer Insights",
+    'regional': "🌍 Regional Analysis",
+    'discount': "🏷️ Discount Impact",
+}
+TAB_RENDERERS = {
+    'overview': render_overview,
+    'trends': render_trends,
+    'customers': render_customers,
+    'regional': render_regional,
+    'discount': render_discount,
+}
+
+if lazy_tabs:
+    # Tab-style selector: only the chosen tab's body runs on this rerun
+    active_tab = st.radio(
+        "View",
+        options=list(TAB_LABELS),
+        format_func=TAB_LABELS.get,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="active_tab"
+    )
+    with profiler.section(f"tab.{active_tab}"):
+        TAB_RENDERERS[active_tab]()
+
+    # Drop this session's queued prefetches from an earlier filter state
+    for future in st.session_state.get("prefetch_futures", []):
+        future.cancel()
+    if prefetch_tabs:
+        st.session_state["prefetch_futures"] = result_cache.prefetch([
+            (view_key(name), compute)
+            for tab, tab_computes in views.items() if tab != active_tab
+            for name, compute in tab_computes.items()
+        ])
+else:
+    for tab, (name, render) in zip(st.tabs(list(TAB_LABELS.values())), TAB_RENDERERS.items()):
+        with tab, profiler.section(f"tab.{name}"):
+            render()
+
+# ======================== EXPORT ========================
+def export_data(name, fmt):
+    # Deferred: runs on its own thread when the button is clicked, encoding CHUNK_ROWS rows at a time.
+    # Views are exported at full resolution, not as the chart's sample
+    if sql_backend is not None:
+        rows = lambda: sql_backend.iter_rows(filter_state)
+        full_views = lambda: sql_backend.tab_views(filter_state, trend_freq, max_points=None)
+    else:
+        rows = lambda: frame_chunks(df_filtered)
+        full_views = lambda: agg.tab_views(
+            df_filtered, agg_source, sketch_slice, rfm_slice, daily_slice, trend_freq, max_points=None
+        )
+
+    def chunks():
+        if name == "rows":
+            return rows()
+        computes = {view: compute for tab_computes in full_views().values() for view, compute in tab_computes.items()}
+        return frame_chunks(view_table(name, computes[name]()))
+
+    return deferred_export(chunks, fmt)
+
+st.sidebar.markdown("---")
+with st.sidebar.expander("⬇️ Export data"):
+    export_name = st.selectbox(
+        "What",
+        options=["rows"] + sorted(view_computes),
+        format_func=lambda n: f"Filtered order lines ({filtered_rows:,})" if n == "rows" else f"View: {n}",
+        key="export_name"
+    )
+    export_fmt = st.radio(
+        "Format",
+        options=list(EXPORT_FORMATS) if PARQUET_AVAILABLE else ["csv"],
+        format_func=str.upper,
+        horizontal=True,
+        key="export_fmt"
+    )
+    # Views are aggregates; only the order lines can outgrow what the button holds in memory
+    too_large = export_name == "rows" and filtered_rows > EXPORT_MAX_ROWS
+    service_link = (f"{SERVICE_URL.rstrip('/')}/export/{export_name}.{export_fmt}?"
+                    f"{filter_query(filter_state, freq=trend_freq)}") if SERVICE_URL else ""
+    if not too_large:
+        st.download_button(
+            "⬇️ Download",
+            data=export_data(export_name, export_fmt),
+            file_name=f"{export_name}_{filter_state.start}_{filter_state.end}.{export_fmt}",
+            mime=EXPORT_FORMATS[export_fmt],
+            on_click="ignore"
+        )
+    if service_link:
+        # The JSON service streams the file without buffering it in any server process
+        label = "⬇️ Stream it from the analytics service" if too_large else "Stream it from the analytics service"
+        st.markdown(f"[{label}]({service_link})")
+    elif too_large:
+        st.warning(
+            f"{filtered_rows:,} order lines is more than the download button builds in memory "
+            f"({EXPORT_MAX_ROWS:,}). Narrow the filters, or run `python -m analytics.service` and set "
+            "DASHBOARD_SERVICE_URL to stream the export."
+        )
+
+# ======================== CACHE STATS ========================
+cache_stats = result_cache.stats()
+st.sidebar.caption(
+    f"⚡ Result cache: {cache_stats['hits']:,} hits · {cache_stats['misses']:,} misses · "
+    f"{cache_stats['entries']:,} views ({cache_stats['bytes'] / 1024:,.0f} KB)"
+)
+disk_cache = get_disk_cache()
+if disk_cache is not None:
+    disk_stats = disk_cache.stats()
+    st.sidebar.caption(
+        f"💾 Disk cache: {disk_stats['hits']:,} hits · {disk_stats['misses']:,} misses · "
+        f"{disk_stats['bytes'] / 1024 ** 2:,.1f} MB"
+    )
+
+# ======================== PERFORMANCE PANEL ========================
+st.sidebar.markdown("---")
+st.sidebar.toggle(
+    "🩺 Performance panel",
+    value=perf_enabled,
+    key="perf_panel",
+    help="Time every section of this page (load, filters, views, charts); off = no instrumentation"
+)
+if profiler.enabled:
+    st.sidebar.toggle("🧠 Track memory (slower)", value=False, key="perf_memory")
+    perf_record = profiler.finish()
+    profile_history = get_profile_history()
+    profile_history.add(perf_record)
+    append_log(perf_record)
+
+    with st.sidebar.expander("🩺 Performance", expanded=True):
+        st.markdown(f"**This rerun:** {perf_record['total_ms']:,.0f} ms")
+        # tracemalloc's peak is process-wide: with other sessions profiling it includes their allocations
+        peak_label = 'Peak KB (approx.)' if perf_record['memory_approximate'] else 'Peak KB'
+        if perf_record['memory_approximate']:
+            st.caption("🧠 Another session tracked memory at the same time: peaks are approximate")
+        current = pd.DataFrame([
+            {
+                'Section': '\u2003' * sec['depth'] + sec['name'],
+                'ms': round(sec['ms'], 1),
+                **({peak_label: round(sec['peak_kb'], 1)} if sec['peak_kb'] is not None else {}),
+            }
+            for sec in perf_record['sections']
+        ])
+        st.dataframe(current, hide_index=True, use_container_width=True)
+
+        st.markdown("**Across reruns (ms)**")
+        rolling = pd.DataFrame.from_dict(profile_history.summary(), orient='index')
+        st.dataframe(rolling.round(1).sort_values('p90', ascending=False), use_container_width=True)
+
+        st.download_button(
+            "⬇️ Download JSON",
+            data=json.dumps({'rerun': perf_record, 'rolling': profile_history.summary()}, indent=2),
+            file_name="dashboard_perf.json",
+            mime="application/json"
+        )
+
 # ======================== FOOTER ========================
 st.markdown("---")
 st.markdown("""
@@ -7,7 +7,14 @@ echo.
 echo ======================================================================
 echo   STEP 1: VERIFY PROJECT
 echo ======================================================================
-python verify_setup.py
+REM Full data scan + performance gate against verify_baseline.json
+python verify_setup.py --full
+if errorlevel 1 (
+    echo.
+    echo ⚠️  Verification failed. Please fix issues before deploying.
+    pause
+    exit /b 1
+)
 
 echo.
 echo ======================================================================
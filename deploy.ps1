@@ -13,7 +13,8 @@ Write-Host "`n📋 STEP 1: VERIFYING PROJECT SETUP" -ForegroundColor Yellow
 Write-Host "────────────────────────────────────" -ForegroundColor Yellow
 
 if (Test-Path "verify_setup.py") {
-    python verify_setup.py
+    # Full data scan + performance gate against verify_baseline.json
+    python verify_setup.py --full
     $verifyResult = $?
 } else {
     Write-Host "❌ verify_setup.py not found!" -ForegroundColor Red
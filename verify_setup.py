@@ -4,10 +4,32 @@
 VERIFICATION SCRIPT - E-COMMERCE ANALYTICS PROJECT
 =================================================================
 Verifies that all components are properly set up and working
+
+    python verify_setup.py           structure, data headers, imports,
+                                     dashboard export through Streamlit
+    python verify_setup.py --perf    + import times, dashboard cold load and
+                                     peak memory vs. verify_baseline.json
+    python verify_setup.py --full    + --perf, and every data file streamed
+                                     end to end (schema, dtypes, row count,
+                                     checksum)
+
+Measurements are stored as the baseline only with --update-baseline.
+Runs against a baseline exit non-zero when a measurement is more than
+--tolerance (default 50%) worse; without one, performance is measured
+and reported as NOT GATED.
 """
 
+import argparse
+import hashlib
+import io
+import json
+import logging
 import os
+import platform
+import statistics
+import subprocess
 import sys
+import time
 import pandas as pd
 
 def check_structure():
@@ -105,7 +127,366 @@ def check_dependencies():
     
     return all_good
 
-def main():
+# ======================== EXPORT CHECK ========================
+EXPORT_CHECK_ROWS = 2_000
+
+
+def check_export():
+    """Run the dashboard's deferred download callable through Streamlit's own download path"""
+    print("\n" + "="*80)
+    print("4️⃣ CHECKING DASHBOARD EXPORT")
+    print("="*80)
+    try:
+        from analytics.export import EXPORT_FORMATS, PARQUET_AVAILABLE, deferred_export, frame_chunks
+        from streamlit.runtime.media_file_manager import MediaFileManager
+        from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    except ImportError as e:
+        print(f"❌ Cannot load the export path: {str(e)[:80]}")
+        return False
+
+    # Outside `streamlit run` every media call warns about the missing script context
+    logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').setLevel(logging.ERROR)
+    df = pd.read_csv('data/processed/superstore_cleaned.csv', encoding='latin-1', nrows=EXPORT_CHECK_ROWS)
+    storage = MemoryMediaFileStorage('/media')
+    manager = MediaFileManager(storage)
+    all_good = True
+    for fmt in [f for f in EXPORT_FORMATS if f != 'parquet' or PARQUET_AVAILABLE]:
+        # What a click on the download button does: run the callable, convert its result, store the file
+        data = deferred_export(lambda: frame_chunks(df, EXPORT_CHECK_ROWS // 3), fmt)
+        try:
+            file_id = manager.add_deferred(data, EXPORT_FORMATS[fmt], 'verify_setup', file_name=f'rows.{fmt}')
+            content = storage.get_file(os.path.basename(manager.execute_deferred(file_id))).content
+            back = pd.read_csv(io.BytesIO(content)) if fmt == 'csv' else pd.read_parquet(io.BytesIO(content))
+        except Exception as e:
+            print(f"❌ {fmt.upper():8} download failed: {str(e)[:100]}")
+            all_good = False
+            continue
+        if back.shape != df.shape:
+            print(f"❌ {fmt.upper():8} download has shape {back.shape}, expected {df.shape}")
+            all_good = False
+        else:
+            print(f"✅ {fmt.upper():8} download - {len(back):,} rows, {len(content) / 1024:,.0f} KB")
+    return all_good
+
+# ======================== FULL DATA CHECK ========================
+CHUNK_ROWS = 100_000
+BASELINE_FILE = 'verify_baseline.json'
+
+RAW_COLUMNS = [
+    'Row ID', 'Order ID', 'Order Date', 'Ship Date', 'Ship Mode', 'Customer ID', 'Customer Name',
+    'Segment', 'Country', 'City', 'State', 'Postal Code', 'Region', 'Product ID', 'Category',
+    'Sub-Category', 'Product Name', 'Sales', 'Quantity', 'Discount', 'Profit',
+]
+NUMERIC_COLUMNS = ['Row ID', 'Sales', 'Quantity', 'Discount', 'Profit']
+
+# Expected layout of each data file. 'required' includes the last column: a truncated
+# row leaves it empty, which is how a corrupted tail shows up
+DATA_SPECS = {
+    'data/raw/superstore.csv': {
+        'description': 'Raw Data',
+        'columns': RAW_COLUMNS,
+        'numeric': NUMERIC_COLUMNS,
+        'dates': {'Order Date': '%m/%d/%Y', 'Ship Date': '%m/%d/%Y'},
+        'required': ['Order ID', 'Order Date', 'Customer ID', 'Product ID', 'Sales', 'Profit'],
+    },
+    'data/processed/superstore_cleaned.csv': {
+        'description': 'Cleaned Data',
+        'columns': RAW_COLUMNS + [
+            'order_year', 'order_month', 'order_quarter', 'order_day_of_week', 'order_week_of_year',
+            'profit_margin', 'has_discount', 'high_discount',
+            'First Order Date', 'customer_type',
+            'order_frequency', 'total_customer_sales', 'avg_order_value', 'total_customer_profit',
+            'customer_first_order',
+            'delivery_days', 'delivery_delay_flag', 'revenue_segment',
+        ],
+        'numeric': NUMERIC_COLUMNS + ['order_year', 'order_month', 'profit_margin', 'total_customer_sales',
+                                      'delivery_days'],
+        'dates': {c: '%Y-%m-%d' for c in ['Order Date', 'Ship Date', 'First Order Date', 'customer_first_order']},
+        'required': ['Order ID', 'Order Date', 'Customer ID', 'Sales', 'customer_type', 'revenue_segment'],
+    },
+    'data/processed/kpis.csv': {
+        'description': 'KPI Metrics',
+        'columns': ['KPI', 'Value', 'Unit'],
+        'numeric': ['Value'],
+        'dates': {},
+        'required': ['KPI', 'Value', 'Unit'],
+    },
+}
+
+
+def scan_csv(file_path, spec, chunk_rows=CHUNK_ROWS):
+    """Stream a CSV once: row count, SHA-1 of its bytes and any schema/dtype problems"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+
+    problems = []
+    rows = 0
+    try:
+        for chunk in pd.read_csv(file_path, encoding='latin-1', chunksize=chunk_rows, dtype=str,
+                                 keep_default_na=False, na_values=['']):
+            if rows == 0:
+                missing = [c for c in spec['columns'] if c not in chunk.columns]
+                if missing:
+                    problems.append(f"missing columns: {', '.join(missing)}")
+                    break
+            for col in spec['numeric']:
+                values = chunk[col].dropna()
+                bad = pd.to_numeric(values, errors='coerce').isna()
+                if bad.any():
+                    problems.append(f"{col}: non-numeric value {values[bad].iloc[0]!r} (row {values[bad].index[0] + 1})")
+            for col, date_format in spec['dates'].items():
+                values = chunk[col].dropna()
+                bad = pd.to_datetime(values, format=date_format, errors='coerce').isna()
+                if bad.any():
+                    problems.append(f"{col}: unparseable date {values[bad].iloc[0]!r} (row {values[bad].index[0] + 1})")
+            for col in spec['required']:
+                empty = chunk[col].isna()
+                if empty.any():
+                    problems.append(f"{col}: empty in {int(empty.sum())} rows (first: row {chunk.index[empty][0] + 1})")
+            rows += len(chunk)
+            if len(problems) >= 5:
+                break
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        problems.append(f"unreadable after row {rows}: {str(e)[:80]}")
+    return {'rows': rows, 'sha1': digest.hexdigest()}, problems
+
+
+def scan_columnar(path):
+    """Check every part of the columnar bundle: column lengths, category codes, total rows"""
+    import numpy as np
+    from analytics.storage import read_schema
+
+    schema = read_schema(path)
+    problems = []
+    rows = 0
+    for part in schema['parts']:
+        for spec in schema['columns']:
+            file_path = os.path.join(path, part['dir'], spec['file'])
+            try:
+                values = np.load(file_path, mmap_mode='r', allow_pickle=False)
+            except (OSError, ValueError) as e:
+                problems.append(f"{part['dir']}/{spec['file']}: {str(e)[:60]}")
+                continue
+            if len(values) != part['rows']:
+                problems.append(f"{part['dir']}/{spec['file']}: {len(values)} rows, manifest says {part['rows']}")
+            elif spec['kind'] == 'category' and len(values) and values.max() >= len(spec['categories']):
+                problems.append(f"{part['dir']}/{spec['file']}: category codes out of range")
+        rows += part['rows']
+    if rows != schema['rows']:
+        problems.append(f"parts hold {rows} rows, schema.json says {schema['rows']}")
+    return {'rows': int(rows)}, problems
+
+
+def check_data_full(baseline):
+    """Stream every data file end to end; returns (passed, measurements for the baseline)"""
+    print("\n" + "="*80)
+    print("5️⃣ CHECKING DATA FILES (FULL SCAN)")
+    print("="*80)
+    from analytics.storage import COLUMNAR_DIR, has_columnar
+
+    scans = [(path, spec['description'], lambda p=path, s=spec: scan_csv(p, s)) for path, spec in DATA_SPECS.items()]
+    columnar_path = os.path.join('data/processed', COLUMNAR_DIR)
+    if has_columnar(columnar_path):
+        scans.append((columnar_path, 'Columnar Data', lambda: scan_columnar(columnar_path)))
+
+    if not baseline:
+        print("ℹ️ No data baseline: row counts are not compared (record one with --update-baseline)")
+    all_good = True
+    measured = {}
+    for file_path, description, scan in scans:
+        if not os.path.exists(file_path):
+            print(f"❌ {description} ({file_path}) - MISSING")
+            all_good = False
+            continue
+        start = time.perf_counter()
+        result, problems = scan()
+        elapsed = time.perf_counter() - start
+        measured[file_path] = result
+        expected = baseline.get(file_path)
+        if expected and result['rows'] < expected['rows']:
+            problems.append(f"{result['rows']:,} rows, baseline has {expected['rows']:,} (truncated?)")
+
+        if problems:
+            print(f"❌ {description} ({file_path})")
+            for problem in problems:
+                print(f"   {problem}")
+            all_good = False
+            continue
+        print(f"✅ {description} ({file_path}) - {result['rows']:,} rows in {elapsed:.2f}s")
+        if expected and 'sha1' in result and result['sha1'] != expected.get('sha1'):
+            print(f"   ⚠️ Content changed since the baseline (sha1 {result['sha1'][:12]})")
+
+    return all_good, measured
+
+
+# ======================== PERFORMANCE ========================
+PERF_PACKAGES = ['pandas', 'plotly', 'streamlit']
+DASHBOARD_APP = 'dashboard/app.py'
+DASHBOARD_TIMEOUT = 300
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.5
+# Differences below these are noise, whatever the ratio
+MIN_REGRESSION = {'s': 0.25, 'MB': 50}
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None if the platform does not say)"""
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def _windows_peak_rss_mb():
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                    'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+        counters = Counters(cb=ctypes.sizeof(Counters))
+        kernel32, psapi = ctypes.windll.kernel32, ctypes.windll.psapi
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(Counters), wintypes.DWORD]
+        if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize / 1024 ** 2
+    except (AttributeError, OSError):
+        return None
+
+
+def probe_dashboard():
+    """Child process of measure_dashboard(): one cold run of the app, reported as JSON"""
+    from streamlit.testing.v1 import AppTest
+
+    start = time.perf_counter()
+    at = AppTest.from_file(DASHBOARD_APP, default_timeout=DASHBOARD_TIMEOUT).run()
+    seconds = time.perf_counter() - start
+    print(json.dumps({
+        'seconds': seconds,
+        'peak_rss_mb': peak_rss_mb(),
+        'errors': [str(e.message)[:200] for e in at.exception],
+    }))
+    return 0
+
+
+def _run(args):
+    # A fresh interpreter every time: nothing imported or cached yet
+    env = {**os.environ, 'DASHBOARD_RELOAD_INTERVAL': '0'}
+    result = subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env,
+                            timeout=DASHBOARD_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError((result.stderr.strip().splitlines() or ['no output'])[-1][:200])
+    return result.stdout.strip().splitlines()[-1]
+
+
+def measure_imports(repeat=DEFAULT_REPEAT):
+    """Median import time of each PERF_PACKAGES entry in a fresh interpreter, in seconds"""
+    times = {}
+    for package in PERF_PACKAGES:
+        code = f"import time; start = time.perf_counter(); import {package}; print(time.perf_counter() - start)"
+        times[package] = statistics.median(float(_run(['-c', code])) for _ in range(repeat))
+    return times
+
+
+def measure_dashboard(repeat=DEFAULT_REPEAT):
+    """Median cold-load time and peak resident memory of the dashboard's first run"""
+    runs = [json.loads(_run([os.path.abspath(__file__), '--probe', 'dashboard'])) for _ in range(repeat)]
+    errors = [e for run in runs for e in run['errors']]
+    rss = [run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None]
+    return {
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'peak_rss_mb': statistics.median(rss) if rss else None,
+        'errors': errors,
+    }
+
+
+def regressed(current, base, unit, tolerance):
+    """True when ``current`` is worse than ``base`` by more than ``tolerance`` and by more than noise"""
+    if base is None or current is None:
+        return False
+    return current > base * (1 + tolerance) and current - base > MIN_REGRESSION[unit]
+
+
+def check_performance(baseline, tolerance=DEFAULT_TOLERANCE, repeat=DEFAULT_REPEAT):
+    """Import, cold-load and memory measurements vs. the baseline; returns (passed, measurements)"""
+    print("\n" + "="*80)
+    print("6️⃣ CHECKING PERFORMANCE")
+    print("="*80)
+    if not baseline:
+        print("⚠️ No performance baseline: measuring only, regressions are NOT gated")
+
+    measured = {}
+    all_good = True
+    try:
+        for package, seconds in measure_imports(repeat).items():
+            measured[f'import {package}'] = seconds
+        dashboard = measure_dashboard(repeat)
+    except (RuntimeError, subprocess.TimeoutExpired, ValueError) as e:
+        print(f"❌ Measurement failed: {str(e)[:120]}")
+        return False, measured
+
+    if dashboard['errors']:
+        print(f"❌ Dashboard raised: {dashboard['errors'][0]}")
+        all_good = False
+    measured['dashboard cold load'] = dashboard['seconds']
+    if dashboard['peak_rss_mb'] is not None:
+        measured['dashboard peak memory'] = dashboard['peak_rss_mb']
+
+    for name, value in measured.items():
+        unit = 'MB' if name.endswith('memory') else 's'
+        base = baseline.get(name)
+        versus = f"  (baseline {base:.2f}{unit})" if base is not None else ""
+        if regressed(value, base, unit, tolerance):
+            print(f"❌ {name:25} {value:8.2f}{unit}{versus} - more than {tolerance:.0%} worse")
+            all_good = False
+        else:
+            icon = "✅" if base is not None else "📏"
+            print(f"{icon} {name:25} {value:8.2f}{unit}{versus}")
+    return all_good, measured
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, baseline):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify the project setup")
+    parser.add_argument('--perf', action='store_true',
+                        help="Also measure import times, dashboard cold load and memory against the baseline")
+    parser.add_argument('--full', action='store_true',
+                        help="--perf plus a full streamed scan of every data file (schema, dtypes, rows, checksum)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help=f"Baseline JSON (default: {BASELINE_FILE})")
+    parser.add_argument('--update-baseline', action='store_true', help="Store this run's measurements as the baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed slowdown / memory growth vs. the baseline (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"Runs per measurement, median kept (default: {DEFAULT_REPEAT})")
+    parser.add_argument('--probe', choices=['dashboard'], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe == 'dashboard':
+        return probe_dashboard()
+
     print("\n" + "█"*80)
     print("📊 E-COMMERCE ANALYTICS - PROJECT VERIFICATION")
     print("█"*80)
@@ -114,19 +495,39 @@ def main():
     results.append(("Structure", check_structure()))
     results.append(("Data", check_data()))
     results.append(("Dependencies", check_dependencies()))
+    results.append(("Export", check_export()))
+
+    baseline = load_baseline(args.baseline)
+    measured = {}
+    if args.full:
+        passed, measured['data'] = check_data_full(baseline.get('data', {}))
+        results.append(("Data (full scan)", passed))
+    if args.perf or args.full:
+        passed, measured['perf'] = check_performance(baseline.get('perf', {}), args.tolerance, args.repeat)
+        # Without a baseline nothing was compared: only a failed measurement is a result
+        results.append(("Performance", passed if baseline.get('perf') or not passed else None))
     
     print("\n" + "="*80)
     print("VERIFICATION SUMMARY")
     print("="*80)
     
-    all_passed = all(result[1] for result in results)
+    all_passed = all(result[1] is not False for result in results)
+    not_gated = [check_name.lower() for check_name, passed in results if passed is None]
     
     for check_name, passed in results:
-        status = "✅ PASS" if passed else "❌ FAIL"
+        status = "⚠️ NOT GATED" if passed is None else "✅ PASS" if passed else "❌ FAIL"
         print(f"{check_name:20} {status}")
+
+    if measured and args.update_baseline:
+        save_baseline(args.baseline, {**baseline, **measured,
+                                      'python': platform.python_version(), 'platform': platform.platform()})
+        print(f"\n💾 Baseline saved to {args.baseline} ({', '.join(measured)})")
     
     print("\n" + "█"*80)
-    if all_passed:
+    if all_passed and not_gated:
+        print(f"✨ ALL CHECKS PASSED - but {', '.join(not_gated)} NOT gated: no baseline in {args.baseline}")
+        print("   Record one on a known-good build with: python verify_setup.py --full --update-baseline")
+    elif all_passed:
         print("✨ ALL CHECKS PASSED! Project is ready to go! 🚀")
     else:
         print("⚠️ SOME CHECKS FAILED. Please review the errors above.")